@@ -0,0 +1,67 @@
+""" Proposition change notifications
+
+Revision ID: 043f32a10a4f
+Revises: 0c447e12b93c
+Create Date: 2026-10-18 12:41:09.551870
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '043f32a10a4f'
+down_revision: str | Sequence[str] | None = '0c447e12b93c'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+# one notification per stream and statement; ids are omitted when the
+#  statement changed too many rows to fit the 8000 bytes payload limit
+NOTIFY_FUNCTION = """
+CREATE FUNCTION notify_proposition_changes() RETURNS trigger AS $$
+DECLARE
+    changes record;
+BEGIN
+    FOR changes IN
+        SELECT stream_id, array_agg(id ORDER BY id) AS ids
+        FROM changed_rows
+        GROUP BY stream_id
+    LOOP
+        PERFORM pg_notify('proposition_changes', json_build_object(
+            'op', TG_OP,
+            'stream_id', changes.stream_id,
+            'ids', CASE WHEN cardinality(changes.ids) <= 500
+                        THEN changes.ids END
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(NOTIFY_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER proposition_inserted
+        AFTER INSERT ON proposition
+        REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_proposition_changes()
+    """)
+    op.execute("""
+        CREATE TRIGGER proposition_updated
+        AFTER UPDATE ON proposition
+        REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_proposition_changes()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER proposition_updated ON proposition")
+    op.execute("DROP TRIGGER proposition_inserted ON proposition")
+    op.execute("DROP FUNCTION notify_proposition_changes()")
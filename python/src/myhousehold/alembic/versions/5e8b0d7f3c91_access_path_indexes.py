@@ -0,0 +1,37 @@
+""" Access path indexes
+
+Revision ID: 5e8b0d7f3c91
+Revises: a61d3c5f8e27
+Create Date: 2026-10-18 15:47:12.604218
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b0d7f3c91'
+down_revision: str | Sequence[str] | None = 'a61d3c5f8e27'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # built concurrently, so that writes are not blocked on large tables
+    with op.get_context().autocommit_block():
+        op.create_index('ix_proposition_stream_id_created_at', 'proposition', ['stream_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_stream_created_by_user_id'), 'stream', ['created_by_user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_stream_public', 'stream', ['id'], unique=False, postgresql_where=sa.text('is_private IS false'), postgresql_concurrently=True)
+        op.create_index(op.f('ix_login_session_user_id'), 'login_session', ['user_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_login_session_user_id'), table_name='login_session', postgresql_concurrently=True)
+        op.drop_index('ix_stream_public', table_name='stream', postgresql_where=sa.text('is_private IS false'), postgresql_concurrently=True)
+        op.drop_index(op.f('ix_stream_created_by_user_id'), table_name='stream', postgresql_concurrently=True)
+        op.drop_index('ix_proposition_stream_id_created_at', table_name='proposition', postgresql_concurrently=True)
@@ -0,0 +1,50 @@
+""" JSONB and GIN indexes
+
+Revision ID: 7c1e4a9b20d3
+Revises: 2bedc9f1a2ef
+Create Date: 2026-10-18 09:12:41.318207
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4a9b20d3'
+down_revision: str | Sequence[str] | None = '2bedc9f1a2ef'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('proposition', 'json_object',
+               existing_type=postgresql.JSON(astext_type=sa.Text()),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='json_object::jsonb')
+    op.alter_column('stream', 'json_schema',
+               existing_type=postgresql.JSON(astext_type=sa.Text()),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='json_schema::jsonb')
+    op.create_index('ix_proposition_json_object', 'proposition', ['json_object'], unique=False, postgresql_using='gin', postgresql_ops={'json_object': 'jsonb_path_ops'})
+    op.create_index('ix_stream_json_schema', 'stream', ['json_schema'], unique=False, postgresql_using='gin', postgresql_ops={'json_schema': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stream_json_schema', table_name='stream', postgresql_using='gin', postgresql_ops={'json_schema': 'jsonb_path_ops'})
+    op.drop_index('ix_proposition_json_object', table_name='proposition', postgresql_using='gin', postgresql_ops={'json_object': 'jsonb_path_ops'})
+    op.alter_column('stream', 'json_schema',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=postgresql.JSON(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='json_schema::json')
+    op.alter_column('proposition', 'json_object',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=postgresql.JSON(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='json_object::json')
@@ -0,0 +1,30 @@
+""" Stream name index
+
+Revision ID: b3e81f5c6a24
+Revises: 9d2f6a41c7b8
+Create Date: 2026-10-18 17:05:51.274903
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e81f5c6a24'
+down_revision: str | Sequence[str] | None = '9d2f6a41c7b8'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # built concurrently, so that writes are not blocked on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_stream_name'), 'stream', ['name'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_stream_name'), table_name='stream', postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+""" Proposition chunk ids
+
+Revision ID: b9e4d2a7c315
+Revises: c2f7a9e4b6d1
+Create Date: 2026-10-18 23:41:27.615092
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4d2a7c315'
+down_revision: str | Sequence[str] | None = 'c2f7a9e4b6d1'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ids of chunks archived before are only in their files, so their
+    #  propositions are not recognized as archived by writes
+    op.add_column('proposition_chunk', sa.Column('ids', postgresql.ARRAY(sa.Integer()), server_default='{}', nullable=False))
+    op.alter_column('proposition_chunk', 'ids', server_default=None)
+    op.create_index('ix_proposition_chunk_ids', 'proposition_chunk', ['ids'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_proposition_chunk_ids', table_name='proposition_chunk', postgresql_using='gin')
+    op.drop_column('proposition_chunk', 'ids')
@@ -0,0 +1,126 @@
+""" Proposition default partition
+
+Revision ID: c2f7a9e4b6d1
+Revises: a3d5e7f90b12
+Create Date: 2026-10-18 22:05:11.480263
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f7a9e4b6d1'
+down_revision: str | Sequence[str] | None = 'a3d5e7f90b12'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+# rows of months without partition, e.g. while worker is down, go to the
+#  default partition; they are moved out once partition of their month is
+#  created, as it could not be created over them otherwise
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_monthly_partitions(
+    parent regclass,
+    since date,
+    until date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', since);
+    name text;
+    default_partition regclass;
+    partition_key text;
+    created integer := 0;
+BEGIN
+    SELECT nullif(p.partdefid, 0)::regclass, a.attname
+    INTO default_partition, partition_key
+    FROM pg_partitioned_table p
+    JOIN pg_attribute a
+        ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+    WHERE p.partrelid = parent;
+
+    WHILE month < until LOOP
+        name := parent::text || to_char(month, '"_y"YYYY"m"MM');
+        IF to_regclass(name) IS NULL THEN
+            IF default_partition IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                    name, parent, month, month + interval '1 month'
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE %s INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                    name, parent
+                );
+                EXECUTE format(
+                    'WITH moved AS ('
+                    '    DELETE FROM %s WHERE %I >= %L AND %I < %L RETURNING *'
+                    ') INSERT INTO %I SELECT * FROM moved',
+                    default_partition, partition_key, month, partition_key,
+                    month + interval '1 month', name
+                );
+                -- indexes and foreign keys of parent are created by it
+                EXECUTE format(
+                    'ALTER TABLE %s ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    parent, name, month, month + interval '1 month'
+                );
+            END IF;
+            created := created + 1;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_monthly_partitions(
+    parent regclass,
+    since date,
+    until date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', since);
+    name text;
+    created integer := 0;
+BEGIN
+    WHILE month < until LOOP
+        name := parent::text || to_char(month, '"_y"YYYY"m"MM');
+        IF to_regclass(name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                name, parent, month, month + interval '1 month'
+            );
+            created := created + 1;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+    # not matched by names of monthly partitions, so expiry leaves it be
+    op.execute("CREATE TABLE proposition_default PARTITION OF proposition DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # rows are moved to partitions of their months first
+    op.execute("""
+        SELECT create_monthly_partitions(
+            'proposition',
+            min(created_at)::date,
+            (max(created_at) + interval '1 month')::date
+        )
+        FROM proposition_default
+        HAVING count(*) > 0
+    """)
+    op.execute("DROP TABLE proposition_default")
+    op.execute(PREVIOUS_CREATE_PARTITIONS_FUNCTION)
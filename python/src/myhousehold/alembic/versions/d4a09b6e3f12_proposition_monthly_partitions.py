@@ -0,0 +1,132 @@
+""" Proposition monthly partitions
+
+Revision ID: d4a09b6e3f12
+Revises: c7f2d94e1b05
+Create Date: 2026-10-18 18:20:37.861440
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a09b6e3f12'
+down_revision: str | Sequence[str] | None = 'c7f2d94e1b05'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+# idempotent, also called periodically by worker to create future months;
+#  partitions are named `<parent>_yYYYYmMM`
+CREATE_PARTITIONS_FUNCTION = """
+CREATE FUNCTION create_monthly_partitions(
+    parent regclass,
+    since date,
+    until date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', since);
+    name text;
+    created integer := 0;
+BEGIN
+    WHILE month < until LOOP
+        name := parent::text || to_char(month, '"_y"YYYY"m"MM');
+        IF to_regclass(name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                name, parent, month, month + interval '1 month'
+            );
+            created := created + 1;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGERS = [
+    """
+    CREATE TRIGGER proposition_inserted
+    AFTER INSERT ON proposition
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_proposition_changes()
+    """,
+    """
+    CREATE TRIGGER proposition_updated
+    AFTER UPDATE ON proposition
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_proposition_changes()
+    """,
+]
+
+
+def _replace_table(create: str, prepare: str | None = None) -> None:
+    """
+    Replace `proposition` by table that `create` makes with its columns,
+    moving rows, sequence of ids, constraints, indexes and triggers.
+    `prepare` runs before rows are moved.
+    """
+
+    op.execute("ALTER TABLE proposition RENAME TO proposition_replaced")
+    op.execute("ALTER INDEX proposition_pkey RENAME TO proposition_replaced_pkey")
+    op.execute("DROP INDEX ix_proposition_json_object")
+    op.execute("DROP INDEX ix_proposition_stream_id_created_at")
+    op.execute(create.replace("{columns}", (
+        "LIKE proposition_replaced INCLUDING DEFAULTS INCLUDING CONSTRAINTS"
+    )))
+    if prepare is not None:
+        op.execute(prepare)
+    op.execute("INSERT INTO proposition SELECT * FROM proposition_replaced")
+    # would be dropped along with the replaced table otherwise
+    op.execute("ALTER SEQUENCE proposition_id_seq OWNED BY proposition.id")
+    op.execute("DROP TABLE proposition_replaced")
+
+    op.create_foreign_key('proposition_stream_id_fkey', 'proposition', 'stream', ['stream_id'], ['id'])
+    op.create_foreign_key('proposition_created_by_user_id_fkey', 'proposition', 'user', ['created_by_user_id'], ['id'])
+    op.create_index('ix_proposition_json_object', 'proposition', ['json_object'], unique=False, postgresql_using='gin', postgresql_ops={'json_object': 'jsonb_path_ops'})
+    op.create_index('ix_proposition_stream_id_created_at', 'proposition', ['stream_id', 'created_at', 'id'], unique=False)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+    # primary key of partitioned table must include partition key
+    _replace_table(
+        create="""
+            CREATE TABLE proposition (
+                {columns},
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """,
+        # months of existing rows, a month back for backdated ones and
+        #  months ahead until worker takes over
+        prepare="""
+            SELECT create_monthly_partitions(
+                'proposition',
+                least(
+                    (SELECT min(created_at) FROM proposition_replaced),
+                    localtimestamp - interval '1 month'
+                )::date,
+                (localtimestamp + interval '3 months')::date
+            )
+        """,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_table(
+        create="""
+            CREATE TABLE proposition (
+                {columns},
+                PRIMARY KEY (id)
+            )
+        """,
+    )
+    op.execute("""
+        DROP FUNCTION create_monthly_partitions(regclass, date, date)
+    """)
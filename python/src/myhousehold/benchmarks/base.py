@@ -0,0 +1,279 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from dishka import make_container
+from sqlalchemy import Connection, Engine, create_engine, insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from myhousehold.core.models import Stream, User
+from myhousehold.core.models.intents.record import RecordIntent
+from myhousehold.core.providers import ConfigPostgres, ProviderConfig
+
+
+class Explain(Executable, ClauseElement):
+    """ EXPLAIN of a statement, executed with its bind parameters """
+
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw):
+    options = "ANALYZE, BUFFERS, " if element.analyze else ""
+    statement = compiler.process(element.statement, **kw)
+    return f"EXPLAIN ({options}FORMAT TEXT) {statement}"
+
+
+def explain(
+        connection: Connection,
+        statement,
+        analyze: bool = False,
+) -> str:
+    result = connection.execute(Explain(statement, analyze=analyze))
+    return "\n".join(i for (i,) in result)
+
+
+def make_engine(is_test_database: bool | None = None) -> Engine:
+    container = make_container(ProviderConfig())
+    config = container.get(ConfigPostgres)
+    return create_engine(config.get_sqlalchemy_url(
+        "psycopg",
+        is_test_database=is_test_database,
+    ))
+
+
+def make_async_engine(
+        is_test_database: bool | None = None,
+        **options: Any,
+) -> AsyncEngine:
+    container = make_container(ProviderConfig())
+    config = container.get(ConfigPostgres)
+    return create_async_engine(config.get_sqlalchemy_url(
+        "psycopg",
+        is_test_database=is_test_database,
+    ), **options)
+
+
+def time_sync(
+        operation: Callable[[], Any],
+        number: int,
+        setup: Callable[[], Any] | None = None,
+) -> list[float]:
+    """
+    Durations of `number` runs of operation, in seconds. `setup` is run
+    before each run and is not timed.
+    """
+
+    samples = []
+    for _ in range(number):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def time_async(
+        operation: Callable[[], Awaitable[Any]],
+        number: int,
+        setup: Callable[[], Any] | None = None,
+) -> list[float]:
+    """ Counterpart of `time_sync` for coroutine functions """
+
+    samples = []
+    for _ in range(number):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        await operation()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """ Statistics of durations, in microseconds """
+
+    samples = sorted(samples)
+    return {
+        "number": len(samples),
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p95_us": samples[int(len(samples) * 0.95)] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+    }
+
+
+def save_results(
+        path: Path,
+        benchmark: str,
+        results: dict[str, dict[str, float]],
+) -> None:
+    """
+    Save results with revision and environment they were measured in, so
+    that runs can be compared across commits.
+    """
+
+    document = {
+        "benchmark": benchmark,
+        "revision": _get_git_revision(),
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+
+
+def print_results(
+        results: dict[str, dict[str, float]],
+        baseline: dict[str, dict[str, float]] | None = None,
+) -> None:
+    for name, result in results.items():
+        line = (f"{name:<28} mean {result['mean_us']:>10,.1f} us"
+                f"  p95 {result['p95_us']:>10,.1f} us")
+        if baseline is not None and name in baseline:
+            ratio = result["mean_us"] / baseline[name]["mean_us"]
+            line += f"  {ratio:>6.2f}x baseline"
+        print(line)
+
+
+def _get_git_revision() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+SEED_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "a": {"type": "integer"},
+        "nutrition_info": {
+            "type": "object",
+            "properties": {
+                "protein_g": {"type": "number"},
+            },
+        },
+        "tags": {"type": "array", "items": {"type": "string"}},
+    },
+}
+
+
+def seed_dataset(
+        connection: Connection,
+        propositions: int,
+        streams: int = 10,
+        username: str = "benchmark-seed",
+) -> tuple[int, list[int]]:
+    """
+    Seed user with `streams` streams and `propositions` propositions spread
+    over them evenly, one second apart. One of each hundred propositions
+    is tagged as `rare`.
+
+    :return: user id and stream ids
+    """
+
+    user_id = connection.scalar(
+        insert(User)
+        .values(username=username, password_hash="!", is_system=True)
+        .returning(User.id)
+    )
+    stream_ids = []
+    for i in range(streams):
+        record_intent_id = connection.scalar(
+            insert(RecordIntent)
+            .values(ttl=None, errata_allowed=True)
+            .returning(RecordIntent.id)
+        )
+        stream_ids.append(connection.scalar(
+            insert(Stream)
+            .values(
+                name=f"{username}-{i}",
+                json_schema=SEED_JSON_SCHEMA,
+                is_private=i % 2 == 0,
+                created_by_user_id=user_id,
+                record_intent_id=record_intent_id,
+            )
+            .returning(Stream.id)
+        ))
+
+    connection.execute(
+        text("""
+            INSERT INTO proposition
+                (json_object, created_at, stream_id, created_by_user_id)
+            SELECT jsonb_build_object(
+                       'a', i % 1000,
+                       'nutrition_info',
+                       jsonb_build_object('protein_g', i % 50),
+                       'tags',
+                       CASE WHEN i % 100 = 0
+                            THEN '["rare"]'::jsonb
+                            ELSE '["common"]'::jsonb END
+                   ),
+                   localtimestamp - make_interval(secs => :n - i),
+                   (CAST(:stream_ids AS integer[]))
+                       [1 + i % cardinality(CAST(:stream_ids AS integer[]))],
+                   :user_id
+            FROM generate_series(1, :n) AS i
+        """),
+        {"n": propositions, "stream_ids": stream_ids, "user_id": user_id},
+    )
+    connection.execute(text("ANALYZE"))
+
+    return user_id, stream_ids
+
+
+def seed_population(
+        connection: Connection,
+        users: int,
+        streams_per_user: int,
+        username_prefix: str = "benchmark-population",
+) -> None:
+    """
+    Seed background users with empty streams, one of each hundred streams
+    is public. Gives planner realistic selectivity of stream predicates.
+    """
+
+    connection.execute(
+        text("""
+            WITH users AS (
+                INSERT INTO "user" (username, password_hash, is_system)
+                SELECT :prefix || '-' || i, '!', true
+                FROM generate_series(1, :users) AS i
+                RETURNING id
+            )
+            INSERT INTO stream
+                (name, json_schema, is_private, created_at,
+                 created_by_user_id)
+            SELECT :prefix || '-' || users.id || '-' || i,
+                   CAST(:json_schema AS jsonb),
+                   (users.id * :streams + i) % 100 <> 0,
+                   localtimestamp,
+                   users.id
+            FROM users, generate_series(1, :streams) AS i
+        """),
+        {
+            "prefix": username_prefix,
+            "users": users,
+            "streams": streams_per_user,
+            "json_schema": json.dumps(SEED_JSON_SCHEMA),
+        },
+    )
@@ -0,0 +1,66 @@
+"""
+Query plans of JSON filters of `StreamsService` on a seeded dataset, with
+GIN indexes of JSONB columns (after) and without them (before: GIN index
+is reachable only through bitmap scans, which are disabled).
+
+Dataset is seeded in a transaction that is rolled back at the end.
+
+Usage: python -m myhousehold.benchmarks.jsonb_query_plans
+    [--propositions N] [--streams N] [--test-database]
+"""
+import argparse
+
+from sqlalchemy import text
+
+from myhousehold.benchmarks.base import explain, make_engine, seed_dataset
+from myhousehold.core.models import User
+from myhousehold.core.services.streams import StreamsService
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--propositions", type=int, default=1_000_000)
+    parser.add_argument("--streams", type=int, default=10)
+    parser.add_argument("--test-database", action="store_true")
+    args = parser.parse_args()
+
+    engine = make_engine(is_test_database=args.test_database or None)
+    with engine.connect() as connection:
+        user_id, stream_ids = seed_dataset(
+            connection,
+            propositions=args.propositions,
+            streams=args.streams,
+        )
+        service = StreamsService(
+            orm_session=None,  # statements are only built
+            read_only_session=None,
+            aggregates_service=None,
+            stream_access=None,
+            archive_store=None,
+            authorized_user=User(id=user_id),
+        )
+        queries = {
+            "json_contains": service._stream_propositions_stmt(
+                stream_ids[0],
+                json_contains={"tags": ["rare"]},
+            ).limit(100),
+            "json_path_exists": service._stream_propositions_stmt(
+                stream_ids[0],
+                json_path_exists='$.tags[*] ? (@ == "rare")',
+            ).limit(100),
+        }
+
+        for name, stmt in queries.items():
+            for label, enable_bitmapscan in (("before", "off"),
+                                             ("after", "on")):
+                connection.execute(text(
+                    f"SET LOCAL enable_bitmapscan = {enable_bitmapscan}"))
+                print(f"===== {name} ({label})")
+                print(explain(connection, stmt, analyze=True))
+                print()
+
+        connection.rollback()
+
+
+if __name__ == "__main__":
+    main()
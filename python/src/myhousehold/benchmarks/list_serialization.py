@@ -0,0 +1,166 @@
+"""
+Compares rows per second of list endpoints serialized through ORM objects
+and DTOs with `from_attributes` (the former path, FastAPI `response_model`
+with stdlib JSON encoder) and of JSON built by database:
+
+- `GET /streams/{id}/propositions` page
+- `GET /streams` catalog
+
+The ORM path is kept here only as the baseline, on the statements the
+service serializes in database. Archived propositions are not read.
+
+Everything runs in a transaction that is rolled back at the end.
+
+Usage: python -m myhousehold.benchmarks.list_serialization
+    [--number N] [--page-size N] [--output PATH] [--baseline PATH]
+    [--test-database]
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myhousehold.benchmarks.base import (
+    make_async_engine,
+    print_results,
+    save_results,
+    seed_dataset,
+    seed_population,
+    summarize,
+    time_async,
+)
+from myhousehold.core.models import User
+from myhousehold.core.replicas import ReadOnlySession
+from myhousehold.core.services.streams import StreamsService
+from myhousehold.server.schemas.streams import (
+    StreamCatalogEntryDTO,
+    StreamPropositionDTO,
+)
+
+
+def dump_json(content) -> bytes:
+    # as `JSONResponse.render`
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode()
+
+
+def serialize_models(adapter: TypeAdapter, items) -> bytes:
+    # as `response_model` validation and serialization of FastAPI
+    validated = adapter.validate_python(items, from_attributes=True)
+    return dump_json(adapter.dump_python(validated, mode="json"))
+
+
+async def run(number: int, page_size: int, is_test_database: bool | None):
+    engine = make_async_engine(is_test_database=is_test_database)
+    propositions_adapter = TypeAdapter(list[StreamPropositionDTO])
+    catalog_adapter = TypeAdapter(list[StreamCatalogEntryDTO])
+    results = {}
+
+    async with engine.connect() as connection:
+        await connection.begin()
+        user_id, stream_ids = await connection.run_sync(
+            seed_dataset,
+            propositions=page_size * 10,
+            streams=1,
+            username="benchmark-list-serialization",
+        )
+        await connection.run_sync(
+            seed_population,
+            users=page_size // 10,
+            streams_per_user=10,
+            username_prefix="benchmark-list-serialization",
+        )
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+        service = StreamsService(
+            orm_session=session,
+            read_only_session=ReadOnlySession(session),
+            authorized_user=User(id=user_id),
+            aggregates_service=None,
+            stream_access=None,
+            archive_store=None,
+        )
+        catalog_stmt = service._streams_catalog_stmt()
+
+        async def propositions_orm():
+            stmt = (service._stream_propositions_stmt(stream_ids[0])
+                    .limit(page_size))
+            propositions = list(await session.scalars(stmt))
+            serialize_models(propositions_adapter, propositions)
+
+        async def propositions_database_json():
+            propositions = await service.get_stream_propositions_json(
+                stream_id=stream_ids[0],
+                limit=page_size,
+            )
+            ("[" + ",".join(i.json for i in propositions) + "]").encode()
+
+        async def catalog_orm():
+            streams = (await session.execute(catalog_stmt)).all()
+            serialize_models(catalog_adapter, streams)
+
+        async def catalog_database_json():
+            (await service.get_streams_catalog_json()).encode()
+
+        operations = {
+            "propositions_orm": propositions_orm,
+            "propositions_database_json": propositions_database_json,
+            "catalog_orm": catalog_orm,
+            "catalog_database_json": catalog_database_json,
+        }
+        rows = {
+            "propositions": page_size,
+            "catalog": len((await session.execute(catalog_stmt)).all()),
+        }
+        for name, operation in operations.items():
+            # each request builds its objects in a fresh identity map
+            result = summarize(await time_async(
+                operation,
+                number=number,
+                setup=session.expunge_all,
+            ))
+            result["rows_per_second"] = (
+                rows[name.split("_")[0]] / result["mean_us"] * 1e6)
+            results[name] = result
+
+        await session.close()
+        await connection.rollback()
+
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--output", type=Path,
+                        default=Path("list_serialization.json"))
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--test-database", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(
+        number=args.number,
+        page_size=args.page_size,
+        is_test_database=args.test_database or None,
+    ))
+
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+    print_results(results, baseline)
+    for name, result in results.items():
+        print(f"{name:<28} {result['rows_per_second']:>12,.0f} rows/s")
+    save_results(args.output, "list_serialization", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Concurrent writers of a single stream through
+`StreamsService.put_stream_proposition`, each with its own connection and
+committing every write, as requests of `PUT /streams/{id}/propositions/{id}`
+do:
+
+- `disjoint`: each writer updates propositions of its own
+- `contended`: all writers update the same `--hot` propositions, a writer
+  which loses a conflict reads the proposition again and retries
+
+Reports latency of a write including its retries, writes per second and
+conflicts per write. Seeded data has to be committed for writers to see
+it, it is deleted at the end.
+
+Usage: python -m myhousehold.benchmarks.put_concurrency
+    [--writers N] [--number N] [--hot N] [--output PATH] [--baseline PATH]
+    [--test-database]
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from sqlalchemy import Engine, delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from myhousehold.benchmarks.base import (
+    make_async_engine,
+    make_engine,
+    print_results,
+    save_results,
+    seed_dataset,
+    summarize,
+)
+from myhousehold.core.models import (
+    AggregateBucket,
+    Proposition,
+    RollupBucket,
+    Stream,
+    User,
+)
+from myhousehold.core.models.intents.record import RecordIntent
+from myhousehold.core.replicas import ReadOnlySession
+from myhousehold.core.services.aggregates import AggregatesService
+from myhousehold.core.services.streams import (
+    StreamsService,
+    VersionConflictError,
+)
+from myhousehold.reasoners.providers import ProviderReasoners
+
+USERNAME = "benchmark-put-concurrency"
+
+
+def seed(engine: Engine, propositions: int) -> tuple[int, int, list[int]]:
+    with engine.begin() as connection:
+        user_id, (stream_id,) = seed_dataset(
+            connection,
+            propositions=propositions,
+            streams=1,
+            username=USERNAME,
+        )
+        proposition_ids = list(connection.scalars(
+            select(Proposition.id)
+            .where(Proposition.stream_id == stream_id)
+            .order_by(Proposition.id)
+        ))
+    return user_id, stream_id, proposition_ids
+
+
+def clean_up(engine: Engine, user_id: int, stream_id: int) -> None:
+    with engine.begin() as connection:
+        for model in (AggregateBucket, RollupBucket, Proposition):
+            connection.execute(
+                delete(model).where(model.stream_id == stream_id))
+        record_intent_id = connection.scalar(
+            delete(Stream)
+            .where(Stream.id == stream_id)
+            .returning(Stream.record_intent_id))
+        connection.execute(
+            delete(RecordIntent).where(RecordIntent.id == record_intent_id))
+        connection.execute(delete(User).where(User.id == user_id))
+
+
+async def write(
+        engine: AsyncEngine,
+        user_id: int,
+        stream_id: int,
+        proposition_ids: list[int],
+        number: int,
+) -> tuple[list[float], int]:
+    """ :return: durations of writes, in seconds, and count of conflicts """
+
+    samples = []
+    conflicts = 0
+    reasoners = ProviderReasoners()
+    aggregates = reasoners.get_declared_aggregates(reasoners.get_reasoners())
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        service = StreamsService(
+            orm_session=session,
+            read_only_session=ReadOnlySession(session),
+            authorized_user=User(id=user_id),
+            aggregates_service=AggregatesService(session, aggregates),
+            stream_access=None,
+            archive_store=None,
+        )
+        for i in range(number):
+            proposition_id = proposition_ids[i % len(proposition_ids)]
+            started_at = time.perf_counter()
+            while True:
+                try:
+                    await service.put_stream_proposition(
+                        stream_id=stream_id,
+                        proposition_id=proposition_id,
+                        json_object={"a": i},
+                        comment=None,
+                    )
+                    await Stream.bump_marked_revisions(session)
+                    await session.commit()
+                    break
+                except VersionConflictError:
+                    await session.rollback()
+                    conflicts += 1
+            samples.append(time.perf_counter() - started_at)
+            # each request reads the proposition in a fresh identity map
+            session.expunge_all()
+    return samples, conflicts
+
+
+async def run_writers(
+        engine: AsyncEngine,
+        user_id: int,
+        stream_id: int,
+        proposition_ids: list[list[int]],
+        number: int,
+) -> dict[str, float]:
+    """ :param proposition_ids: propositions updated by each writer """
+
+    started_at = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        write(engine, user_id, stream_id, ids, number)
+        for ids in proposition_ids
+    ))
+    elapsed = time.perf_counter() - started_at
+
+    result = summarize([j for i, _ in outcomes for j in i])
+    writes = number * len(proposition_ids)
+    result["writes_per_second"] = writes / elapsed
+    result["conflicts_per_write"] = sum(i for _, i in outcomes) / writes
+    return result
+
+
+async def run(
+        engine: AsyncEngine,
+        user_id: int,
+        stream_id: int,
+        proposition_ids: list[int],
+        writers: int,
+        number: int,
+        hot: int,
+) -> dict[str, dict[str, float]]:
+    per_writer = len(proposition_ids) // writers
+    disjoint = [proposition_ids[i * per_writer:(i + 1) * per_writer]
+                for i in range(writers)]
+    contended = [proposition_ids[:hot]] * writers
+    results = {
+        "disjoint": await run_writers(
+            engine, user_id, stream_id, disjoint, number),
+        "contended": await run_writers(
+            engine, user_id, stream_id, contended, number),
+    }
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--number", type=int, default=100)
+    parser.add_argument("--hot", type=int, default=4)
+    parser.add_argument("--output", type=Path,
+                        default=Path("put_concurrency.json"))
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--test-database", action="store_true")
+    args = parser.parse_args()
+
+    is_test_database = args.test_database or None
+    engine = make_engine(is_test_database=is_test_database)
+    user_id, stream_id, proposition_ids = seed(
+        engine, propositions=args.writers * 10)
+    try:
+        results = asyncio.run(run(
+            # a connection per writer
+            engine=make_async_engine(
+                is_test_database=is_test_database,
+                pool_size=args.writers,
+            ),
+            user_id=user_id,
+            stream_id=stream_id,
+            proposition_ids=proposition_ids,
+            writers=args.writers,
+            number=args.number,
+            hot=args.hot,
+        ))
+    finally:
+        clean_up(engine, user_id, stream_id)
+        engine.dispose()
+
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+    print_results(results, baseline)
+    for name, result in results.items():
+        print(f"{name:<28} {result['writes_per_second']:>12,.0f} writes/s"
+              f"  {result['conflicts_per_write']:>6.3f} conflicts/write")
+    save_results(args.output, "put_concurrency", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Checks of query plans of service queries on a seeded dataset, so that a
+regression to a sequential scan of a large table is caught. Exits with
+status 1 if any plan does not match.
+
+Not part of integration tests: it needs a database connection, unlike
+them, and seeds a large dataset. Dataset is seeded in a transaction that
+is rolled back at the end.
+
+Usage: python -m myhousehold.benchmarks.query_plans
+    [--propositions N] [--users N] [--test-database]
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from myhousehold.benchmarks.base import (
+    explain,
+    make_engine,
+    seed_dataset,
+    seed_population,
+)
+from myhousehold.core.models import User
+from myhousehold.core.services.streams import StreamsService
+
+
+def get_checks(
+        service: StreamsService,
+        stream_id: int,
+) -> list[tuple[str, object, list[str], list[str]]]:
+    """
+    :return: name, statement, parts its plan must contain and parts it
+     must not contain, of each check
+    """
+
+    stream = service._accessible_streams()
+    now = datetime.now()
+    previous_month = now.replace(day=1) - timedelta(days=1)
+    return [
+        ("accessible streams",
+         select(stream),
+         ["ix_stream_created_by_user_id", "ix_stream_public"],
+         ["Seq Scan on stream"]),
+        ("accessible stream by id",
+         select(stream).where(stream.id == stream_id),
+         [],
+         ["Seq Scan"]),
+        ("accessible streams by name",
+         select(stream).where(stream.name == "test"),
+         ["ix_stream_name"],
+         ["Seq Scan"]),
+        ("streams catalog",
+         service._streams_catalog_stmt(),
+         ["ix_proposition_stream_id_created_at"],
+         ["Seq Scan"]),
+        ("stream propositions",
+         service._stream_propositions_stmt(stream_id).limit(101),
+         ["ix_proposition_stream_id_created_at"],
+         ["Seq Scan", "Sort"]),
+        ("stream propositions after cursor",
+         service._stream_propositions_stmt(
+             stream_id,
+             after=(now, 0),
+         ).limit(101),
+         [],
+         ["Seq Scan", "Sort", f"proposition_{previous_month:y%Ym%m}"]),
+        ("stream propositions since",
+         service._stream_propositions_stmt(stream_id, since=now).limit(101),
+         [],
+         [f"proposition_{previous_month:y%Ym%m}"]),
+        ("stream propositions by json_contains",
+         service._stream_propositions_stmt(
+             stream_id,
+             json_contains={"tags": ["rare"]},
+         ).limit(101),
+         [],
+         ["Seq Scan on proposition"]),
+        ("stream propositions by json_path_exists",
+         service._stream_propositions_stmt(
+             stream_id,
+             json_path_exists='$.tags[*] ? (@ == "rare")',
+         ).limit(101),
+         [],
+         ["Seq Scan on proposition"]),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--propositions", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--test-database", action="store_true")
+    args = parser.parse_args()
+
+    failed = 0
+    engine = make_engine(is_test_database=args.test_database or None)
+    with engine.connect() as connection:
+        prefix = f"query-plans-{uuid4()}"
+        seed_population(
+            connection,
+            users=args.users,
+            streams_per_user=20,
+            username_prefix=prefix,
+        )
+        user_id, stream_ids = seed_dataset(
+            connection,
+            propositions=args.propositions,
+            streams=10,
+            username=prefix,
+        )
+        service = StreamsService(
+            orm_session=None,  # statements are only built
+            read_only_session=None,
+            aggregates_service=None,
+            stream_access=None,
+            archive_store=None,
+            authorized_user=User(id=user_id),
+        )
+
+        for name, stmt, expected, unexpected in get_checks(service,
+                                                           stream_ids[0]):
+            plan = explain(connection, stmt)
+            errors = [f"missing {i!r}" for i in expected if i not in plan]
+            errors += [f"has {i!r}" for i in unexpected if i in plan]
+            print(f"===== {name}: {'FAILED' if errors else 'ok'}")
+            if errors:
+                failed += 1
+                print("\n".join(errors))
+                print(plan)
+                print()
+
+        connection.rollback()
+    engine.dispose()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
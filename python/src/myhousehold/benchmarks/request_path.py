@@ -0,0 +1,255 @@
+"""
+Per-request cost of hot components of `POST /streams/{id}/propositions`,
+each in isolation and all of them combined (without HTTP and commit):
+
+- login session lookup (`AccessService.lookup_login_session`)
+- JSON schema validation (`Proposition.validate_json_object`)
+- ORM flush of `StreamsService.create_proposition`
+- serialization through `StreamPropositionDTO` with `from_attributes`
+- dishka request scope resolution
+
+Everything runs in a transaction that is rolled back at the end, database
+sessions of the container join it through savepoints.
+
+Results are saved as JSON, pass previous results as `--baseline` to
+compare against them.
+
+Usage: python -m myhousehold.benchmarks.request_path
+    [--number N] [--output PATH] [--baseline PATH] [--test-database]
+"""
+import argparse
+import asyncio
+import json
+import secrets
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+from dishka import Provider, Scope, from_context, make_async_container, provide
+from fastapi.requests import Request
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from myhousehold.benchmarks.base import (
+    SEED_JSON_SCHEMA,
+    make_async_engine,
+    print_results,
+    save_results,
+    summarize,
+    time_async,
+    time_sync,
+)
+from myhousehold.core.archive import ArchiveStore
+from myhousehold.core.models import LoginSession, Proposition, Stream, User
+from myhousehold.core.models.intents.record import RecordIntent
+from myhousehold.core.providers import ProviderConfig, ProviderDatabase
+from myhousehold.core.replicas import ReadOnlySession
+from myhousehold.core.services.access import AccessService
+from myhousehold.core.services.aggregates import (
+    AggregatesService,
+    DeclaredAggregates,
+)
+from myhousehold.core.services.providers import ProviderServices
+from myhousehold.core.services.stream_access import StreamAccessIndex
+from myhousehold.core.services.streams import StreamsService
+from myhousehold.core.services.uow_ctl import UoWCtl
+from myhousehold.reasoners.providers import ProviderReasoners
+from myhousehold.server.metrics import RequestMetrics
+from myhousehold.server.providers import ProviderServer
+from myhousehold.server.schemas.streams import StreamPropositionDTO
+
+JSON_OBJECT = {
+    "a": 1,
+    "nutrition_info": {"protein_g": 12.5},
+    "tags": ["breakfast", "home"],
+}
+
+
+class ProviderBenchmark(Provider):
+    connection = from_context(provides=AsyncConnection, scope=Scope.APP)
+
+    @provide(scope=Scope.SESSION)
+    async def get_database_session(
+            self,
+            connection: AsyncConnection,
+    ) -> AsyncGenerator[AsyncSession]:
+        async with AsyncSession(
+                bind=connection,
+                expire_on_commit=False,
+                join_transaction_mode="create_savepoint",
+        ) as session:
+            yield session
+
+
+async def seed(session: AsyncSession) -> tuple[LoginSession, Stream]:
+    user = User(
+        username=f"benchmark-request-path-{secrets.token_hex(8)}",
+        password_hash="!",
+        is_system=True,
+    )
+    login_session = LoginSession(
+        user_agent=None,
+        token=secrets.token_hex(nbytes=32),
+        user=user,
+    )
+    session.add_all([user, login_session])
+    await session.flush()
+
+    stream = Stream(
+        name="benchmark-request-path",
+        json_schema=SEED_JSON_SCHEMA,
+        is_private=True,
+        created_by_user_id=user.id,
+        record_intent=RecordIntent(ttl=None, errata_allowed=True),
+    )
+    session.add(stream)
+    await session.flush()
+    return login_session, stream
+
+
+def make_request(login_session: LoginSession) -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [
+            (b"x-login-session-uid", str(login_session.uid).encode()),
+            (b"x-login-session-token", login_session.token.encode()),
+        ],
+    })
+
+
+async def run(number: int, is_test_database: bool | None):
+    engine = make_async_engine(is_test_database=is_test_database)
+    results = {}
+
+    async with engine.connect() as connection:
+        await connection.begin()
+        session = AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        login_session, stream = await seed(session)
+        uid, token = login_session.uid, login_session.token
+        user = login_session.user
+
+        # each request looks the session up in a fresh identity map
+        access_service = AccessService(orm_session=session, hasher=None)
+        results["login_session_lookup"] = summarize(await time_async(
+            lambda: access_service.lookup_login_session(uid, token),
+            number=number,
+            setup=session.expunge_all,
+        ))
+        session.expunge_all()
+        session.add_all([user, stream])
+
+        proposition = Proposition(stream=stream)
+        results["json_schema_validation"] = summarize(time_sync(
+            lambda: proposition.validate_json_object(
+                "json_object", JSON_OBJECT),
+            number=number,
+        ))
+
+        container = make_async_container(
+            ProviderConfig(),
+            ProviderDatabase(),
+            ProviderServices(),
+            ProviderReasoners(),
+            ProviderServer(),
+            ProviderBenchmark(),
+            context={
+                AsyncConnection: connection,
+                RequestMetrics: RequestMetrics(),
+            },
+        )
+        aggregates = await container.get(DeclaredAggregates)
+        streams_service = StreamsService(
+            orm_session=session,
+            read_only_session=ReadOnlySession(session),
+            authorized_user=user,
+            aggregates_service=AggregatesService(session, aggregates),
+            stream_access=await container.get(StreamAccessIndex),
+            archive_store=await container.get(ArchiveStore),
+        )
+        created = []
+
+        def forget_created():
+            while created:
+                session.expunge(created.pop())
+
+        async def create():
+            created.append(await streams_service.create_proposition(
+                json_object=JSON_OBJECT,
+                comment=None,
+                stream=stream,
+            ))
+
+        results["orm_flush"] = summarize(await time_async(
+            create,
+            number=number,
+            setup=forget_created,
+        ))
+
+        (created_proposition,) = created
+        results["dto_serialization"] = summarize(time_sync(
+            lambda: (StreamPropositionDTO.model_validate(created_proposition)
+                     .model_dump_json()),
+            number=number,
+        ))
+
+        request = make_request(login_session)
+
+        async def resolve():
+            async with container({Request: request}) as request_container:
+                await request_container.get(AccessService)
+                await request_container.get(ReadOnlySession)
+                await request_container.get(UoWCtl)
+
+        results["dependency_resolution"] = summarize(await time_async(
+            resolve, number=number))
+
+        async def handle():
+            async with container({Request: request}) as request_container:
+                service = await request_container.get(StreamsService)
+                stream_ = await service.get_stream_with(id_=stream.id)
+                proposition_ = await service.create_proposition(
+                    json_object=JSON_OBJECT,
+                    comment=None,
+                    stream=stream_,
+                )
+                (StreamPropositionDTO.model_validate(proposition_)
+                 .model_dump_json())
+
+        results["combined"] = summarize(await time_async(
+            handle, number=number))
+
+        await container.close()
+        await session.close()
+        await connection.rollback()
+
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=1000)
+    parser.add_argument("--output", type=Path,
+                        default=Path("request_path.json"))
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--test-database", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(
+        number=args.number,
+        is_test_database=args.test_database or None,
+    ))
+
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+    print_results(results, baseline)
+    save_results(args.output, "request_path", results)
+
+
+if __name__ == "__main__":
+    main()
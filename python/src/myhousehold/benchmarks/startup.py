@@ -0,0 +1,103 @@
+"""
+Cold-start profile of the REST server:
+
+- import time of each package imported by the server, measured by
+  `python -X importtime` in a fresh interpreter
+- time of application and container setup (`make_app`)
+- time of each warm-up step, with database reachable
+
+Results are saved as JSON, pass previous results as `--baseline` to
+compare against them.
+
+Usage: python -m myhousehold.benchmarks.startup
+    [--top N] [--output PATH] [--baseline PATH]
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from myhousehold.benchmarks.base import save_results
+from myhousehold.core.services.warmup import WarmUp
+from myhousehold.server.main.run_rest_server import make_app
+
+SERVER_MODULE = "myhousehold.server.main.run_rest_server"
+
+
+def profile_imports() -> dict[str, float]:
+    """
+    Import time per top-level package, in seconds: own time of its modules,
+    not including packages they import
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {SERVER_MODULE}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    packages = defaultdict(float)
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, _, name = line.removeprefix("import time:").split("|")
+        packages[name.strip().split(".")[0]] += int(own) / 1e6
+    return dict(packages)
+
+
+async def profile_init() -> dict[str, float]:
+    started_at = time.perf_counter()
+    app = make_app()
+    timings = {"make_app": time.perf_counter() - started_at}
+
+    async with app.router.lifespan_context(app):
+        container = app.state.dishka_container
+        warm_up = await container.get(WarmUp)
+        started_at = time.perf_counter()
+        while not warm_up.is_ready:
+            await asyncio.sleep(0.01)
+        timings["warm_up"] = time.perf_counter() - started_at
+        timings.update({f"warm_up.{name}": seconds
+                        for name, seconds in warm_up.timings.items()})
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", type=Path,
+                        default=Path("startup.json"))
+    parser.add_argument("--baseline", type=Path)
+    args = parser.parse_args()
+
+    imports = profile_imports()
+    init = asyncio.run(profile_init())
+    results = {
+        "imports": dict(sorted(imports.items(), key=lambda i: -i[1])),
+        "init": init,
+    }
+
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+    print(f"imports {sum(imports.values()):.3f}s, of them:")
+    for section, limit in (("imports", args.top), ("init", None)):
+        if section == "init":
+            print("init:")
+        for name, seconds in list(results[section].items())[:limit]:
+            line = f"  {name:<32} {seconds * 1e3:>10,.1f} ms"
+            if baseline is not None and name in baseline[section]:
+                ratio = seconds / baseline[section][name]
+                line += f"  {ratio:>6.2f}x baseline"
+            print(line)
+
+    save_results(args.output, "startup", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compares validations per second of `jsonschema.validate` (the former path
+of `Proposition.validate_json_object`) and of the validator registry.
+
+Usage: python -m myhousehold.benchmarks.validation [--number N]
+"""
+import argparse
+import timeit
+
+import jsonschema
+from pydantic import BaseModel
+
+from myhousehold.core.validators import ValidatorRegistry
+
+
+class NutritionInfo(BaseModel):
+    protein_g: float
+    fat_g: float
+    carbs_g: float
+
+
+class Meal(BaseModel):
+    name: str
+    weight_g: float
+    nutrition_info: NutritionInfo
+    tags: list[str]
+
+
+JSON_SCHEMA = Meal.model_json_schema()
+JSON_OBJECT = {
+    "name": "oatmeal",
+    "weight_g": 250,
+    "nutrition_info": {
+        "protein_g": 12.5,
+        "fat_g": 6,
+        "carbs_g": 54,
+    },
+    "tags": ["breakfast", "home"],
+}
+
+
+def bench_jsonschema_validate(number: int) -> float:
+    return timeit.timeit(
+        lambda: jsonschema.validate(JSON_OBJECT, JSON_SCHEMA),
+        number=number,
+    )
+
+
+def bench_validator_registry(number: int) -> float:
+    registry = ValidatorRegistry()
+
+    def run():
+        registry.get(1, JSON_SCHEMA).validate(JSON_OBJECT)
+
+    return timeit.timeit(run, number=number)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=10_000)
+    args = parser.parse_args()
+
+    results = {
+        "jsonschema.validate": bench_jsonschema_validate(args.number),
+        "ValidatorRegistry": bench_validator_registry(args.number),
+    }
+    for name, elapsed in results.items():
+        print(f"{name:<24} {args.number / elapsed:>12,.0f} validations/s")
+
+
+if __name__ == "__main__":
+    main()
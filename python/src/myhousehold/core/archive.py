@@ -0,0 +1,169 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any, NamedTuple
+
+# chunk file ends with length of its footer and this marker
+MAGIC = b"MHC1"
+_TRAILER = struct.Struct(">Q4s")
+
+
+class ArchiveError(Exception):
+    pass
+
+
+class ArchivedProposition(NamedTuple):
+    id: int
+    created_at: datetime
+    updated_at: datetime | None
+    version: int
+    created_by_user_id: int
+    comment: str | None
+    json_object: dict[str, Any]
+
+    @property
+    def keyset(self) -> tuple[datetime, int]:
+        return self.created_at, self.id
+
+    def json_document(self) -> str:
+        """ Counterpart of `Proposition.json_document` """
+
+        return json.dumps({
+            "id": self.id,
+            "json_object": self.json_object,
+            "comment": self.comment,
+        })
+
+
+def encode_chunk(
+        propositions: Sequence[ArchivedProposition],
+        block_size: int,
+) -> bytes:
+    """
+    Chunk file of propositions given in keyset order: blocks of at most
+    `block_size` propositions, each a zlib-compressed JSON object of
+    columns, followed by a footer, which indexes blocks by keyset of their
+    last proposition, so that reads decompress only blocks they need
+    """
+
+    parts = []
+    blocks = []
+    offset = 0
+    for start in range(0, len(propositions), block_size):
+        rows = propositions[start:start + block_size]
+        columns = {name: [_dump(getattr(i, name)) for i in rows]
+                   for name in ArchivedProposition._fields}
+        data = zlib.compress(
+            json.dumps(columns, separators=(",", ":")).encode())
+        last = rows[-1]
+        blocks.append([offset, len(data), _dump(last.created_at), last.id])
+        parts.append(data)
+        offset += len(data)
+
+    footer = zlib.compress(json.dumps(blocks).encode())
+    parts.append(footer)
+    parts.append(_TRAILER.pack(len(footer), MAGIC))
+    return b"".join(parts)
+
+
+class ArchiveStore:
+    """
+    Chunk files of archived propositions under `directory`, addressed by
+    keys, i.e. relative paths, as objects of an object store would be.
+    Files are written once and read through memory mapping, so that only
+    pages of blocks a read decompresses are loaded.
+
+    Access is blocking, async callers run it in a thread.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def write(self, key: str, data: bytes) -> None:
+        """ Atomic and durable once it returns; replaces existing file """
+
+        path = self.directory / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        directory = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def read(
+            self,
+            key: str,
+            after: tuple[datetime, int] | None = None,
+            since: datetime | None = None,
+            limit: int | None = None,
+    ) -> list[ArchivedProposition]:
+        """
+        Propositions of the chunk in keyset order, filtered as listings
+        of propositions are
+
+        :raise ArchiveError:
+        """
+
+        propositions = []
+        with (open(self.directory / key, "rb") as file,
+              mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+              memoryview(data) as view):
+            for offset, size, last_created_at, last_id in _read_footer(
+                    view, key):
+                last_created_at = datetime.fromisoformat(last_created_at)
+                if after is not None and (last_created_at, last_id) <= after:
+                    continue
+                if since is not None and last_created_at < since:
+                    continue
+                # no slice of the mapping may outlive it
+                block = _decode_block(view[offset:offset + size])
+                for proposition in block:
+                    if after is not None and proposition.keyset <= after:
+                        continue
+                    if since is not None and proposition.created_at < since:
+                        continue
+                    propositions.append(proposition)
+                if limit is not None and len(propositions) >= limit:
+                    return propositions[:limit]
+        return propositions
+
+
+def _read_footer(view: memoryview, key: str) -> list[list]:
+    """ :return: offset, size and keyset of last proposition of blocks """
+
+    if len(view) < _TRAILER.size:
+        raise ArchiveError(f"Chunk {key} is truncated")
+    footer_end = len(view) - _TRAILER.size
+    footer_size, magic = _TRAILER.unpack(view[footer_end:])
+    if magic != MAGIC or footer_size > footer_end:
+        raise ArchiveError(f"Chunk {key} is not a chunk file")
+    footer = view[footer_end - footer_size:footer_end]
+    return json.loads(zlib.decompress(footer))
+
+
+def _decode_block(block: memoryview) -> list[ArchivedProposition]:
+    columns = json.loads(zlib.decompress(block))
+    for name in ("created_at", "updated_at"):
+        columns[name] = [None if i is None else datetime.fromisoformat(i)
+                         for i in columns[name]]
+    return [ArchivedProposition(*i) for i in zip(
+        *(columns[name] for name in ArchivedProposition._fields),
+        strict=True,
+    )]
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
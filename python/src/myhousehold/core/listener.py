@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+import psycopg
+
+from myhousehold.core.notifications import (
+    PROPOSITION_CHANGES_CHANNEL,
+    PropositionChanges,
+)
+
+logger = logging.getLogger(__name__)
+
+ChangesHandler = Callable[[list[PropositionChanges]], Awaitable[None]]
+
+
+class ChangesListener:
+    """
+    Listens for proposition changes on a dedicated connection. Changes
+    notified within `collect_window` are passed to every handler as a
+    batch, without waiting for handlers to finish.
+
+    `on_listening` is called whenever listening (re)starts, changes
+    notified while connection was lost are not received.
+    """
+
+    def __init__(
+            self,
+            dsn: str,
+            collect_window: float,
+            handlers: list[ChangesHandler],
+            on_listening: Callable[[], None] | None = None,
+    ):
+        self.dsn = dsn
+        self.collect_window = collect_window
+        self.handlers = handlers
+        self.on_listening = on_listening
+
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except psycopg.OperationalError:
+                logger.exception("Listening connection lost, reconnecting")
+            except Exception:
+                # e.g. malformed payload, listening must go on regardless
+                logger.exception("Listening failed, restarting")
+            await asyncio.sleep(1)
+
+    async def drain(self) -> None:
+        """ Wait for handlers in progress """
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _listen(self) -> None:
+        async with await psycopg.AsyncConnection.connect(
+                self.dsn,
+                autocommit=True,
+        ) as connection:
+            await connection.execute(f"LISTEN {PROPOSITION_CHANGES_CHANNEL}")
+            logger.info("Listening for %s", PROPOSITION_CHANGES_CHANNEL)
+            if self.on_listening is not None:
+                self.on_listening()
+
+            while True:
+                notifies = []
+                async for notify in connection.notifies(stop_after=1):
+                    notifies.append(notify)
+                async for notify in connection.notifies(
+                        timeout=self.collect_window):
+                    notifies.append(notify)
+
+                changes = [PropositionChanges.from_payload(i.payload)
+                           for i in notifies]
+                for handler in self.handlers:
+                    task = asyncio.create_task(self._handle(handler, changes))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+    async def _handle(
+            self,
+            handler: ChangesHandler,
+            changes: list[PropositionChanges],
+    ) -> None:
+        try:
+            await handler(changes)
+        except Exception:
+            logger.exception("Handling of proposition changes failed")
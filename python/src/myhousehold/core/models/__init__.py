@@ -1,9 +1,20 @@
+from .aggregate_bucket import (
+    AggregateBucket,
+    AggregateDeclaration,
+)
 from .login_session import (
     LoginSession,
 )
 from .proposition import (
     Proposition,
 )
+from .proposition_chunk import (
+    PropositionChunk,
+)
+from .rollup_bucket import (
+    Granularity,
+    RollupBucket,
+)
 from .stream import (
     Stream,
 )
@@ -12,8 +23,13 @@ from .user import (
 )
 
 __all__ = [
+    "AggregateBucket",
+    "AggregateDeclaration",
+    "Granularity",
     "LoginSession",
     "Proposition",
+    "PropositionChunk",
+    "RollupBucket",
     "Stream",
     "User",
 ]
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class AggregateBucket(Base):
+    """
+    State of incrementally maintained aggregate of a numeric property of
+    stream propositions, per day of their creation
+    """
+
+    __tablename__ = "aggregate_bucket"
+
+    aggregate: Mapped[str] = mapped_column(primary_key=True)
+    stream_id: Mapped[int] = mapped_column(
+        ForeignKey("stream.id"),
+        primary_key=True,
+    )
+    bucket: Mapped[date] = mapped_column(primary_key=True)
+    count: Mapped[int]
+    sum: Mapped[float]
+    min: Mapped[float | None]
+    max: Mapped[float | None]
+
+
+class AggregateDeclaration(Base):
+    """
+    Declaration of aggregate its buckets were last rebuilt for, so that
+    they are rebuilt once it is new or changed
+    """
+
+    __tablename__ = "aggregate_declaration"
+
+    aggregate: Mapped[str] = mapped_column(primary_key=True)
+    # `Aggregate.fingerprint`
+    fingerprint: Mapped[str]
+    rebuilt_at: Mapped[datetime] = mapped_column(default=datetime.now)
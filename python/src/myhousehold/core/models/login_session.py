@@ -16,7 +16,10 @@ class LoginSession(Base):
     user_agent: Mapped[str | None]
     token: Mapped[str]
     created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    # WAL position (`pg_lsn`) after the last commit of the session, which
+    #  replicas must have replayed to serve its reads
+    last_write_lsn: Mapped[str | None]
 
-    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), index=True)
 
     user: Mapped[User] = relationship(lazy="joined")
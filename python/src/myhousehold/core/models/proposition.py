@@ -3,13 +3,22 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-import jsonschema
 from jsonschema.exceptions import ValidationError
-from sqlalchemy import ForeignKey
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import (
+    ColumnElement,
+    ForeignKey,
+    Index,
+    Text,
+    cast,
+    func,
+    literal_column,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from myhousehold.core.exceptions import DomainValueError
+from myhousehold.core.timings import measure
+from myhousehold.core.validators import validator_registry
 
 from .base import Base
 
@@ -19,12 +28,43 @@ if TYPE_CHECKING:
 
 class Proposition(Base):
     __tablename__ = "proposition"
+    __table_args__ = (
+        Index(
+            "ix_proposition_json_object",
+            "json_object",
+            postgresql_using="gin",
+            postgresql_ops={"json_object": "jsonb_path_ops"},
+        ),
+        # stream propositions in keyset order, also serves `stream_id`
+        #  lookups and per-stream aggregates
+        Index(
+            "ix_proposition_stream_id_created_at",
+            "stream_id",
+            "created_at",
+            "id",
+        ),
+        # monthly partitions, see `create_monthly_partitions` of database,
+        #  and a default one for months not created yet; queries bounded
+        #  by `created_at` read only partitions they need
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    json_object: Mapped[dict] = mapped_column(JSON())
+    # primary key of partitioned table must include partition key
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    json_object: Mapped[dict] = mapped_column(JSONB())
     comment: Mapped[str | None]
-    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
-    updated_at: Mapped[datetime | None]
+    created_at: Mapped[datetime] = mapped_column(
+        primary_key=True,
+        default=datetime.now,
+    )
+    updated_at: Mapped[datetime | None] = mapped_column(
+        onupdate=datetime.now,
+    )
+    # incremented by every update, writes are conditional on it
+    version: Mapped[int] = mapped_column(
+        default=1,
+        server_default="1",
+    )
 
     stream_id: Mapped[int] = mapped_column(ForeignKey("stream.id"))
     created_by_user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
@@ -32,13 +72,43 @@ class Proposition(Base):
     stream: Mapped[Stream] = relationship()
     asserted_by_user: Mapped[User] = relationship()
 
+    @classmethod
+    def json_document(cls) -> ColumnElement[str]:
+        """
+        JSON document of proposition as API represents it, built by
+        database, so that no objects are constructed to serialize it
+        """
+
+        # keys are inlined, parameters of variadic "any" are of unknown type
+        return cast(func.json_build_object(
+            literal_column("'id'"), cls.id,
+            literal_column("'json_object'"), cls.json_object,
+            literal_column("'comment'"), cls.comment,
+        ), Text)
+
     @validates("json_object")
     def validate_json_object(self, key, value):
         assert self.stream is not None, \
             "Developer must ensure loading of this relationship"
 
+        return self.check_json_object(self.stream, value)
+
+    @staticmethod
+    def check_json_object(stream: Stream, value: dict) -> dict:
+        """
+        Validate object against JSON schema of the stream. Used directly
+        where propositions are inserted bypassing the ORM unit of work.
+
+        :raise DomainValueError:
+        """
+
         try:
-            jsonschema.validate(value, self.stream.json_schema)
+            with measure("validation"):
+                validator = validator_registry.get(
+                    stream.id,
+                    stream.json_schema,
+                )
+                validator.validate(value)
         except ValidationError as e:
             raise DomainValueError(
                 detail="JSON data does not match JSON schema of the stream",
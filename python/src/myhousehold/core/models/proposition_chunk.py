@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class PropositionChunk(Base):
+    """
+    Manifest entry of a chunk file of archived propositions of a stream
+    (see `myhousehold.core.archive`). Chunks of a stream hold consecutive
+    ranges of its propositions in `(created_at, id)` order, all of them
+    preceding propositions left in `proposition`.
+    """
+
+    __tablename__ = "proposition_chunk"
+    __table_args__ = (
+        # chunks of a stream in keyset order, from a cursor on
+        Index(
+            "ix_proposition_chunk_stream_id_last",
+            "stream_id",
+            "last_created_at",
+            "last_id",
+        ),
+        # chunk of an archived proposition by its id alone
+        Index(
+            "ix_proposition_chunk_ids",
+            "ids",
+            postgresql_using="gin",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    stream_id: Mapped[int] = mapped_column(ForeignKey("stream.id"))
+    # of the file in archive store
+    key: Mapped[str] = mapped_column(unique=True)
+    propositions_count: Mapped[int]
+    size_bytes: Mapped[int]
+    first_created_at: Mapped[datetime]
+    first_id: Mapped[int]
+    last_created_at: Mapped[datetime]
+    last_id: Mapped[int]
+    # of all the propositions; ids are not ordered by creation time, so
+    #  `first_id` and `last_id` do not bound them
+    ids: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    # latest update of the propositions, for stats of the stream
+    last_updated_at: Mapped[datetime | None]
+    archived_at: Mapped[datetime] = mapped_column(default=datetime.now)
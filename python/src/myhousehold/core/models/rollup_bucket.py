@@ -0,0 +1,35 @@
+from datetime import datetime
+from enum import StrEnum
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Granularity(StrEnum):
+    HOUR = "HOUR"
+    DAY = "DAY"
+    MONTH = "MONTH"
+
+
+class RollupBucket(Base):
+    """
+    Count, sum, min and max of a numeric property of stream propositions,
+    per hour, day or month of their creation
+    """
+
+    __tablename__ = "rollup_bucket"
+
+    # order of key columns serves range scans of a path of a stream
+    stream_id: Mapped[int] = mapped_column(
+        ForeignKey("stream.id"),
+        primary_key=True,
+    )
+    granularity: Mapped[Granularity] = mapped_column(primary_key=True)
+    path: Mapped[str] = mapped_column(primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(primary_key=True)
+    count: Mapped[int]
+    sum: Mapped[float]
+    min: Mapped[float]
+    max: Mapped[float]
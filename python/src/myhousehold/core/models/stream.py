@@ -1,16 +1,29 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
 import jsonschema
 from jsonschema.exceptions import SchemaError
-from sqlalchemy import ForeignKey
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    ForeignKey,
+    Index,
+    Update,
+    func,
+    literal_column,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from .proposition import Proposition
 from ..exceptions import DomainValueError
+from ..validators import validator_registry
 from .base import Base
 from .intents.project import ProjectIntent
 from .intents.record import RecordIntent
@@ -19,18 +32,47 @@ if TYPE_CHECKING:
     from . import Proposition
 
 
+# key of `Session.info`, see `Stream.mark_changed`
+_CHANGED_STREAM_IDS = "changed_stream_ids"
+
+# step of expiry of propositions by TTL
+EXPIRY_RESOLUTION = timedelta(minutes=1)
+
+
 class Stream(Base):
     """ Collection of typed propositions """
 
     # todo: think about differentiation of propositions types and streams
 
     __tablename__ = "stream"
+    __table_args__ = (
+        Index(
+            "ix_stream_json_schema",
+            "json_schema",
+            postgresql_using="gin",
+            postgresql_ops={"json_schema": "jsonb_path_ops"},
+        ),
+        # predicate matches the one of accessible streams queries, so that
+        #  planner can prove it; public streams are expected to be few
+        Index(
+            "ix_stream_public",
+            "id",
+            postgresql_where=text("is_private IS false"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str]
-    json_schema: Mapped[dict] = mapped_column(JSON())
+    # lookups by name
+    name: Mapped[str] = mapped_column(index=True)
+    json_schema: Mapped[dict] = mapped_column(JSONB())
     is_private: Mapped[bool]
     created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    # bumped by every write of stream propositions, versions listings
+    revision: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        server_default="0",
+    )
 
     record_intent_id: Mapped[int | None] = mapped_column(
         ForeignKey("record_intent.id"),
@@ -40,15 +82,85 @@ class Stream(Base):
     )
     created_by_user_id: Mapped[int] = mapped_column(
         ForeignKey("user.id"),
+        index=True,
     )
 
     record_intent: Mapped[RecordIntent | None] = relationship()
     project_intent: Mapped[ProjectIntent | None] = relationship()
     propositions: Mapped[list[Proposition]] = relationship(
-        lazy="selectin",
+        # may be large, callers must request it explicitly
+        lazy="raise",
     )
 
-    @validates
+    @classmethod
+    def bump_revision(cls, stream_id: int) -> Update:
+        """
+        Statement which marks propositions of the stream changed, must be
+        executed in the transaction of every write of them, as late as
+        possible: it locks the row of the stream until commit, so writers
+        of the stream wait for each other only while committing. Revisions
+        then follow order of commits, unlike anything taken earlier.
+        """
+
+        return (update(cls)
+                .where(cls.id == stream_id)
+                .values(revision=cls.revision + 1))
+
+    @classmethod
+    def mark_changed(cls, session: AsyncSession, stream_id: int) -> None:
+        """
+        Defer `bump_revision` of the stream to `bump_marked_revisions`,
+        which is run right before commit of the session
+        """
+
+        session.info.setdefault(_CHANGED_STREAM_IDS, set()).add(stream_id)
+
+    @classmethod
+    async def bump_marked_revisions(cls, session: AsyncSession) -> None:
+        # in order of ids, so that writers of several streams do not
+        #  deadlock
+        for stream_id in sorted(session.info.pop(_CHANGED_STREAM_IDS, ())):
+            await session.execute(cls.bump_revision(stream_id))
+
+    @classmethod
+    def expiry_cutoff(
+            cls,
+            ttl: ColumnElement[timedelta],
+    ) -> ColumnElement[datetime]:
+        """
+        Creation time before which propositions of `ttl` are expired now,
+        in steps of `EXPIRY_RESOLUTION`, so that listings of streams, and
+        their versions with them, change only that often
+        """
+
+        return func.date_bin(
+            EXPIRY_RESOLUTION,
+            func.localtimestamp() - ttl,
+            literal_column("'2000-01-01'::timestamp"),
+        )
+
+    @classmethod
+    def expired_before(
+            cls,
+            stream_id: int | ColumnElement[int],
+    ) -> ColumnElement[datetime]:
+        """
+        Creation time before which propositions of the stream are expired
+        by TTL of its record intent (`expiry_cutoff`), `-infinity` if they
+        do not expire. Expired propositions must not be read, they are
+        purged eventually.
+        """
+
+        cutoff = (select(cls.expiry_cutoff(RecordIntent.ttl))
+                  .join(cls.record_intent)
+                  .where(cls.id == stream_id)
+                  # `stream_id` may come from any enclosing query
+                  .correlate_except(cls, RecordIntent)
+                  .scalar_subquery())
+        return func.coalesce(cutoff,
+                             literal_column("'-infinity'::timestamp"))
+
+    @validates("json_schema")
     def validate_json_schema(self, key, value):
         try:
             (jsonschema.validators
@@ -58,3 +170,8 @@ class Stream(Base):
             raise DomainValueError(
                 detail="Invalid JSON schema",
             ) from e
+
+        # compiled validator of the previous schema must not outlive it
+        validator_registry.invalidate(self.id)
+
+        return value
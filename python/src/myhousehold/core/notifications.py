@@ -0,0 +1,27 @@
+import json
+from datetime import datetime
+from typing import Literal, NamedTuple
+
+# notified by trigger of `proposition` table on each INSERT and UPDATE
+PROPOSITION_CHANGES_CHANNEL = "proposition_changes"
+
+
+class PropositionChanges(NamedTuple):
+    op: Literal["INSERT", "UPDATE"]
+    stream_id: int
+    # None if statement changed too many propositions to enumerate them
+    ids: list[int] | None
+    # creation time range of changed propositions
+    created_from: datetime
+    created_to: datetime
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "PropositionChanges":
+        data = json.loads(payload)
+        return cls(
+            op=data["op"],
+            stream_id=data["stream_id"],
+            ids=data["ids"],
+            created_from=datetime.fromisoformat(data["created_from"]),
+            created_to=datetime.fromisoformat(data["created_to"]),
+        )
@@ -0,0 +1,80 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+
+class PoolTelemetry:
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.overflow_max = 0
+        self.checkout_wait_seconds_total = 0.0
+        self.checkout_wait_seconds_max = 0.0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.connection_lifetime_seconds_total = 0.0
+        self.connection_lifetime_seconds_max = 0.0
+
+    def observe_checkout(self, wait: float, overflow: int) -> None:
+        self.checkouts += 1
+        self.checkout_wait_seconds_total += wait
+        self.checkout_wait_seconds_max = max(
+            self.checkout_wait_seconds_max, wait)
+        if overflow > 0:
+            self.overflow_checkouts += 1
+            self.overflow_max = max(self.overflow_max, overflow)
+
+    def on_connect(self, dbapi_connection, record: ConnectionPoolEntry):
+        self.connections_opened += 1
+        record.info["connected_at"] = time.monotonic()
+
+    def on_close(self, dbapi_connection, record: ConnectionPoolEntry):
+        self.connections_closed += 1
+        connected_at = record.info.pop("connected_at", None)
+        if connected_at is not None:
+            lifetime = time.monotonic() - connected_at
+            self.connection_lifetime_seconds_total += lifetime
+            self.connection_lifetime_seconds_max = max(
+                self.connection_lifetime_seconds_max, lifetime)
+
+    def snapshot(self) -> dict[str, float]:
+        return dict(vars(self))
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Default pool of async engines, which additionally collects
+    `PoolTelemetry`. Telemetry survives pool recreation on engine dispose.
+    """
+
+    def __init__(self, *args, **kwargs):
+        inherits_dispatch = "_dispatch" in kwargs
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+        if not inherits_dispatch:
+            event.listen(self, "connect", self.telemetry.on_connect)
+            event.listen(self, "close", self.telemetry.on_close)
+
+    def recreate(self) -> "InstrumentedAsyncAdaptedQueuePool":
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+    def telemetry_snapshot(self) -> dict[str, float]:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            **self.telemetry.snapshot(),
+        }
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started_at = time.perf_counter()
+        record = super()._do_get()
+        self.telemetry.observe_checkout(
+            wait=time.perf_counter() - started_at,
+            overflow=self.overflow(),
+        )
+        return record
@@ -0,0 +1,132 @@
+import re
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_BIND_PARAMETER = re.compile(r"%\([^)]*\)s")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Statement with parameters, literals and expanded lists replaced by
+    placeholders, so that repeats of a query compare equal.
+    """
+
+    statement = _BIND_PARAMETER.sub("?", statement)
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _LIST.sub("?", statement)
+    statement = _ROWS.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryBudgetExceededError(Exception):
+    def __init__(self, log: "QueryLog", max_queries: int, max_repeats: int):
+        self.log = log
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        super().__init__(
+            f"Query budget exceeded: {log.count} statements "
+            f"(budget {max_queries}, repeats allowed {max_repeats})\n"
+            + log.report()
+        )
+
+
+class QueryLog:
+    """ Statements issued within a unit of work, e.g. a request """
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def record(self, statement: str) -> None:
+        self.statements.append(statement)
+
+    def repeats(self) -> list[tuple[str, int]]:
+        """ Normalized statements issued more than once, most first """
+
+        counter = Counter(normalize_sql(i) for i in self.statements)
+        return [i for i in counter.most_common() if i[1] > 1]
+
+    def exceeds(self, max_queries: int, max_repeats: int) -> bool:
+        if self.count > max_queries:
+            return True
+        repeats = self.repeats()
+        return bool(repeats) and repeats[0][1] > max_repeats
+
+    def check(self, max_queries: int, max_repeats: int) -> None:
+        """
+        :raise QueryBudgetExceededError: if more statements were issued,
+         or the same statement was repeated more times (N+1)
+        """
+
+        if self.exceeds(max_queries, max_repeats):
+            raise QueryBudgetExceededError(self, max_queries, max_repeats)
+
+    def report(self) -> str:
+        lines = [f"{count:>5}x {statement}"
+                 for statement, count in self.repeats()]
+        return "\n".join(lines or ["no repeated statements"])
+
+
+current_query_log: ContextVar[QueryLog | None] = ContextVar(
+    "current_query_log",
+    default=None,
+)
+
+
+def watch_session(session: AsyncSession) -> None:
+    """
+    Record statements of session, including lazy loads and flushes, to
+    current query log, if any.
+    """
+
+    @event.listens_for(session.sync_session, "after_begin")
+    def watch_connection(session, transaction, connection):
+        if not event.contains(connection, "before_cursor_execute",
+                              _record_statement):
+            event.listen(connection, "before_cursor_execute",
+                         _record_statement)
+
+
+def _record_statement(conn, cursor, statement, parameters, context,
+                      executemany):
+    query_log = current_query_log.get()
+    if query_log is not None:
+        query_log.record(statement)
+
+
+@contextmanager
+def query_budget(
+        max_queries: int,
+        max_repeats: int | None = None,
+) -> Iterator[QueryLog]:
+    """
+    Record statements of watched sessions issued within the block and
+    check them against the budget on exit. Meant for tests.
+
+    :raise QueryBudgetExceededError:
+    """
+
+    query_log = QueryLog()
+    token = current_query_log.set(query_log)
+    try:
+        yield query_log
+    finally:
+        current_query_log.reset(token)
+    query_log.check(
+        max_queries,
+        max_repeats if max_repeats is not None else max_queries,
+    )
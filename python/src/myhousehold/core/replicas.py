@@ -0,0 +1,212 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import NewType
+from uuid import UUID
+
+from sqlalchemy import Text, cast, func, select, text, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from myhousehold.core.models import LoginSession
+
+logger = logging.getLogger(__name__)
+
+# writes of login sessions known to be replayed by replicas, at most
+MAX_REPLAYED_WRITES = 10_000
+
+ReadOnlySession = NewType("ReadOnlySession", AsyncSession)
+# identifies whose writes reads must observe, e.g. login session uid
+ConsistencyKey = NewType("ConsistencyKey", str | None)
+
+_REPLICATION_STATE_STMT = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()),
+            0)
+    END,
+    pg_last_wal_replay_lsn()::text
+""")
+
+
+def parse_lsn(lsn: str) -> int:
+    """ Position in WAL of textual `pg_lsn`, e.g. "16/B374D848" """
+
+    high, low = lsn.split("/")
+    return int(high, 16) << 32 | int(low, 16)
+
+
+def parse_key(key: ConsistencyKey) -> UUID | None:
+    """ Login session uid of the key, None if it is not one """
+
+    if key is None:
+        return None
+    try:
+        return UUID(key)
+    except ValueError:
+        return None
+
+
+class ReplicaRouter:
+    """
+    Chooses engine for read-only work.
+
+    Staleness policy: replica is used only while its last measured
+    replication lag is within `max_lag`, lag is re-measured at most once
+    per `lag_check_interval`. If no replica qualifies, primary is used.
+
+    Read-your-writes: WAL position of each write of a consistency key is
+    stored in its login session, in the transaction of the write, so that
+    every process and container sees it. Reads of the key go only to
+    replicas which replayed WAL up to it as of their last check and
+    already have it in the login session, i.e. replayed the commit, to
+    primary otherwise.
+    """
+
+    def __init__(
+            self,
+            primary: AsyncEngine,
+            replicas: Sequence[AsyncEngine],
+            max_lag: float,
+            lag_check_interval: float,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+
+        self._round_robin = itertools.cycle(self.replicas)
+        self._lags: dict[AsyncEngine, float] = {}
+        # replay positions only grow, a stale one is a safe lower bound
+        self._replayed_lsns: dict[AsyncEngine, int] = {}
+        self._lags_checked_at: float | None = None
+        # latest write of login session each replica replayed, LRU
+        self._replayed_writes: OrderedDict[tuple[AsyncEngine, UUID], int] = (
+            OrderedDict())
+        self._lags_lock = asyncio.Lock()
+
+    async def record_write(
+            self,
+            session: AsyncSession,
+            key: ConsistencyKey,
+    ) -> None:
+        """
+        Must be called in the transaction of primary session, right
+        before it is committed
+        """
+
+        login_session_uid = parse_key(key)
+        if login_session_uid is None or not self.replicas:
+            return
+
+        stmt = (update(LoginSession)
+                .where(LoginSession.uid == login_session_uid)
+                .values(last_write_lsn=cast(func.pg_current_wal_lsn(), Text))
+                .execution_options(synchronize_session=False))
+        await session.execute(stmt)
+
+    async def choose_engine(
+            self,
+            session: AsyncSession,
+            key: ConsistencyKey,
+    ) -> AsyncEngine:
+        """
+        :param session: primary session the login session of the key is
+         read through, usually from identity map after authentication
+        """
+
+        if not self.replicas:
+            return self.primary
+
+        min_lsn = 0
+        login_session_uid = parse_key(key)
+        if login_session_uid is not None:
+            login_session = await session.get(LoginSession, login_session_uid)
+            if (login_session is not None
+                    and login_session.last_write_lsn is not None):
+                min_lsn = parse_lsn(login_session.last_write_lsn)
+
+        await self._refresh_lags()
+        for _ in range(len(self.replicas)):
+            replica = next(self._round_robin)
+            if (self._lags.get(replica, float("inf")) <= self.max_lag
+                    and self._replayed_lsns.get(replica, -1) >= min_lsn
+                    and (min_lsn == 0 or await self._has_replayed_write(
+                        replica, login_session_uid, min_lsn))):
+                return replica
+
+        return self.primary
+
+    async def _has_replayed_write(
+            self,
+            replica: AsyncEngine,
+            login_session_uid: UUID,
+            min_lsn: int,
+    ) -> bool:
+        """
+        Whether the replica replayed commit of the write at `min_lsn`:
+        the position is taken before commit, so it is not enough that WAL
+        is replayed up to it
+        """
+
+        replayed_write_key = (replica, login_session_uid)
+        if self._replayed_writes.get(replayed_write_key, -1) >= min_lsn:
+            self._replayed_writes.move_to_end(replayed_write_key)
+            return True
+
+        stmt = (select(LoginSession.last_write_lsn)
+                .where(LoginSession.uid == login_session_uid))
+        try:
+            async with replica.connect() as connection:
+                last_write_lsn = await connection.scalar(stmt)
+        except SQLAlchemyError:
+            logger.warning(
+                "Replica %s is unavailable",
+                replica.url.render_as_string(hide_password=True),
+                exc_info=True,
+            )
+            return False
+        if last_write_lsn is None or parse_lsn(last_write_lsn) < min_lsn:
+            return False
+
+        self._replayed_writes[replayed_write_key] = parse_lsn(last_write_lsn)
+        self._replayed_writes.move_to_end(replayed_write_key)
+        if len(self._replayed_writes) > MAX_REPLAYED_WRITES:
+            self._replayed_writes.popitem(last=False)
+        return True
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+    async def _refresh_lags(self) -> None:
+        checked_at = self._lags_checked_at
+        if (checked_at is not None
+                and time.monotonic() - checked_at < self.lag_check_interval):
+            return
+
+        async with self._lags_lock:
+            if checked_at is not self._lags_checked_at:
+                return  # refreshed while waiting for the lock
+
+            for replica in self.replicas:
+                try:
+                    async with replica.connect() as connection:
+                        result = await connection.execute(
+                            _REPLICATION_STATE_STMT)
+                        lag, replayed_lsn = result.one()
+                except SQLAlchemyError:
+                    logger.warning(
+                        "Replica %s is unavailable",
+                        replica.url.render_as_string(hide_password=True),
+                        exc_info=True,
+                    )
+                    lag, replayed_lsn = float("inf"), None
+                self._lags[replica] = float(lag)
+                if replayed_lsn is not None:
+                    self._replayed_lsns[replica] = parse_lsn(replayed_lsn)
+            self._lags_checked_at = time.monotonic()
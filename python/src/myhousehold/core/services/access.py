@@ -1,12 +1,12 @@
 import secrets
 from uuid import UUID
 
-from argon2 import PasswordHasher
 from argon2 import exceptions as argon2_exceptions
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from myhousehold.core.models import LoginSession, User
+from myhousehold.core.services.hashing import PasswordHashingExecutor
 
 
 class ServiceAccessError(Exception):
@@ -21,17 +21,21 @@ class AccessService:
     def __init__(
             self,
             orm_session: AsyncSession,
-            ph: PasswordHasher,
+            hasher: PasswordHashingExecutor,
     ):
         self.orm_session = orm_session
-        self.ph = ph
+        self.hasher = hasher
 
     async def register(
             self,
             username: str,
             password: str,
     ) -> User:
-        password_hash = self.ph.hash(password)
+        """
+        :raise PasswordHashingOverloadedError:
+        """
+
+        password_hash = await self.hasher.hash(password)
         user = User(
             username=username,
             password_hash=password_hash,
@@ -49,6 +53,7 @@ class AccessService:
     ) -> LoginSession:
         """
         :raise ErrorUnauthorized:
+        :raise PasswordHashingOverloadedError:
         """
 
         # note: timing-attack protected, but registration may expose
@@ -105,11 +110,11 @@ class AccessService:
         dummy_hash = ("$argon2id$v=19$m=65536,t=3,p=4$1/kKopFhFTmJP0aLfW"
                       "15XQ$fwP4HIJ1Dwtk7Fb5XzW8HDenJ7WroA6fiz0FAynO1cA")
         dummy_password = "dummy password horse battery"
-        self.ph.verify(dummy_hash, dummy_password)
+        await self.hasher.verify(dummy_hash, dummy_password)
         await self._dummy_rehash()
 
     async def _dummy_rehash(self):
-        self.ph.hash("password horse battery dummy")
+        await self.hasher.hash("password horse battery dummy")
 
     async def _authenticate_user(
             self,
@@ -117,13 +122,13 @@ class AccessService:
             password: str,
     ) -> None:
         try:
-            self.ph.verify(user.password_hash, password)
+            await self.hasher.verify(user.password_hash, password)
         except argon2_exceptions.VerifyMismatchError as e:
             await self._dummy_rehash()
             raise ErrorUnauthorized from e
 
-        if self.ph.check_needs_rehash(user.password_hash):
-            user.password_hash = self.ph.hash(password)
+        if self.hasher.check_needs_rehash(user.password_hash):
+            user.password_hash = await self.hasher.hash(password)
         else:
             await self._dummy_rehash()
 
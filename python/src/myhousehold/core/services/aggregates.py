@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from datetime import date, datetime, time, timedelta
+from typing import Any, NamedTuple, NewType
+
+from sqlalchemy import (
+    ColumnElement,
+    Date,
+    case,
+    cast,
+    delete,
+    func,
+    literal,
+    literal_column,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myhousehold.core.models import (
+    AggregateBucket,
+    AggregateDeclaration,
+    Proposition,
+    PropositionChunk,
+    Stream,
+)
+
+BucketKey = tuple[str, int, date]
+
+
+def json_contains(document: Any, contained: Any) -> bool:
+    """ Counterpart of `@>` of `jsonb` """
+
+    if isinstance(contained, dict):
+        return isinstance(document, dict) and all(
+            key in document and json_contains(document[key], value)
+            for key, value in contained.items())
+    if isinstance(contained, list):
+        return isinstance(document, list) and all(
+            any(json_contains(i, value) for i in document)
+            for value in contained)
+    if isinstance(contained, bool) or isinstance(document, bool):
+        return document is contained
+    return document == contained
+
+
+class Aggregate:
+    """
+    Declaration of count, sum, min and max of a numeric property of
+    propositions, maintained incrementally per day of their creation.
+
+    With `premise_schema` it is maintained only for streams which JSON
+    schema contains it (`@>`), as premises of reasoners are selected.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            path: Sequence[str],
+            premise_schema: dict[str, Any] | None = None,
+    ):
+        self.name = name
+        self.path = tuple(path)
+        self.premise_schema = premise_schema
+
+    def applies_to(self, stream: Stream) -> bool:
+        return (self.premise_schema is None
+                or json_contains(stream.json_schema, self.premise_schema))
+
+    def fingerprint(self) -> str:
+        """ Changes whenever buckets would have to be computed differently """
+
+        return json.dumps([self.path, self.premise_schema], sort_keys=True)
+
+    def extract(self, json_object: Any) -> float | None:
+        value = json_object
+        for key in self.path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            return None
+        return value
+
+    def value_expr(self):
+        return Proposition.json_object[self.path].as_float()
+
+    def has_value_expr(self):
+        value = Proposition.json_object[self.path]
+        return func.jsonb_typeof(value) == "number"
+
+
+DeclaredAggregates = NewType("DeclaredAggregates", list[Aggregate])
+
+
+class AggregateState(NamedTuple):
+    count: int = 0
+    sum: float = 0
+    min: float | None = None
+    max: float | None = None
+
+    @classmethod
+    def of(cls, value: float) -> AggregateState:
+        return cls(count=1, sum=value, min=value, max=value)
+
+    def merge(self, other: AggregateState) -> AggregateState:
+        return AggregateState(
+            count=self.count + other.count,
+            sum=self.sum + other.sum,
+            min=min((i for i in (self.min, other.min) if i is not None),
+                    default=None),
+            max=max((i for i in (self.max, other.max) if i is not None),
+                    default=None),
+        )
+
+
+def _archived_until(stream_id: ColumnElement[int]) -> ColumnElement[date]:
+    """ Day of the last archived proposition of the stream """
+
+    last_created_at = (select(func.max(PropositionChunk.last_created_at))
+                       .where(PropositionChunk.stream_id == stream_id)
+                       .scalar_subquery())
+    return func.coalesce(cast(last_created_at, Date),
+                         literal_column("'-infinity'::date"))
+
+
+class AggregatesService:
+    """
+    Maintains declared aggregates in the transaction of proposition writes,
+    so that reasoners read O(1) state instead of rescanning premises.
+    """
+
+    def __init__(
+            self,
+            orm_session: AsyncSession,
+            aggregates: DeclaredAggregates,
+    ):
+        self.orm_session = orm_session
+        self.aggregates = aggregates
+
+    async def on_created(
+            self,
+            stream: Stream,
+            propositions: Sequence[Proposition],
+    ) -> None:
+        """ Must be called after propositions of the stream are flushed """
+
+        aggregates = self._get_applicable(stream)
+        states: dict[BucketKey, AggregateState] = {}
+        for proposition in propositions:
+            for aggregate in aggregates:
+                value = aggregate.extract(proposition.json_object)
+                if value is None:
+                    continue
+                key = (aggregate.name,
+                       proposition.stream_id,
+                       proposition.created_at.date())
+                states[key] = (states.get(key, AggregateState())
+                               .merge(AggregateState.of(value)))
+
+        await self._add(states)
+
+    async def on_updated(
+            self,
+            stream: Stream,
+            proposition: Proposition,
+            old_json_object: dict[str, Any],
+    ) -> None:
+        """ Must be called after updated proposition is flushed """
+
+        states: dict[BucketKey, AggregateState] = {}
+        for aggregate in self._get_applicable(stream):
+            old = aggregate.extract(old_json_object)
+            new = aggregate.extract(proposition.json_object)
+            if old == new:
+                continue
+            key = (aggregate.name,
+                   proposition.stream_id,
+                   proposition.created_at.date())
+            if old is not None:
+                await self._retract(aggregate, key, old)
+            if new is not None:
+                states[key] = AggregateState.of(new)
+
+        await self._add(states)
+
+    async def get_states(
+            self,
+            bucket: date,
+            stream_ids: Sequence[int] | None = None,
+    ) -> dict[str, AggregateState]:
+        """
+        States of declared aggregates for the day, merged over streams.
+        Buckets of streams which propositions of the day are all expired
+        are skipped, until they are deleted by purge.
+        """
+
+        expired_before = Stream.expired_before(AggregateBucket.stream_id)
+        stmt = (select(AggregateBucket.aggregate,
+                       func.sum(AggregateBucket.count),
+                       func.sum(AggregateBucket.sum),
+                       func.min(AggregateBucket.min),
+                       func.max(AggregateBucket.max))
+                .where(AggregateBucket.bucket == bucket)
+                .where(AggregateBucket.bucket
+                       >= cast(expired_before, Date))
+                .where(AggregateBucket.aggregate
+                       .in_([i.name for i in self.aggregates]))
+                .group_by(AggregateBucket.aggregate))
+        if stream_ids is not None:
+            stmt = stmt.where(AggregateBucket.stream_id.in_(stream_ids))
+
+        states = {i.name: AggregateState() for i in self.aggregates}
+        for name, *state in await self.orm_session.execute(stmt):
+            states[name] = AggregateState(*state)
+        return states
+
+    async def rebuild_outdated(self) -> list[str]:
+        """
+        Rebuild declared aggregates which buckets were never built or were
+        built for a different declaration, e.g. after deploy
+
+        :return: names of rebuilt aggregates
+        """
+
+        stmt = select(AggregateDeclaration.aggregate,
+                      AggregateDeclaration.fingerprint)
+        built = dict((await self.orm_session.execute(stmt)).all())
+
+        rebuilt = []
+        for aggregate in self.aggregates:
+            fingerprint = aggregate.fingerprint()
+            if built.get(aggregate.name) == fingerprint:
+                continue
+            await self.rebuild(aggregate)
+            stmt = insert(AggregateDeclaration).values(
+                aggregate=aggregate.name,
+                fingerprint=fingerprint,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AggregateDeclaration.aggregate],
+                set_=dict(fingerprint=stmt.excluded.fingerprint,
+                          rebuilt_at=func.localtimestamp()),
+            )
+            await self.orm_session.execute(stmt)
+            rebuilt.append(aggregate.name)
+        return rebuilt
+
+    async def rebuild(self, aggregate: Aggregate) -> None:
+        """
+        Recompute aggregate from propositions of the table. Writers of
+        buckets wait until the transaction ends, so that no increment is
+        lost or counted twice. Buckets of days reaching into archived
+        propositions are kept as they are.
+        """
+
+        # blocks writes of buckets, not reads
+        await self.orm_session.execute(
+            text("LOCK TABLE aggregate_bucket IN EXCLUSIVE MODE"))
+        await self.orm_session.execute(
+            delete(AggregateBucket)
+            .where(AggregateBucket.aggregate == aggregate.name)
+            .where(AggregateBucket.bucket
+                   > _archived_until(AggregateBucket.stream_id))
+        )
+        value = aggregate.value_expr()
+        bucket = cast(Proposition.created_at, Date)
+        select_stmt = (select(literal(aggregate.name),
+                              Proposition.stream_id,
+                              bucket,
+                              func.count(),
+                              func.sum(value),
+                              func.min(value),
+                              func.max(value))
+                       .where(aggregate.has_value_expr())
+                       .where(bucket > _archived_until(Proposition.stream_id))
+                       .group_by(Proposition.stream_id, bucket))
+        if aggregate.premise_schema is not None:
+            select_stmt = (select_stmt
+                           .join(Proposition.stream)
+                           .where(Stream.json_schema.contains(
+                               aggregate.premise_schema)))
+        await self.orm_session.execute(
+            insert(AggregateBucket)
+            .from_select(["aggregate", "stream_id", "bucket",
+                          "count", "sum", "min", "max"],
+                         select_stmt)
+        )
+
+    def _get_applicable(self, stream: Stream) -> list[Aggregate]:
+        return [i for i in self.aggregates if i.applies_to(stream)]
+
+    async def _add(self, states: dict[BucketKey, AggregateState]) -> None:
+        if not states:
+            return
+
+        # sorted, so that concurrent writers lock buckets in the same order
+        stmt = insert(AggregateBucket).values([
+            dict(
+                aggregate=name,
+                stream_id=stream_id,
+                bucket=bucket,
+                **state._asdict(),
+            )
+            for (name, stream_id, bucket), state in sorted(states.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AggregateBucket.aggregate,
+                            AggregateBucket.stream_id,
+                            AggregateBucket.bucket],
+            set_=dict(
+                count=AggregateBucket.count + stmt.excluded.count,
+                sum=AggregateBucket.sum + stmt.excluded.sum,
+                min=func.least(AggregateBucket.min, stmt.excluded.min),
+                max=func.greatest(AggregateBucket.max, stmt.excluded.max),
+            ),
+        )
+        await self.orm_session.execute(stmt)
+
+    async def _retract(
+            self,
+            aggregate: Aggregate,
+            key: BucketKey,
+            value: float,
+    ) -> None:
+        name, stream_id, bucket = key
+        day_start = datetime.combine(bucket, time())
+
+        # min and max are not invertible, so they are recomputed from the
+        #  day's propositions, but only when retracted value was on bound
+        bucket_values = (select(aggregate.value_expr())
+                         .where(Proposition.stream_id == stream_id)
+                         .where(Proposition.created_at >= day_start)
+                         .where(Proposition.created_at
+                                < day_start + timedelta(days=1))
+                         .where(aggregate.has_value_expr())
+                         .subquery())
+        value_column = bucket_values.c[0]
+        stmt = (update(AggregateBucket)
+                .where(AggregateBucket.aggregate == name)
+                .where(AggregateBucket.stream_id == stream_id)
+                .where(AggregateBucket.bucket == bucket)
+                .values(
+                    count=AggregateBucket.count - 1,
+                    sum=AggregateBucket.sum - value,
+                    min=case(
+                        (AggregateBucket.min == value,
+                         select(func.min(value_column)).scalar_subquery()),
+                        else_=AggregateBucket.min,
+                    ),
+                    max=case(
+                        (AggregateBucket.max == value,
+                         select(func.max(value_column)).scalar_subquery()),
+                        else_=AggregateBucket.max,
+                    ),
+                )
+                .execution_options(synchronize_session=False))
+        await self.orm_session.execute(stmt)
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from argon2 import PasswordHasher
+
+T = TypeVar("T")
+
+
+class PasswordHashingOverloadedError(Exception):
+    """ Too many hashing operations are already waiting for a worker """
+
+
+class HashingMetrics:
+    def __init__(self):
+        self.operations = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.queue_wait_seconds_total = 0.0
+        self.queue_wait_seconds_max = 0.0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+
+    def observe(self, queue_wait: float, hash_time: float) -> None:
+        self.operations += 1
+        self.queue_wait_seconds_total += queue_wait
+        self.queue_wait_seconds_max = max(
+            self.queue_wait_seconds_max, queue_wait)
+        self.hash_seconds_total += hash_time
+        self.hash_seconds_max = max(self.hash_seconds_max, hash_time)
+
+    def snapshot(self) -> dict[str, float]:
+        return dict(vars(self))
+
+
+class PasswordHashingExecutor:
+    """
+    Runs Argon2 operations of `PasswordHasher` in a dedicated thread pool
+    (argon2-cffi releases GIL while hashing), so event loop keeps serving
+    other requests.
+
+    At most `max_workers` operations run at once and at most
+    `max_queue_depth` wait for a worker; beyond that operations are
+    rejected immediately rather than queued.
+    """
+
+    def __init__(
+            self,
+            ph: PasswordHasher,
+            max_workers: int,
+            max_queue_depth: int,
+    ):
+        self.ph = ph
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.metrics = HashingMetrics()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="password-hashing",
+        )
+
+    async def hash(self, password: str) -> str:
+        """
+        :raise PasswordHashingOverloadedError:
+        """
+
+        return await self._run(self.ph.hash, password)
+
+    async def verify(self, hash_: str, password: str) -> bool:
+        """
+        :raise PasswordHashingOverloadedError:
+        :raise argon2.exceptions.VerifyMismatchError:
+        """
+
+        return await self._run(self.ph.verify, hash_, password)
+
+    def check_needs_rehash(self, hash_: str) -> bool:
+        # parses parameters of the hash only, cheap enough for event loop
+        return self.ph.check_needs_rehash(hash_)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if (self.metrics.in_flight
+                >= self.max_workers + self.max_queue_depth):
+            self.metrics.rejected += 1
+            raise PasswordHashingOverloadedError
+
+        submitted_at = time.perf_counter()
+        timings = []
+
+        def timed():
+            started_at = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                timings.append((started_at - submitted_at,
+                                time.perf_counter() - started_at))
+
+        self.metrics.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, timed)
+        finally:
+            self.metrics.in_flight -= 1
+            if timings:
+                self.metrics.observe(*timings[0])
@@ -1,10 +1,25 @@
+from collections.abc import AsyncGenerator, Iterable
+from datetime import timedelta
+
 from argon2 import PasswordHasher
 from dishka import Provider, Scope, provide
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from myhousehold.core.providers import (
+    ConfigHashing,
+    ConfigPostgres,
+    ConfigStreamAccess,
+    ConfigWarmUp,
+)
+from myhousehold.core.replicas import ConsistencyKey, ReplicaRouter
 from myhousehold.core.services.access import AccessService
+from myhousehold.core.services.aggregates import AggregatesService
+from myhousehold.core.services.hashing import PasswordHashingExecutor
+from myhousehold.core.services.rollups import RollupsService
+from myhousehold.core.services.stream_access import StreamAccessIndex
 from myhousehold.core.services.streams import StreamsService
-from myhousehold.core.services.uow_ctl import UoWCtl
+from myhousehold.core.services.uow_ctl import PrimaryUoWCtl, UoWCtl
+from myhousehold.core.services.warmup import WarmUp
 
 
 class ProviderServices(Provider):
@@ -16,14 +31,76 @@ class ProviderServices(Provider):
         AccessService,
         scope=Scope.REQUEST,
     )
+    get_aggregates_service = provide(
+        AggregatesService,
+        scope=Scope.REQUEST,
+    )
+    get_rollups_service = provide(
+        RollupsService,
+        scope=Scope.REQUEST,
+    )
 
     @provide(scope=Scope.REQUEST)
     async def get_uow_ctl(
             self,
             orm_session: AsyncSession,
+            replica_router: ReplicaRouter,
+            key: ConsistencyKey,
     ) -> UoWCtl:
-        return orm_session
+        return PrimaryUoWCtl(
+            orm_session=orm_session,
+            replica_router=replica_router,
+            key=key,
+        )
 
     @provide(scope=Scope.APP)
     def get_password_hasher(self) -> PasswordHasher:
         return PasswordHasher()
+
+    @provide(scope=Scope.APP)
+    def get_password_hashing_executor(
+            self,
+            ph: PasswordHasher,
+            config: ConfigHashing,
+    ) -> Iterable[PasswordHashingExecutor]:
+        executor = PasswordHashingExecutor(
+            ph=ph,
+            max_workers=config.max_workers,
+            max_queue_depth=config.max_queue_depth,
+        )
+        yield executor
+        executor.shutdown()
+
+    @provide(scope=Scope.APP)
+    def get_stream_access_index(
+            self,
+            config: ConfigStreamAccess,
+    ) -> StreamAccessIndex:
+        return StreamAccessIndex(
+            ttl=config.ttl_seconds,
+            max_users=config.max_users,
+            max_public=config.max_public_streams,
+        )
+
+    @provide(scope=Scope.APP)
+    async def get_warm_up(
+            self,
+            replica_router: ReplicaRouter,
+            hasher: PasswordHashingExecutor,
+            stream_access: StreamAccessIndex,
+            config_postgres: ConfigPostgres,
+            config: ConfigWarmUp,
+    ) -> AsyncGenerator[WarmUp]:
+        connections = config.connections
+        if connections is None:
+            connections = config_postgres.pool_size
+        warm_up = WarmUp(
+            replica_router=replica_router,
+            hasher=hasher,
+            stream_access=stream_access,
+            connections=connections,
+            validators_window=timedelta(hours=config.validators_window_hours),
+            validators_limit=config.validators_limit,
+        )
+        yield warm_up
+        await warm_up.close()
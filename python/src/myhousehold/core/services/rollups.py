@@ -0,0 +1,235 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import (
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myhousehold.core.models import (
+    Granularity,
+    Proposition,
+    RollupBucket,
+    Stream,
+)
+from myhousehold.core.replicas import ReadOnlySession
+
+ROLLUP_COLUMNS = ["stream_id", "granularity", "path", "bucket",
+                  "count", "sum", "min", "max"]
+# bounds recursive schemas
+MAX_PATH_DEPTH = 16
+
+
+def numeric_paths(json_schema: dict[str, Any]) -> list[str]:
+    """
+    Dotted paths of numeric properties declared by JSON schema, following
+    `properties` of nested objects and local `$ref`s.
+    """
+
+    paths = []
+
+    def walk(schema: Any, prefix: tuple[str, ...]) -> None:
+        if len(prefix) > MAX_PATH_DEPTH or not isinstance(schema, dict):
+            return
+
+        ref = schema.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#/"):
+            schema = json_schema
+            for key in ref[2:].split("/"):
+                if not isinstance(schema, dict):
+                    return
+                schema = schema.get(
+                    key.replace("~1", "/").replace("~0", "~"))
+            if not isinstance(schema, dict):
+                return
+
+        types = schema.get("type")
+        types = set(types) if isinstance(types, list) else {types}
+        if prefix and types & {"number", "integer"}:
+            paths.append(".".join(prefix))
+
+        properties = schema.get("properties")
+        if isinstance(properties, dict):
+            for key, subschema in properties.items():
+                if "." in key:  # not addressable by dotted path
+                    continue
+                walk(subschema, (*prefix, key))
+
+    walk(json_schema, ())
+    return paths
+
+
+def truncate(value: datetime, granularity: Granularity) -> datetime:
+    """ Start of the bucket containing `value` """
+
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity is not Granularity.HOUR:
+        value = value.replace(hour=0)
+    if granularity is Granularity.MONTH:
+        value = value.replace(day=1)
+    return value
+
+
+def next_bucket(bucket: datetime, granularity: Granularity) -> datetime:
+    if granularity is Granularity.HOUR:
+        return bucket + timedelta(hours=1)
+    if granularity is Granularity.DAY:
+        return bucket + timedelta(days=1)
+    return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _granularity_literal(granularity: Granularity):
+    # untyped parameter would be resolved to text in SELECT list
+    return cast(literal(granularity), RollupBucket.granularity.type)
+
+
+class RollupsService:
+    """
+    Hourly, daily and monthly rollups of numeric properties of record
+    streams. Rollups are recomputed by reasoner worker for buckets of
+    changed propositions, so they lag behind writes by its collect window.
+    """
+
+    def __init__(
+            self,
+            orm_session: AsyncSession,
+            read_only_session: ReadOnlySession,
+    ):
+        self.orm_session = orm_session
+        self.read_only_session = read_only_session
+
+    async def get_rollups(
+            self,
+            stream_id: int,
+            granularity: Granularity,
+            limit: int,
+            paths: Sequence[str] | None = None,
+            since: datetime | None = None,
+            until: datetime | None = None,
+    ) -> Sequence[RollupBucket]:
+        """
+        Buckets in `(path, bucket)` order, those overlapping `since` and
+        `until` are included. Buckets of expired propositions only are
+        not, until they are deleted by purge.
+        """
+
+        expired_before = Stream.expired_before(stream_id)
+        stmt = (select(RollupBucket)
+                .where(RollupBucket.stream_id == stream_id)
+                .where(RollupBucket.granularity == granularity)
+                .where(RollupBucket.bucket
+                       >= func.date_trunc(granularity.lower(),
+                                          expired_before))
+                .order_by(RollupBucket.path, RollupBucket.bucket)
+                .limit(limit))
+        if paths is not None:
+            stmt = stmt.where(RollupBucket.path.in_(paths))
+        if since is not None:
+            stmt = stmt.where(
+                RollupBucket.bucket >= truncate(since, granularity))
+        if until is not None:
+            stmt = stmt.where(RollupBucket.bucket <= until)
+
+        result = await self.read_only_session.scalars(stmt)
+        return result.all()
+
+    async def compact(
+            self,
+            stream_id: int,
+            json_schema: dict[str, Any],
+            created_from: datetime,
+            created_to: datetime,
+    ) -> None:
+        """
+        Recompute rollups of all buckets overlapping creation time range,
+        hourly ones from propositions, coarser ones from finer ones.
+        Caller must serialize compactions of the same stream.
+        """
+
+        start = truncate(created_from, Granularity.HOUR)
+        end = next_bucket(truncate(created_to, Granularity.HOUR),
+                          Granularity.HOUR)
+        await self._delete(stream_id, Granularity.HOUR, start, end)
+
+        hour = func.date_trunc("hour", Proposition.created_at)
+        granularity = _granularity_literal(Granularity.HOUR)
+        selects = []
+        for path in numeric_paths(json_schema):
+            value = Proposition.json_object[tuple(path.split("."))]
+            selects.append(
+                select(literal(stream_id),
+                       granularity,
+                       literal(path),
+                       hour,
+                       func.count(),
+                       func.sum(value.as_float()),
+                       func.min(value.as_float()),
+                       func.max(value.as_float()))
+                .where(Proposition.stream_id == stream_id)
+                .where(Proposition.created_at >= start)
+                .where(Proposition.created_at < end)
+                .where(func.jsonb_typeof(value) == "number")
+                .group_by(hour)
+            )
+        if selects:
+            await self.orm_session.execute(
+                insert(RollupBucket)
+                .from_select(ROLLUP_COLUMNS, union_all(*selects))
+            )
+
+        await self._roll_up(stream_id, Granularity.HOUR, Granularity.DAY,
+                            created_from, created_to)
+        await self._roll_up(stream_id, Granularity.DAY, Granularity.MONTH,
+                            created_from, created_to)
+
+    async def _roll_up(
+            self,
+            stream_id: int,
+            source: Granularity,
+            target: Granularity,
+            created_from: datetime,
+            created_to: datetime,
+    ) -> None:
+        start = truncate(created_from, target)
+        end = next_bucket(truncate(created_to, target), target)
+        await self._delete(stream_id, target, start, end)
+
+        bucket = func.date_trunc(target.lower(), RollupBucket.bucket)
+        stmt = (select(RollupBucket.stream_id,
+                       _granularity_literal(target),
+                       RollupBucket.path,
+                       bucket,
+                       func.sum(RollupBucket.count),
+                       func.sum(RollupBucket.sum),
+                       func.min(RollupBucket.min),
+                       func.max(RollupBucket.max))
+                .where(RollupBucket.stream_id == stream_id)
+                .where(RollupBucket.granularity == source)
+                .where(RollupBucket.bucket >= start)
+                .where(RollupBucket.bucket < end)
+                .group_by(RollupBucket.stream_id, RollupBucket.path, bucket))
+        await self.orm_session.execute(
+            insert(RollupBucket).from_select(ROLLUP_COLUMNS, stmt)
+        )
+
+    async def _delete(
+            self,
+            stream_id: int,
+            granularity: Granularity,
+            start: datetime,
+            end: datetime,
+    ) -> None:
+        await self.orm_session.execute(
+            delete(RollupBucket)
+            .where(RollupBucket.stream_id == stream_id)
+            .where(RollupBucket.granularity == granularity)
+            .where(RollupBucket.bucket >= start)
+            .where(RollupBucket.bucket < end)
+        )
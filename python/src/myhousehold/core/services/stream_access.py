@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from myhousehold.core.models.stream import Stream
+from myhousehold.core.replicas import ReadOnlySession
+
+
+class StreamAccessMetrics:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.probes = 0
+        self.invalidations = 0
+
+    def snapshot(self) -> dict[str, float]:
+        return dict(vars(self))
+
+
+class StreamAccessIndex:
+    """
+    In-process cache of streams accessible to users: ids of streams created
+    by each user, loaded by a scan of its dedicated index and kept for
+    `ttl` seconds for at most `max_users` recently seen users, and ids of
+    public streams looked up so far, at most `max_public` recently seen.
+    Other streams are looked up by primary key, public ones are cached
+    then, so that no more than the streams in use is ever loaded.
+
+    Streams are neither deleted nor made private, so a cached id is always
+    accessible; streams created since loading (by other processes too) may
+    be missing though, which the lookup covers.
+    """
+
+    def __init__(self, ttl: float, max_users: int, max_public: int):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.max_public = max_public
+        self.metrics = StreamAccessMetrics()
+        # least recently used first
+        self._public: OrderedDict[int, None] = OrderedDict()
+        self._own: OrderedDict[int, tuple[float, frozenset[int]]] = (
+            OrderedDict())
+
+    async def is_accessible(
+            self,
+            session: ReadOnlySession,
+            user_id: int,
+            stream_id: int,
+    ) -> bool:
+        """ False means unknown rather than inaccessible """
+
+        is_accessible = (
+            self._is_public(stream_id)
+            or stream_id in await self._get_own_ids(session, user_id)
+        )
+        if is_accessible:
+            self.metrics.hits += 1
+            return True
+        self.metrics.misses += 1
+        return await self._probe(session, user_id, stream_id)
+
+    def invalidate(self, user_id: int) -> None:
+        """ Must be called when stream is created """
+
+        self.metrics.invalidations += 1
+        self._own.pop(user_id, None)
+
+    def _is_public(self, stream_id: int) -> bool:
+        if stream_id not in self._public:
+            return False
+        self._public.move_to_end(stream_id)
+        return True
+
+    async def _probe(
+            self,
+            session: ReadOnlySession,
+            user_id: int,
+            stream_id: int,
+    ) -> bool:
+        self.metrics.probes += 1
+        stmt = (select(Stream.is_private, Stream.created_by_user_id)
+                .where(Stream.id == stream_id))
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None:
+            return False
+        is_private, created_by_user_id = row
+        if not is_private:
+            self._public[stream_id] = None
+            if len(self._public) > self.max_public:
+                self._public.popitem(last=False)
+            return True
+        # created since own ids were loaded
+        return created_by_user_id == user_id
+
+    async def _get_own_ids(self, session: ReadOnlySession, user_id: int):
+        entry = self._own.get(user_id)
+        if entry is None or self._is_expired(entry[0]):
+            entry = await self._load(session, user_id)
+            self._own[user_id] = entry
+            if len(self._own) > self.max_users:
+                self._own.popitem(last=False)
+        self._own.move_to_end(user_id)
+        return entry[1]
+
+    async def _load(
+            self,
+            session: ReadOnlySession,
+            user_id: int,
+    ) -> tuple[float, frozenset[int]]:
+        # taken before reading, so that entry never outlives its data; set
+        #  loaded concurrently with invalidation may miss the new stream,
+        #  which only costs a lookup
+        loaded_at = time.monotonic()
+        self.metrics.loads += 1
+        ids = await session.scalars(
+            select(Stream.id).where(Stream.created_by_user_id == user_id))
+        return loaded_at, frozenset(ids)
+
+    def _is_expired(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at > self.ttl
@@ -1,14 +1,41 @@
-from collections.abc import Iterable
-from typing import Any, Literal
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, timedelta
+from typing import Any, Literal, NamedTuple
 
-from sqlalchemy import or_, select
+from sqlalchemy import (
+    Text,
+    bindparam,
+    cast,
+    exists,
+    func,
+    insert,
+    literal_column,
+    select,
+    true,
+    tuple_,
+    type_coerce,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import (
+    JSONB,
+    JSONPATH,
+    aggregate_order_by,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import aliased
 
+from myhousehold.core.archive import ArchivedProposition, ArchiveStore
+from myhousehold.core.exceptions import DomainValueError
 from myhousehold.core.models.intents.project import ProjectIntent
 from myhousehold.core.models.intents.record import RecordIntent
 from myhousehold.core.models.proposition import Proposition
+from myhousehold.core.models.proposition_chunk import PropositionChunk
 from myhousehold.core.models.stream import Stream
+from myhousehold.core.replicas import ReadOnlySession
+from myhousehold.core.services.aggregates import AggregatesService
+from myhousehold.core.services.stream_access import StreamAccessIndex
 from myhousehold.server.providers import AuthorizedUser
 
 
@@ -20,14 +47,66 @@ class StreamNotFoundError(StreamsServiceError):
     pass
 
 
+class VersionConflictError(StreamsServiceError):
+    pass
+
+
+class PropositionArchivedError(StreamsServiceError):
+    pass
+
+
+class PropositionDraft(NamedTuple):
+    json_object: dict[str, Any]
+    comment: str | None
+
+
+class PropositionJSON(NamedTuple):
+    created_at: datetime
+    id: int
+    # JSON document of `StreamPropositionDTO` shape
+    json: str
+
+
+# `Stream.expired_before` of streams which propositions do not expire
+_NEVER_EXPIRED = literal_column("'-infinity'::timestamp")
+
+
+def merge_archived(
+        propositions: list[PropositionJSON],
+        archived: list[ArchivedProposition],
+        limit: int,
+) -> list[PropositionJSON]:
+    """
+    Page of archived propositions followed by propositions of the table,
+    but ones archived since the table was read
+    """
+
+    if not archived:
+        return propositions[:limit]
+    last = archived[-1].keyset
+    return ([PropositionJSON(i.created_at, i.id, i.json_document())
+             for i in archived]
+            + [i for i in propositions if (i.created_at, i.id) > last])[:limit]
+
+
 class StreamsService:
     def __init__(
             self,
             orm_session: AsyncSession,
+            read_only_session: ReadOnlySession,
             authorized_user: AuthorizedUser,
+            aggregates_service: AggregatesService,
+            stream_access: StreamAccessIndex,
+            archive_store: ArchiveStore,
     ):
         self.orm_session = orm_session
+        # replica-routed session for listings, which may lag behind
+        self.read_only_session = read_only_session
         self.authorized_user = authorized_user
+        self.aggregates_service = aggregates_service
+        # None disables shortcuts of lookups of single streams
+        self.stream_access = stream_access
+        self.archive_store = archive_store
 
     async def create_stream(
             self,
@@ -35,7 +114,12 @@ class StreamsService:
             json_schema: dict[str, Any],
             is_private: bool,
             is_record_intent: Literal[True],
+            ttl: timedelta | None = None,
     ) -> Stream:
+        """
+        :param ttl: age after which propositions of the stream expire
+        """
+
         assert is_record_intent
         stream = Stream(
             name=name,
@@ -43,44 +127,182 @@ class StreamsService:
             created_by_user_id=self.authorized_user.id,
             is_private=is_private,
             record_intent=RecordIntent(
-                ttl=None,
+                ttl=ttl,
                 errata_allowed=True,
             ),
         )
         self.orm_session.add(stream)
         await self.orm_session.flush()
+        if self.stream_access is not None:
+            self.stream_access.invalidate(self.authorized_user.id)
 
         return stream
 
-    def _accessible_streams_stmt(self):
-        stmt = (select(Stream)
-                .where(
-                    or_(Stream.created_by_user_id == self.authorized_user.id,
-                        Stream.is_private.is_(False)))
-                )
-        return stmt
+    def _accessible_streams(self):
+        """
+        Accessible streams as an alias of `Stream`: union of streams created
+        by user and of public ones, each scanned by its dedicated index.
+        OR of the two predicates is planned poorly once public streams pile
+        up. Conditions on the alias are pushed down into both branches.
+        """
+
+        user_id = self.authorized_user.id
+        accessible = union_all(
+            select(Stream)
+            .where(Stream.created_by_user_id == user_id),
+            select(Stream)
+            .where(Stream.is_private.is_(False))
+            .where(Stream.created_by_user_id != user_id),
+        ).subquery("accessible_stream")
+        return aliased(Stream, accessible)
+
+    async def _is_accessible(self, stream_id: int) -> bool:
+        """
+        Whether stream is known to be accessible, without a database
+        round trip once it is cached as accessible to user. False means
+        access must be checked by the query itself.
+        """
+
+        if self.stream_access is None:
+            return False
+        return await self.stream_access.is_accessible(
+            self.read_only_session,
+            self.authorized_user.id,
+            stream_id,
+        )
 
-    async def get_streams(
+    async def get_streams_catalog_revision(self) -> tuple:
+        """
+        Cheap version of the catalog, which changes whenever accessible
+        streams or their propositions do, expiry included.
+
+        :return: count of accessible streams, sum of their revisions and
+         sum of expiry cutoffs of ones which propositions expire
+        """
+
+        stream = self._accessible_streams()
+        cutoff = Stream.expired_before(stream.id)
+        stmt = select(func.count(),
+                      func.coalesce(func.sum(stream.revision), 0),
+                      func.coalesce(
+                          func.sum(func.extract("epoch", cutoff))
+                          .filter(cutoff > _NEVER_EXPIRED),
+                          0,
+                      ))
+        result = await self.read_only_session.execute(stmt)
+        return tuple(result.one())
+
+    async def get_streams_catalog_json(
+            self,
+            json_schema_contains: dict[str, Any] | None = None,
+    ) -> str:
+        """
+        Accessible streams with aggregates of their propositions, as JSON
+        array built by database, so that no objects are constructed. Does
+        not load propositions themselves.
+
+        :param json_schema_contains: only streams which JSON schema
+         contains this document (`@>`, served by GIN index)
+        """
+
+        catalog = self._streams_catalog_stmt(json_schema_contains).subquery(
+            "catalog")
+        aggregated = func.json_agg(
+            aggregate_order_by(catalog.table_valued(), catalog.c.id))
+        stmt = select(cast(
+            func.coalesce(aggregated, literal_column("'[]'::json")),
+            Text,
+        ))
+        return await self.read_only_session.scalar(stmt)
+
+    def _streams_catalog_stmt(
             self,
-    ) -> Iterable[Stream]:
-        stmt = self._accessible_streams_stmt()
-        return await self.orm_session.scalars(stmt)
+            json_schema_contains: dict[str, Any] | None = None,
+    ):
+        stream = self._accessible_streams()
+        stats = (select(func.count(Proposition.id)
+                        .label("propositions_count"),
+                        func.max(Proposition.created_at)
+                        .label("last_proposition_created_at"),
+                        func.max(Proposition.updated_at)
+                        .label("last_proposition_updated_at"))
+                 .where(Proposition.stream_id == stream.id)
+                 .where(Proposition.created_at
+                        >= Stream.expired_before(stream.id))
+                 .lateral("stats"))
+        archived = (select(func.sum(PropositionChunk.propositions_count)
+                           .label("propositions_count"),
+                           func.max(PropositionChunk.last_created_at)
+                           .label("last_created_at"),
+                           func.max(PropositionChunk.last_updated_at)
+                           .label("last_updated_at"))
+                    .where(PropositionChunk.stream_id == stream.id)
+                    .lateral("archived"))
+        stmt = (select(stream.id,
+                       stream.name,
+                       stream.json_schema,
+                       stream.is_private,
+                       (stats.c.propositions_count
+                        + func.coalesce(archived.c.propositions_count, 0))
+                       .label("propositions_count"),
+                       # archived propositions precede ones in the table
+                       func.coalesce(stats.c.last_proposition_created_at,
+                                     archived.c.last_created_at)
+                       .label("last_proposition_created_at"),
+                       func.greatest(stats.c.last_proposition_updated_at,
+                                     archived.c.last_updated_at)
+                       .label("last_proposition_updated_at"))
+                .select_from(stream)
+                .outerjoin(stats, true())
+                .outerjoin(archived, true())
+                .order_by(stream.id))
+        if json_schema_contains is not None:
+            stmt = stmt.where(
+                stream.json_schema.contains(json_schema_contains))
+        return stmt
 
     async def get_stream_with(
             self,
             id_: int | None = None,
             name: str | None = None,
     ) -> Stream | None:
-        stmt = self._accessible_streams_stmt()
+        stream = Stream  # primary key lookup
+        if id_ is None or not await self._is_accessible(id_):
+            stream = self._accessible_streams()
+        stmt = select(stream)
 
         if id_ is not None:
-            stmt = stmt.where(Stream.id == id_)
+            stmt = stmt.where(stream.id == id_)
         if name is not None:
-            stmt = stmt.where(Stream.name == name)
+            stmt = stmt.where(stream.name == name)
 
         stream = await self.orm_session.scalar(stmt)
         return stream
 
+    async def get_stream_revision(
+            self,
+            stream_id: int,
+    ) -> tuple[int, str] | None:
+        """
+        Version of propositions of accessible stream, read through the
+        session listings are read through, so that it does not run ahead
+        of them.
+
+        :return: revision of the stream and expiry cutoff of its
+         propositions, None if there is no such accessible stream
+        """
+
+        stream = Stream  # primary key lookup
+        if not await self._is_accessible(stream_id):
+            stream = self._accessible_streams()
+        stmt = (select(stream.revision,
+                       # `-infinity` has no Python counterpart
+                       cast(Stream.expired_before(stream.id), Text))
+                .where(stream.id == stream_id))
+        result = await self.read_only_session.execute(stmt)
+        row = result.one_or_none()
+        return None if row is None else tuple(row)
+
     async def create_proposition(
             self,
             json_object: dict[str, Any],
@@ -96,55 +318,341 @@ class StreamsService:
         self.orm_session.add(proposition)
 
         await self.orm_session.flush()
+        await self.aggregates_service.on_created(stream, [proposition])
+        Stream.mark_changed(self.orm_session, stream.id)
 
         return proposition
 
+    async def create_propositions(
+            self,
+            drafts: Sequence[PropositionDraft],
+            stream: Stream,
+    ) -> list[Proposition | DomainValueError]:
+        """
+        Batch counterpart of `create_proposition`. Drafts that do not match
+        the stream schema are skipped, the rest are written with a single
+        multi-row INSERT.
+
+        :return: created proposition or validation error per draft, in
+         order of drafts
+        """
+
+        results: list[Proposition | DomainValueError | None] = []
+        values = []
+        for draft in drafts:
+            try:
+                Proposition.check_json_object(stream, draft.json_object)
+            except DomainValueError as e:
+                results.append(e)
+                continue
+            results.append(None)
+            values.append({
+                "json_object": draft.json_object,
+                "comment": draft.comment,
+                "stream_id": stream.id,
+                "created_by_user_id": self.authorized_user.id,
+            })
+
+        if values:
+            stmt = (insert(Proposition)
+                    .returning(Proposition, sort_by_parameter_order=True))
+            created = list(await self.orm_session.scalars(stmt, values))
+            await self.aggregates_service.on_created(stream, created)
+            Stream.mark_changed(self.orm_session, stream.id)
+            created = iter(created)
+            results = [next(created) if i is None else i for i in results]
+
+        return results
+
     async def put_stream_proposition(
             self,
             stream_id: int,
             proposition_id: int,
             json_object: dict[str, Any],
             comment: str | None,
+            expected_version: int | None = None,
     ) -> Proposition:
+        """
+        Write takes no row locks: existing proposition is updated only if
+        its version is still the one read (or `expected_version`), so that
+        concurrent writers of a stream do not wait for each other and the
+        losing one gets a conflict instead of overwriting.
+
+        :param expected_version: version existing proposition must be at,
+         None writes over whatever version it is at or creates it
+
+        :raise StreamNotFoundError:
+        :raise VersionConflictError:
+        :raise PropositionArchivedError: proposition was moved to archive,
+         which is read-only
+        """
+
+        stream = await self.get_stream_with(id_=stream_id)
+        if stream is None:
+            raise StreamNotFoundError
+
         stmt = (select(Proposition)
                 .where(Proposition.stream_id == stream_id)
-                .where(Proposition.id == proposition_id)
-                .with_for_update()
-                .options(joinedload(Proposition.stream)))
-        proposition = await self.orm_session.scalar(stmt)
-
-        if not proposition:
-            stmt = self._accessible_streams_stmt()
-            stmt = stmt.with_for_update()
-            stream = await self.orm_session.scalar(stmt)
-            if stream is None:
-                raise StreamNotFoundError
+                .where(Proposition.id == proposition_id))
+        current = await self.orm_session.scalar(stmt)
+
+        if current is None:
+            if await self._is_archived(stream_id, proposition_id):
+                raise PropositionArchivedError
+            if expected_version is not None:
+                raise VersionConflictError
             proposition = Proposition(
-                json_object=json_object,
                 comment=comment,
-                asserted_by_user=self.authorized_user,
                 stream=stream,
+                asserted_by_user=self.authorized_user,
             )
+            proposition.json_object = json_object  # validation needs stream
             self.orm_session.add(proposition)
+            await self.orm_session.flush()
+            await self.aggregates_service.on_created(stream, [proposition])
         else:
-            proposition.json_object = json_object
-            proposition.comment = comment
+            version = current.version
+            if expected_version is not None and expected_version != version:
+                raise VersionConflictError
+            old_json_object = current.json_object
+            Proposition.check_json_object(stream, json_object)
+
+            stmt = (update(Proposition)
+                    .where(Proposition.id == proposition_id)
+                    .where(Proposition.created_at == current.created_at)
+                    .where(Proposition.version == version)
+                    .values(json_object=json_object,
+                            comment=comment,
+                            version=Proposition.version + 1)
+                    .returning(Proposition)
+                    .execution_options(populate_existing=True))
+            proposition = await self.orm_session.scalar(stmt)
+            if proposition is None:  # written since it was read
+                raise VersionConflictError
+            await self.aggregates_service.on_updated(
+                stream, proposition, old_json_object)
+
+        Stream.mark_changed(self.orm_session, stream_id)
 
-        await self.orm_session.flush()
         return proposition
 
-    async def get_stream_propositions(
+    async def _is_archived(self, stream_id: int, proposition_id: int) -> bool:
+        stmt = select(exists().where(
+            (PropositionChunk.stream_id == stream_id)
+            & PropositionChunk.ids.contains([proposition_id])))
+        return await self.orm_session.scalar(stmt)
+
+    def _stream_propositions_stmt(
+            self,
+            stream_id: int,
+            after: tuple[datetime, int] | None = None,
+            since: datetime | None = None,
+            json_contains: dict[str, Any] | None = None,
+            json_path_exists: str | None = None,
+    ):
+        stmt = (select(Proposition)
+                .where(Proposition.stream_id == stream_id)
+                .where(Proposition.stream_id.in_(
+                    select(self._accessible_streams().id)))
+                # until they are purged
+                .where(Proposition.created_at
+                       >= Stream.expired_before(stream_id))
+                .order_by(Proposition.created_at, Proposition.id))
+        # partitions are pruned by plain bounds of `created_at`, not by
+        #  row comparison
+        if after is not None:
+            stmt = stmt.where(Proposition.created_at >= after[0])
+            stmt = stmt.where(tuple_(Proposition.created_at, Proposition.id)
+                              > tuple_(*after))
+        if since is not None:
+            stmt = stmt.where(Proposition.created_at >= since)
+        # both operators are supported by `jsonb_path_ops` GIN index
+        if json_contains is not None:
+            stmt = stmt.where(Proposition.json_object.contains(json_contains))
+        if json_path_exists is not None:
+            stmt = stmt.where(Proposition.json_object.path_exists(
+                cast(json_path_exists, JSONPATH)))
+        return stmt
+
+    async def _read_archived(
+            self,
+            stream_id: int,
+            after: tuple[datetime, int] | None = None,
+            since: datetime | None = None,
+            json_contains: dict[str, Any] | None = None,
+            json_path_exists: str | None = None,
+            limit: int | None = None,
+    ) -> AsyncIterator[list[ArchivedProposition]]:
+        """
+        Archived propositions of stream filtered as `_stream_propositions_stmt`
+        filters ones of the table, a list per chunk file, at most `limit` in
+        total. They precede all propositions of the table.
+
+        Must be read after the table: propositions archived in between are
+        then read twice, which callers skip by keyset, rather than missed.
+        """
+
+        keyset = tuple_(PropositionChunk.last_created_at,
+                        PropositionChunk.last_id)
+        stmt = (select(PropositionChunk.key)
+                .where(PropositionChunk.stream_id == stream_id)
+                .where(PropositionChunk.stream_id.in_(
+                    select(self._accessible_streams().id)))
+                .order_by(*keyset.clauses))
+        if after is not None:
+            stmt = stmt.where(keyset > tuple_(*after))
+        if since is not None:
+            stmt = stmt.where(PropositionChunk.last_created_at >= since)
+        keys = list(await self.read_only_session.scalars(stmt))
+
+        is_filtered = json_contains is not None or json_path_exists is not None
+        for key in keys:
+            if limit is not None and limit <= 0:
+                return
+            propositions = await asyncio.to_thread(
+                self.archive_store.read,
+                key,
+                after,
+                since,
+                None if is_filtered else limit,
+            )
+            if is_filtered:
+                propositions = await self._filter_archived(
+                    propositions, json_contains, json_path_exists)
+            if limit is not None:
+                propositions = propositions[:limit]
+                limit -= len(propositions)
+            yield propositions
+
+    async def _read_archived_page(
+            self,
+            stream_id: int,
+            limit: int,
+            after: tuple[datetime, int] | None = None,
+            since: datetime | None = None,
+            json_contains: dict[str, Any] | None = None,
+            json_path_exists: str | None = None,
+    ) -> list[ArchivedProposition]:
+        page = []
+        async for propositions in self._read_archived(
+                stream_id,
+                after,
+                since,
+                json_contains=json_contains,
+                json_path_exists=json_path_exists,
+                limit=limit):
+            page.extend(propositions)
+        return page
+
+    async def _filter_archived(
+            self,
+            propositions: list[ArchivedProposition],
+            json_contains: dict[str, Any] | None,
+            json_path_exists: str | None,
+    ) -> list[ArchivedProposition]:
+        """ Operators are evaluated by database, as for the table """
+
+        if not propositions:
+            return propositions
+        elements = func.jsonb_array_elements(bindparam(
+            "json_objects",
+            [i.json_object for i in propositions],
+            type_=JSONB,
+        )).table_valued("value", with_ordinality="ordinality")
+        json_object = type_coerce(elements.c.value, JSONB)
+        stmt = select(elements.c.ordinality).order_by(elements.c.ordinality)
+        if json_contains is not None:
+            stmt = stmt.where(json_object.contains(json_contains))
+        if json_path_exists is not None:
+            stmt = stmt.where(json_object.path_exists(
+                cast(json_path_exists, JSONPATH)))
+        ordinalities = await self.read_only_session.scalars(stmt)
+        return [propositions[i - 1] for i in ordinalities]
+
+    async def get_stream_propositions_json(
+            self,
+            stream_id: int,
+            limit: int,
+            after: tuple[datetime, int] | None = None,
+            since: datetime | None = None,
+            json_contains: dict[str, Any] | None = None,
+            json_path_exists: str | None = None,
+    ) -> list[PropositionJSON]:
+        """
+        Page of stream propositions in `(created_at, id)` order, archived
+        ones (see `PropositionArchiver` of worker) included, serialized by
+        database along with their keyset, so that no ORM objects are
+        constructed.
+
+        :param after: keyset of the last proposition of previous page
+        :param since: only propositions created at or after it, partitions
+         of earlier months and earlier chunk files are not read
+        :param json_contains: only propositions which JSON object contains
+         this document (`@>`)
+        :param json_path_exists: only propositions for which this JSON path
+         yields any item (`@?`)
+        """
+
+        stmt = (self._stream_propositions_stmt(
+                    stream_id,
+                    after,
+                    since,
+                    json_contains=json_contains,
+                    json_path_exists=json_path_exists)
+                .with_only_columns(Proposition.created_at,
+                                   Proposition.id,
+                                   Proposition.json_document())
+                .limit(limit))
+        result = await self.read_only_session.execute(stmt)
+        propositions = [PropositionJSON(*i) for i in result]
+
+        archived = await self._read_archived_page(
+            stream_id,
+            limit,
+            after,
+            since,
+            json_contains=json_contains,
+            json_path_exists=json_path_exists)
+        return merge_archived(propositions, archived, limit)
+
+    async def stream_stream_propositions_json(
             self,
             stream_id: int,
-    ) -> Iterable[Proposition]:
-        # note: not used, but I want to test it
-        stmt = select(Proposition)
-        accessible_propositions = self._accessible_streams_stmt().subquery()
-        stmt = (stmt
-                .join_from(
-                    accessible_propositions,
-                    onclause=Proposition.stream_id
-                             == accessible_propositions.c.id)
-                .where(accessible_propositions.c.id == stream_id))
-        scalars = await self.orm_session.scalars(stmt)
-        return scalars.unique(lambda x: x.id)
+            after: tuple[datetime, int] | None = None,
+            since: datetime | None = None,
+            json_contains: dict[str, Any] | None = None,
+            json_path_exists: str | None = None,
+            yield_per: int = 500,
+    ) -> AsyncIterator[str]:
+        """
+        Iterate over JSON documents of all stream propositions, built by
+        database, through server-side cursor fetching `yield_per` rows at
+        once. Filters are the same as of `get_stream_propositions_json`.
+        """
+
+        stmt = (self._stream_propositions_stmt(
+                    stream_id,
+                    after,
+                    since,
+                    json_contains=json_contains,
+                    json_path_exists=json_path_exists)
+                .with_only_columns(Proposition.created_at,
+                                   Proposition.id,
+                                   Proposition.json_document())
+                .execution_options(yield_per=yield_per))
+        result = await self.read_only_session.stream(stmt)
+
+        last = None
+        async for archived in self._read_archived(
+                stream_id,
+                after,
+                since,
+                json_contains=json_contains,
+                json_path_exists=json_path_exists):
+            for proposition in archived:
+                yield proposition.json_document()
+            if archived:
+                last = archived[-1].keyset
+        async for created_at, id_, document in result:
+            if last is None or (created_at, id_) > last:
+                yield document
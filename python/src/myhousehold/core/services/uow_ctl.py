@@ -1,5 +1,10 @@
 from typing import Protocol
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myhousehold.core.models import Stream
+from myhousehold.core.replicas import ConsistencyKey, ReplicaRouter
+
 
 class UoWCtl(Protocol):
     async def commit(self):
@@ -7,3 +12,29 @@ class UoWCtl(Protocol):
 
     async def rollback(self):
         raise NotImplementedError
+
+
+class PrimaryUoWCtl:
+    """
+    Commits primary session, bumping revisions of streams marked changed
+    last (see `Stream.mark_changed`), and makes further reads of the
+    consistency key observe the commit, in any process.
+    """
+
+    def __init__(
+            self,
+            orm_session: AsyncSession,
+            replica_router: ReplicaRouter,
+            key: ConsistencyKey,
+    ):
+        self.orm_session = orm_session
+        self.replica_router = replica_router
+        self.key = key
+
+    async def commit(self):
+        await Stream.bump_marked_revisions(self.orm_session)
+        await self.replica_router.record_write(self.orm_session, self.key)
+        await self.orm_session.commit()
+
+    async def rollback(self):
+        await self.orm_session.rollback()
@@ -0,0 +1,168 @@
+import asyncio
+import contextlib
+import logging
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from jsonschema.exceptions import SchemaError
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from myhousehold.core.models import Proposition, Stream, User
+from myhousehold.core.replicas import ReadOnlySession, ReplicaRouter
+from myhousehold.core.services.access import AccessService, ErrorUnauthorized
+from myhousehold.core.services.hashing import PasswordHashingExecutor
+from myhousehold.core.services.stream_access import StreamAccessIndex
+from myhousehold.core.services.streams import StreamsService
+from myhousehold.core.validators import validator_registry
+
+logger = logging.getLogger(__name__)
+
+RETRY_INTERVAL = 1
+
+
+class WarmUp:
+    """
+    Startup phase, after which first requests are served as fast as the
+    following ones:
+
+    - pools are filled with `connections` connections
+    - hot statements of services are compiled and cached by SQLAlchemy on
+      every engine, by executing them with parameters matching no rows;
+      ids of public streams get cached on the way
+    - password hashing workers are started by a dummy authentication
+    - validators of streams with propositions created within
+      `validators_window` are compiled, at most `validators_limit`
+
+    Server is reported ready once it is done. Failed warm-up is retried,
+    e.g. until database is up.
+    """
+
+    def __init__(
+            self,
+            replica_router: ReplicaRouter,
+            hasher: PasswordHashingExecutor,
+            stream_access: StreamAccessIndex,
+            connections: int,
+            validators_window: timedelta,
+            validators_limit: int,
+    ):
+        self.replica_router = replica_router
+        self.hasher = hasher
+        self.stream_access = stream_access
+        self.connections = connections
+        self.validators_window = validators_window
+        self.validators_limit = validators_limit
+
+        # seconds per step
+        self.timings: dict[str, float] = {}
+        self.is_ready = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._warm_up()
+            except Exception as e:
+                logger.warning("Warm-up failed, retrying: %s", e)
+                await asyncio.sleep(RETRY_INTERVAL)
+                continue
+            self.is_ready = True
+            logger.info("Warmed up: %s", ", ".join(
+                f"{name} {seconds:.3f}s"
+                for name, seconds in self.timings.items()))
+            return
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+    async def _warm_up(self) -> None:
+        self.timings = {}
+        steps = {
+            "connections": self._open_connections,
+            "statements": self._compile_statements,
+            "hashing": self._authenticate,
+            "validators": self._compile_validators,
+        }
+        for name, step in steps.items():
+            started_at = time.perf_counter()
+            await step()
+            self.timings[name] = time.perf_counter() - started_at
+
+    def _get_engines(self) -> list[AsyncEngine]:
+        return [self.replica_router.primary, *self.replica_router.replicas]
+
+    async def _open_connections(self) -> None:
+        # held at once, so that distinct connections are opened
+        async with contextlib.AsyncExitStack() as stack:
+            await asyncio.gather(*(
+                stack.enter_async_context(engine.connect())
+                for engine in self._get_engines()
+                for _ in range(self.connections)
+            ))
+
+    async def _compile_statements(self) -> None:
+        # compiled statements are cached per engine
+        for engine in self._get_engines():
+            async with AsyncSession(engine) as session:
+                await self._execute_statements(session)
+
+    async def _execute_statements(self, session: AsyncSession) -> None:
+        access_service = AccessService(orm_session=session, hasher=None)
+        with contextlib.suppress(ErrorUnauthorized):
+            await access_service.lookup_login_session(uuid4(), "")
+
+        streams_service = StreamsService(
+            orm_session=session,
+            read_only_session=ReadOnlySession(session),
+            authorized_user=User(id=0),
+            aggregates_service=None,
+            stream_access=self.stream_access,
+            archive_store=None,
+        )
+        await streams_service.get_streams_catalog_revision()
+        await streams_service.get_streams_catalog_json()
+        await streams_service.get_stream_revision(0)
+        await streams_service.get_stream_with(id_=0)
+        await streams_service.get_stream_propositions_json(
+            stream_id=0,
+            limit=1,
+        )
+
+    async def _authenticate(self) -> None:
+        async with AsyncSession(self.replica_router.primary) as session:
+            access_service = AccessService(
+                orm_session=session,
+                hasher=self.hasher,
+            )
+            with contextlib.suppress(ErrorUnauthorized):
+                await access_service.login(
+                    username=f"warm-up-{uuid4()}",
+                    password="",
+                    user_agent=None,
+                )
+
+    async def _compile_validators(self) -> None:
+        since = datetime.now() - self.validators_window
+        is_active = exists(
+            select(Proposition.id)
+            .where(Proposition.stream_id == Stream.id)
+            .where(Proposition.created_at >= since)
+        )
+        stmt = (select(Stream.id, Stream.json_schema)
+                .where(is_active)
+                .limit(self.validators_limit))
+        async with self.replica_router.primary.connect() as connection:
+            streams = (await connection.execute(stmt)).all()
+
+        for stream_id, json_schema in streams:
+            # schemas are checked on write, a broken one is not worth a retry
+            with contextlib.suppress(SchemaError):
+                validator_registry.get(stream_id, json_schema)
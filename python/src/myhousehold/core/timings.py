@@ -0,0 +1,86 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import Engine, event
+
+
+class RequestTimings:
+    """
+    Time spent by current request in its phases, in seconds. Database time
+    is excluded from other phases, so that phases do not overlap.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.endpoint_returned_at: float | None = None
+        self.phases: dict[str, float] = {}
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        self.db_rows = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "current_timings",
+    default=None,
+)
+
+
+@contextmanager
+def measure(phase: str) -> Iterator[None]:
+    """ Account enclosed code to phase of current request, if any """
+
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    db_seconds = timings.db_seconds
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started_at
+        timings.add(phase, elapsed - (timings.db_seconds - db_seconds))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if current_timings.get() is not None:
+        conn.info.setdefault("statement_started_at", []).append(
+            time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    timings = current_timings.get()
+    started_at = conn.info.get("statement_started_at")
+    if timings is None or not started_at:
+        return
+
+    timings.db_seconds += time.perf_counter() - started_at.pop()
+    timings.db_statements += 1
+    if cursor.rowcount > 0:
+        timings.db_rows += cursor.rowcount
+
+
+def _handle_error(context):
+    started_at = (context.connection is not None
+                  and context.connection.info.get("statement_started_at"))
+    if started_at:
+        started_at.pop()
+
+
+def instrument_engines() -> None:
+    """
+    Account statements of all engines to current request. Async engines
+    run their sync counterparts in the context of the awaiting task.
+    """
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
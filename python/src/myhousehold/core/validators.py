@@ -0,0 +1,86 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import jsonschema
+from jsonschema.protocols import Validator
+
+SchemaFingerprint = str
+
+
+def fingerprint_json_schema(json_schema: dict[str, Any]) -> SchemaFingerprint:
+    canonical = json.dumps(
+        json_schema,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class ValidatorRegistry:
+    """
+    LRU cache of ready-to-use JSON schema validators of streams.
+
+    `jsonschema.validate` checks the schema and builds a new validator on
+    every call. Registry does it once per (stream id, schema fingerprint),
+    so subsequent validations only walk the instance.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._validators: OrderedDict[
+            tuple[int | None, SchemaFingerprint], Validator,
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+            self,
+            stream_id: int | None,
+            json_schema: dict[str, Any],
+    ) -> Validator:
+        """
+        :raise jsonschema.exceptions.SchemaError:
+        """
+
+        key = (stream_id, fingerprint_json_schema(json_schema))
+
+        with self._lock:
+            validator = self._validators.get(key)
+            if validator is not None:
+                self._validators.move_to_end(key)
+                return validator
+
+        validator = self.compile(json_schema)
+
+        with self._lock:
+            self._validators[key] = validator
+            self._validators.move_to_end(key)
+            while len(self._validators) > self.maxsize:
+                self._validators.popitem(last=False)
+
+        return validator
+
+    def invalidate(self, stream_id: int | None) -> None:
+        with self._lock:
+            stale = [i for i in self._validators if i[0] == stream_id]
+            for key in stale:
+                del self._validators[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._validators.clear()
+
+    def __len__(self) -> int:
+        return len(self._validators)
+
+    @staticmethod
+    def compile(json_schema: dict[str, Any]) -> Validator:
+        cls = jsonschema.validators.validator_for(json_schema)
+        cls.check_schema(json_schema)
+        return cls(json_schema)
+
+
+validator_registry = ValidatorRegistry()
@@ -20,12 +20,36 @@ def make_create_stream_proposition():
         url=_base_url + "/streams/{stream_id}/propositions",
     )
 
+def make_create_stream_propositions_batch():
+    return PatchedRequest(
+        method="POST",
+        url=_base_url + "/streams/{stream_id}/propositions/batch",
+    )
+
 def make_get_stream_propositions():
     return PatchedRequest(
         method="GET",
         url=_base_url + "/streams/{stream_id}/propositions",
     )
 
+def make_put_stream_proposition():
+    return PatchedRequest(
+        method="PUT",
+        url=_base_url + "/streams/{stream_id}/propositions/{proposition_id}",
+    )
+
+def make_get_stream_events():
+    return PatchedRequest(
+        method="GET",
+        url=_base_url + "/streams/{stream_id}/events",
+    )
+
+def make_get_stream_rollups():
+    return PatchedRequest(
+        method="GET",
+        url=_base_url + "/streams/{stream_id}/rollups",
+    )
+
 def make_register():
     return PatchedRequest(
         method="POST",
@@ -37,3 +61,9 @@ def make_login():
         method="POST",
         url=_base_url + "/login",
     )
+
+def make_get_metrics():
+    return PatchedRequest(
+        method="GET",
+        url=_base_url + "/metrics",
+    )
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from myhousehold.core.archive import (
+    ArchivedProposition,
+    ArchiveStore,
+    encode_chunk,
+)
+from myhousehold.core.services.streams import PropositionJSON, merge_archived
+
+
+def make_propositions(count: int) -> list[ArchivedProposition]:
+    started_at = datetime(2026, 1, 1)
+    propositions = [
+        ArchivedProposition(
+            # ids are not in creation order, as of concurrent writers
+            id=i ^ 1,
+            # pairs created at the same time are ordered by id
+            created_at=started_at + timedelta(seconds=i // 2),
+            updated_at=None if i % 3 else started_at + timedelta(days=1),
+            version=1 + i % 2,
+            created_by_user_id=1,
+            comment=None if i % 2 else f"comment {i}",
+            json_object={"a": i, "nested": {"b": [i, None]}},
+        )
+        for i in range(count)
+    ]
+    return sorted(propositions, key=lambda i: i.keyset)
+
+
+def test_chunk_round_trip(
+        tmp_path,
+):
+    propositions = make_propositions(25)
+    store = ArchiveStore(directory=tmp_path)
+    store.write("1/chunk", encode_chunk(propositions, block_size=4))
+
+    assert store.read("1/chunk") == propositions
+
+    after = propositions[9].keyset
+    assert store.read("1/chunk", after=after) == propositions[10:]
+    assert store.read("1/chunk", after=after, limit=3) == propositions[10:13]
+
+    since = propositions[16].created_at
+    assert store.read("1/chunk", since=since) == [
+        i for i in propositions if i.created_at >= since]
+
+    assert store.read("1/chunk", after=propositions[-1].keyset) == []
+
+
+def test_merge_archived():
+    propositions = make_propositions(20)
+    table = [PropositionJSON(i.created_at, i.id, i.json_document())
+             for i in propositions]
+
+    # first 8 archived after the table was read, next 4 before
+    archived = propositions[:12]
+    merged = merge_archived(table[8:], archived, limit=100)
+    assert merged == table
+
+    merged = merge_archived(table[8:], archived, limit=10)
+    assert merged == table[:10]
+
+    # nothing archived
+    assert merge_archived(table, [], limit=5) == table[:5]
+
+    # pages of a listing, each of archive read after the table
+    pages = []
+    after = None
+    while True:
+        page_archived = [i for i in archived
+                         if after is None or i.keyset > after][:5]
+        page_table = [i for i in table[12:]
+                      if after is None or (i.created_at, i.id) > after][:5]
+        page = merge_archived(page_table, page_archived, limit=5)
+        if not page:
+            break
+        pages.extend(page)
+        after = page[-1].created_at, page[-1].id
+    assert pages == table
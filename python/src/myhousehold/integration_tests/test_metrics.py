@@ -0,0 +1,21 @@
+from . import api_templates
+
+
+def test_metrics(
+        authed_client,
+):
+    req = api_templates.make_get_streams()
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+
+    req = api_templates.make_get_metrics()
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    assert r.headers["Content-Type"].startswith("text/plain")
+    assert ('myhousehold_http_request_duration_seconds_count'
+            '{route="/streams",method="GET",status="200"}') in r.text
+    assert ('myhousehold_http_request_phase_duration_seconds_count'
+            '{route="/streams",method="GET",phase="auth"}') in r.text
+    assert ('myhousehold_http_db_statements_total'
+            '{route="/streams",method="GET"}') in r.text
+    assert "myhousehold_db_pool_checkouts" in r.text
@@ -0,0 +1,49 @@
+import pytest
+
+from . import api_templates
+
+# statements per request of read endpoints, including login session lookup
+MAX_QUERIES = 4
+
+
+def test_query_budget(
+        authed_client,
+):
+    req = api_templates.make_create_stream()
+    req.json = {
+        "name": "test",
+        "json_schema": {"type": "object"},
+        "is_private": True,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_stream_id = r.json()["id"]
+
+    req = api_templates.make_create_stream_propositions_batch()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.json = [
+        {"json_object": {"a": i}, "comment": None}
+        for i in range(10)
+    ]
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+
+    req = api_templates.make_get_streams()
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    if "X-Query-Count" not in r.headers:
+        pytest.skip("query budget is not enabled")
+    assert int(r.headers["X-Query-Count"]) <= MAX_QUERIES
+
+    # statements must not grow with number of propositions
+    req = api_templates.make_get_stream_propositions()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    # a page, as unbounded listing is streamed past the header
+    req.params = {"limit": 100}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    assert int(r.headers["X-Query-Count"]) <= MAX_QUERIES
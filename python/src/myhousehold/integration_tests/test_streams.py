@@ -1,3 +1,6 @@
+import json
+import time
+
 from deepdiff import DeepDiff
 from pydantic import BaseModel
 
@@ -71,3 +74,384 @@ def test_streams(
     assert r.status_code == 401
     r = authed_client.prepsend(req)
     assert r.status_code == 200
+
+
+def test_streams_batch(
+        client,
+        authed_client,
+):
+    class DemoSchema(BaseModel):
+        a: int
+
+    req = api_templates.make_create_stream()
+    req.json = {
+        "name": "test-batch",
+        "json_schema": DemoSchema.model_json_schema(),
+        "is_private": True,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_stream_id = r.json()["id"]
+
+    # json array
+    req = api_templates.make_create_stream_propositions_batch()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.json = [
+        {"json_object": {"a": 1}, "comment": None},
+        {"json_object": {"a": "value-with-invalid-type"}, "comment": None},
+        {"comment": "item without json_object"},
+        {"json_object": {"a": 2}, "comment": "second"},
+    ]
+    r = client.prepsend(req)
+    assert r.status_code == 401
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    r_json = r.json()
+    assert [i["index"] for i in r_json] == [0, 1, 2, 3]
+    assert r_json[0]["proposition"]["json_object"] == {"a": 1}
+    assert r_json[1]["proposition"] is None and r_json[1]["error"]
+    assert r_json[2]["proposition"] is None and r_json[2]["error"]
+    assert r_json[3]["proposition"]["comment"] == "second"
+
+    # ndjson
+    req = api_templates.make_create_stream_propositions_batch()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.headers = {"Content-Type": "application/x-ndjson"}
+    req.data = (
+        '{"json_object": {"a": 3}, "comment": null}\n'
+        '\n'
+        '{"json_object": {"a": 4}, "comment": null}\n'
+    )
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    assert [i["proposition"]["json_object"]["a"] for i in r.json()] == [3, 4]
+
+    req = api_templates.make_get_stream_propositions()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    assert len(r.json()) == 4
+
+
+def test_stream_propositions_pagination(
+        authed_client,
+):
+    class DemoSchema(BaseModel):
+        a: int
+
+    req = api_templates.make_create_stream()
+    req.json = {
+        "name": "test-pagination",
+        "json_schema": DemoSchema.model_json_schema(),
+        "is_private": True,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_stream_id = r.json()["id"]
+
+    req = api_templates.make_create_stream_propositions_batch()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.json = [{"json_object": {"a": i}, "comment": None} for i in range(5)]
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+
+    req = api_templates.make_get_streams()
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    (stream,) = (i for i in r.json() if i["id"] == val_stream_id)
+    assert stream["propositions_count"] == 5
+    assert stream["last_proposition_created_at"] is not None
+    assert stream["last_proposition_updated_at"] is None
+
+    # keyset pages
+    values = []
+    cursor = None
+    while True:
+        req = api_templates.make_get_stream_propositions()
+        req.path_params = {
+            "stream_id": val_stream_id,
+        }
+        req.params = {"limit": 2}
+        if cursor is not None:
+            req.params["cursor"] = cursor
+        r = authed_client.prepsend(req)
+        assert r.status_code == 200
+        assert len(r.json()) <= 2
+        values.extend(i["json_object"]["a"] for i in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert values == list(range(5))
+
+    req = api_templates.make_get_stream_propositions()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.params = {"cursor": "not-a-cursor"}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 422
+
+    # ndjson streaming
+    req = api_templates.make_get_stream_propositions()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.headers = {"Accept": "application/x-ndjson"}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    assert r.headers["Content-Type"].startswith("application/x-ndjson")
+    lines = r.text.splitlines()
+    assert [json.loads(i)["json_object"]["a"] for i in lines] == list(range(5))
+
+
+def test_stream_conditional_requests(
+        authed_client,
+):
+    class DemoSchema(BaseModel):
+        a: int
+
+    req = api_templates.make_create_stream()
+    req.json = {
+        "name": "test-conditional",
+        "json_schema": DemoSchema.model_json_schema(),
+        "is_private": True,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_stream_id = r.json()["id"]
+
+    req = api_templates.make_create_stream_proposition()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.json = {"json_object": {"a": 1}, "comment": None}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_proposition_id = r.json()["id"]
+    val_proposition_etag = r.headers["ETag"]
+
+    # unchanged listings are not sent again
+    for req in (api_templates.make_get_streams(),
+                api_templates.make_get_stream_propositions()):
+        req.path_params = {
+            "stream_id": val_stream_id,
+        }
+        r = authed_client.prepsend(req)
+        assert r.status_code == 200
+        etag = r.headers["ETag"]
+        req.headers = {"If-None-Match": etag}
+        r = authed_client.prepsend(req)
+        assert r.status_code == 304
+        assert r.headers["ETag"] == etag
+    val_propositions_etag = etag
+
+    # writes require current ETag of the proposition
+    req = api_templates.make_put_stream_proposition()
+    req.path_params = {
+        "stream_id": val_stream_id,
+        "proposition_id": val_proposition_id,
+    }
+    req.json = {"json_object": {"a": 2}, "comment": None}
+    req.headers = {"If-Match": '"stale"'}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 409
+    req.headers = {"If-Match": val_proposition_etag}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    assert r.headers["ETag"] != val_proposition_etag
+    r = authed_client.prepsend(req)
+    assert r.status_code == 409
+
+    # and change ETag of the listing
+    req = api_templates.make_get_stream_propositions()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.headers = {"If-None-Match": val_propositions_etag}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    assert r.json()[0]["json_object"] == {"a": 2}
+
+    # writes to streams which are not accessible are not found
+    req = api_templates.make_put_stream_proposition()
+    req.path_params = {
+        "stream_id": 0,
+        "proposition_id": val_proposition_id,
+    }
+    req.json = {"json_object": {"a": 3}, "comment": None}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 404
+
+
+def test_stream_events(
+        client,
+        authed_client,
+):
+    class DemoSchema(BaseModel):
+        a: int
+
+    req = api_templates.make_create_stream()
+    req.json = {
+        "name": "test-events",
+        "json_schema": DemoSchema.model_json_schema(),
+        "is_private": True,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_stream_id = r.json()["id"]
+
+    req = api_templates.make_get_stream_events()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    r = client.prepsend(req)
+    assert r.status_code == 401
+    r_events = authed_client.prepsend(req, stream=True, timeout=10)
+    assert r_events.status_code == 200
+    assert r_events.headers["Content-Type"].startswith("text/event-stream")
+    lines = r_events.iter_lines(decode_unicode=True)
+    assert next(lines) == ": subscribed"
+
+    req = api_templates.make_create_stream_proposition()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.json = {"json_object": {"a": 1}, "comment": None}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_proposition_id = r.json()["id"]
+
+    event = {}
+    for line in lines:
+        if not line:
+            if event.get("event") == "insert":
+                break
+            event = {}
+            continue
+        field, _, value = line.partition(": ")
+        event[field] = value
+    r_events.close()
+    assert event["id"] == str(val_proposition_id)
+    assert json.loads(event["data"])["json_object"] == {"a": 1}
+
+
+def test_stream_rollups(
+        authed_client,
+):
+    class Nutrition(BaseModel):
+        protein_g: float
+
+    class DemoSchema(BaseModel):
+        nutrition_info: Nutrition
+        note: str
+
+    req = api_templates.make_create_stream()
+    req.json = {
+        "name": "test-rollups",
+        "json_schema": DemoSchema.model_json_schema(),
+        "is_private": True,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_stream_id = r.json()["id"]
+
+    req = api_templates.make_create_stream_propositions_batch()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.json = [
+        {
+            "json_object": {
+                "nutrition_info": {"protein_g": i},
+                "note": "-",
+            },
+            "comment": None,
+        }
+        for i in (10, 20, 30)
+    ]
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+
+    # rollups are computed by reasoner worker
+    req = api_templates.make_get_stream_rollups()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.params = {"granularity": "MONTH"}
+    for _ in range(20):
+        r = authed_client.prepsend(req)
+        assert r.status_code == 200
+        if r.json():
+            break
+        time.sleep(0.5)
+    (rollup,) = r.json()
+    assert rollup["path"] == "nutrition_info.protein_g"
+    assert rollup["count"] == 3
+    assert rollup["sum"] == 60
+    assert rollup["min"] == 10
+    assert rollup["max"] == 30
+
+    req.path_params = {
+        "stream_id": -1,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 404
+
+
+def test_stream_ttl(
+        authed_client,
+):
+    class DemoSchema(BaseModel):
+        a: int
+
+    req = api_templates.make_create_stream()
+    req.json = {
+        "name": "test-ttl",
+        "json_schema": DemoSchema.model_json_schema(),
+        "is_private": True,
+        "ttl": 1,  # seconds
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+    val_stream_id = r.json()["id"]
+
+    req = api_templates.make_create_stream_proposition()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    req.json = {"json_object": {"a": 1}, "comment": None}
+    r = authed_client.prepsend(req)
+    assert r.status_code == 201
+
+    req = api_templates.make_get_stream_propositions()
+    req.path_params = {
+        "stream_id": val_stream_id,
+    }
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    assert len(r.json()) == 1
+
+    # hidden once expired, whether purged yet or not; expiry is enforced
+    #  at minute granularity, so it takes up to a minute past the TTL
+    deadline = time.monotonic() + 65
+    while time.monotonic() < deadline:
+        r = authed_client.prepsend(req)
+        assert r.status_code == 200
+        if not r.json():
+            break
+        time.sleep(1)
+    assert r.json() == []
+
+    req = api_templates.make_get_streams()
+    r = authed_client.prepsend(req)
+    assert r.status_code == 200
+    (stream,) = (i for i in r.json() if i["id"] == val_stream_id)
+    assert stream["propositions_count"] == 0
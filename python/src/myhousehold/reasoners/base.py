@@ -1,8 +1,12 @@
 import abc
+from collections.abc import Mapping
+from typing import Any
 
 from pydantic.json_schema import JsonSchemaValue
 
 from myhousehold.core.models import Proposition
+from myhousehold.core.models.intents.project import ProjectIntent, Urgency
+from myhousehold.core.services.aggregates import Aggregate, AggregateState
 
 
 class BaseReasoner(abc.ABC):
@@ -15,6 +19,9 @@ class BaseReasoner(abc.ABC):
     # todo: think about declaring premise type using pydantic model
     #  specified in typehint.
 
+    # identifies reasoner and names the stream of its conclusions
+    name: str
+
     @abc.abstractmethod
     def declare_premise_schema(self) -> JsonSchemaValue:
         """
@@ -25,14 +32,48 @@ class BaseReasoner(abc.ABC):
 
     @abc.abstractmethod
     def premises_selector(self):
-        """ I have no time """
+        """
+        I have no time
+
+        Reasoner worker narrows statement down to the notified premises and
+        executes it on primary, since they are too fresh for replicas.
+        """
 
         raise NotImplementedError
 
+    def declare_aggregates(self) -> list[Aggregate]:
+        """
+        Declare aggregates of premises, which are maintained incrementally
+        on proposition writes and passed to `inference`.
+        """
+
+        return []
+
+    def declare_conclusion_schema(self) -> JsonSchemaValue:
+        """
+        Declare JSON schema of conclusions, i.e. of the stream they are
+        recorded to.
+        """
+
+        return {"type": "object"}
+
+    def declare_project_intent(self) -> ProjectIntent:
+        return ProjectIntent(
+            urgency=Urgency.MINOR,
+            is_instant=True,
+        )
+
     @abc.abstractmethod
-    def inference(self, premise: Proposition) -> list[Proposition]:
+    def inference(
+            self,
+            premises: list[Proposition],
+            aggregates: Mapping[str, AggregateState],
+    ) -> list[dict[str, Any]]:
         """
-        Draw an inference on basis of provided premise.
+        Draw an inference on basis of new premises and current state of
+        declared aggregates, keyed by aggregate name.
+
+        :return: JSON objects of conclusions
         """
 
         raise NotImplementedError
@@ -1,34 +1,64 @@
-from sqlalchemy import extract, func, select
+from collections.abc import Mapping
+from typing import Any
 
-from myhousehold.core.models import Proposition
-from myhousehold.core.models.intents.project import ProjectIntent, Urgency
+from pydantic.json_schema import JsonSchemaValue
+from sqlalchemy import func, select
+
+from myhousehold.core.models import Proposition, Stream
+from myhousehold.core.services.aggregates import Aggregate, AggregateState
 from myhousehold.reasoners.base import BaseReasoner
 
+PREMISE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nutrition_info": {
+            "type": "object",
+            "properties": {
+                "protein_g": {"type": "number"},
+            },
+        },
+    },
+}
+
 
 class ProteinGoalReasoner(BaseReasoner):
+    name = "protein_goal"
+    protein_g = Aggregate(
+        name="protein_goal.protein_g",
+        path=("nutrition_info", "protein_g"),
+        premise_schema=PREMISE_SCHEMA,
+    )
+
+    def declare_premise_schema(self) -> JsonSchemaValue:
+        return PREMISE_SCHEMA
+
+    def declare_conclusion_schema(self) -> JsonSchemaValue:
+        return {
+            "type": "object",
+            "properties": {
+                "message": {"type": "string"},
+            },
+            "required": ["message"],
+        }
+
+    def declare_aggregates(self) -> list[Aggregate]:
+        return [self.protein_g]
+
     def premises_selector(self):
         stmt = (select(Proposition)
-                .where(extract("date", Proposition.created_at)
-                       == extract("date", func.now()))
+                .where(Proposition.created_at >= func.current_date())
                 .join(Proposition.stream)
-                .where(Proposition.stream.record_intent_id.is_not(None))
-                .where(Proposition.stream
-                       .json_schema.contains({
-                            "properties": {
-                                "nutrition_info": {
-                                    "protein_g": "number",
-                                }
-                            }
-                        })))
+                .where(Stream.record_intent_id.is_not(None))
+                .where(Stream.json_schema.contains(
+                    self.declare_premise_schema())))
         return stmt
 
-    def inference(self, premises: list[Proposition]) -> list[Proposition]:
-        total_protein_g = sum(
-            (i.json_object
-             .get("nutrition_info")
-             .get("protein_g"))
-            for i in premises
-        )
+    def inference(
+            self,
+            premises: list[Proposition],
+            aggregates: Mapping[str, AggregateState],
+    ) -> list[dict[str, Any]]:
+        total_protein_g = aggregates[self.protein_g.name].sum
 
         if total_protein_g < 100:
             msg = f"You need to eat {total_protein_g}g of protein today"
@@ -39,13 +69,7 @@ class ProteinGoalReasoner(BaseReasoner):
             raise AssertionError()
 
         return [
-            Proposition(
-                intent_project=ProjectIntent(
-                    urgency=Urgency.MINOR,
-                    is_instant=True,
-                ),
-                json_object={
-                    "message": msg,
-                },
-            ),
+            {
+                "message": msg,
+            },
         ]
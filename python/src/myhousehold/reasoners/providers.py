@@ -0,0 +1,24 @@
+from dishka import Provider, Scope, provide
+
+from myhousehold.core.services.aggregates import DeclaredAggregates
+from myhousehold.reasoners.base import BaseReasoner
+from myhousehold.reasoners.protein_goal import ProteinGoalReasoner
+
+
+class ProviderReasoners(Provider):
+    @provide(scope=Scope.APP)
+    def get_reasoners(self) -> list[BaseReasoner]:
+        return [
+            ProteinGoalReasoner(),
+        ]
+
+    @provide(scope=Scope.APP)
+    def get_declared_aggregates(
+            self,
+            reasoners: list[BaseReasoner],
+    ) -> DeclaredAggregates:
+        return DeclaredAggregates([
+            aggregate
+            for reasoner in reasoners
+            for aggregate in reasoner.declare_aggregates()
+        ])
@@ -0,0 +1,48 @@
+import hashlib
+
+
+def make_etag(*parts: object) -> str:
+    """ Strong entity tag of a representation identified by `parts` """
+
+    raw = "|".join(str(i) for i in parts)
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def _parse(header: str) -> list[str]:
+    return [i.strip() for i in header.split(",") if i.strip()]
+
+
+def none_match(if_none_match: str | None, etag: str) -> bool:
+    """
+    Whether `If-None-Match` condition holds, i.e. full response must be
+    sent. Uses weak comparison, as RFC 9110 prescribes for it.
+    """
+
+    if if_none_match is None:
+        return True
+    tags = _parse(if_none_match)
+    if "*" in tags:
+        return False
+    return all(i.removeprefix("W/") != etag for i in tags)
+
+
+def make_version_etag(version: int) -> str:
+    """ Strong entity tag of a version of a resource """
+
+    return f'"v{version}"'
+
+
+def parse_version_etag(if_match: str) -> int | None:
+    """
+    Version from `If-Match` that holds a single tag made by
+    `make_version_etag`, None for any other value
+    """
+
+    tags = _parse(if_match)
+    if len(tags) != 1:
+        return None
+    tag = tags[0]
+    if not (tag.startswith('"v') and tag.endswith('"')):
+        return None
+    version = tag[2:-1]
+    return int(version) if version.isdigit() else None
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, HTTPException, Request, Response
 
 from myhousehold.core.exceptions import DomainValueError
+from myhousehold.core.services.hashing import PasswordHashingOverloadedError
 
 
 async def domain_value_error_handler(
@@ -13,5 +14,20 @@ async def domain_value_error_handler(
     )
 
 
+async def password_hashing_overloaded_error_handler(
+        request: Request,
+        exc: PasswordHashingOverloadedError,
+) -> Response:
+    raise HTTPException(
+        status_code=503,
+        detail="Too many authentication requests, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
 def register(app: FastAPI):
     app.add_exception_handler(DomainValueError, domain_value_error_handler)
+    app.add_exception_handler(
+        PasswordHashingOverloadedError,
+        password_hashing_overloaded_error_handler,
+    )
@@ -1,26 +1,53 @@
+import os
+import tempfile
+
 import uvicorn
-from dishka import make_async_container
+from dishka import make_async_container, make_container
 from dishka.integrations.fastapi import setup_dishka
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from myhousehold.core.providers import ProviderConfig, ProviderDatabase
+from myhousehold.core.providers import (
+    ConfigQueryBudget,
+    ConfigRestServer,
+    ProviderConfig,
+    ProviderDatabase,
+)
 from myhousehold.core.services.providers import ProviderServices
+from myhousehold.core.services.warmup import WarmUp
+from myhousehold.core.timings import instrument_engines
+from myhousehold.reasoners.providers import ProviderReasoners
 from myhousehold.server import (
     exception_handlers,
     routers,
 )
+from myhousehold.server.metrics import RequestMetrics, WorkerMetrics
+from myhousehold.server.middleware import (
+    QueryBudgetMiddleware,
+    TimingMiddleware,
+)
 from myhousehold.server.providers import ProviderServer
 
 
-def main():
+def make_app() -> FastAPI:
+    """
+    Application factory, called in each worker process, so that engines
+    and container are created after workers are started.
+    """
+
     providers = (
         ProviderConfig(),
         ProviderDatabase(),
         ProviderServices(),
+        ProviderReasoners(),
         ProviderServer(),
     )
-    container = make_async_container(*providers)
+    request_metrics = RequestMetrics()
+    container = make_async_container(
+        *providers,
+        context={RequestMetrics: request_metrics},
+    )
+    instrument_engines()
 
     app = FastAPI()
     setup_dishka(container, app)
@@ -36,9 +63,53 @@ def main():
         allow_headers=["*"],
     )
 
+    config_query_budget = make_container(ProviderConfig()).get(
+        ConfigQueryBudget)
+    if config_query_budget.enabled:
+        app.add_middleware(QueryBudgetMiddleware, config=config_query_budget)
+
+    # outermost, so that latency includes other middlewares
+    app.add_middleware(TimingMiddleware, metrics=request_metrics)
+
+    async def start_warm_up():
+        # in background, readiness is reported once it is done
+        warm_up = await container.get(WarmUp)
+        warm_up.start()
+        worker_metrics = await container.get(WorkerMetrics)
+        worker_metrics.start()
+
+    app.add_event_handler("startup", start_warm_up)
+    # on SIGTERM server stops accepting connections and awaits in-flight
+    #  requests first
     app.add_event_handler("shutdown", container.close)
 
-    uvicorn.run(app, host="0.0.0.0", port=80)
+    return app
+
+
+def main():
+    config = make_container(ProviderConfig()).get(ConfigRestServer)
+    if config.metrics_directory is not None:
+        config.metrics_directory.mkdir(parents=True, exist_ok=True)
+        # of workers of a previous run
+        for path in config.metrics_directory.glob("*.json"):
+            path.unlink()
+    elif config.workers > 1:
+        # inherited by workers, which read config anew
+        directory = tempfile.mkdtemp(prefix="myhousehold-metrics-")
+        os.environ["MYHOUSEHOLD__REST_SERVER__METRICS_DIRECTORY"] = directory
+    uvicorn.run(
+        "myhousehold.server.main.run_rest_server:make_app",
+        factory=True,
+        host=config.host,
+        port=config.port,
+        workers=config.workers,
+        loop=config.loop,
+        http=config.http,
+        backlog=config.backlog,
+        timeout_keep_alive=config.timeout_keep_alive,
+        limit_concurrency=config.limit_concurrency,
+        timeout_graceful_shutdown=config.timeout_graceful_shutdown,
+    )
 
 
 if __name__ == "__main__":
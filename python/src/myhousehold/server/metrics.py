@@ -0,0 +1,284 @@
+import asyncio
+import contextlib
+import json
+import os
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+from myhousehold.core.timings import RequestTimings
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+PHASES = ("auth", "db", "validation", "serialization")
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """ Cumulative histogram per label set, Prometheus style """
+
+    def __init__(self, name: str, help_: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help_
+        self.buckets = tuple(buckets)
+        self.series: dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            # counts per bucket and +Inf, sum
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def dump(self) -> list:
+        return [[labels, *series] for labels, series in self.series.items()]
+
+    def merge(self, dumped: list) -> None:
+        """ Add series of `dump` of another histogram of the same buckets """
+
+        for labels, counts, sum_ in dumped:
+            labels = tuple(tuple(i) for i in labels)
+            series = self.series.get(labels)
+            if series is None:
+                self.series[labels] = [list(counts), sum_]
+                continue
+            series[0] = [a + b for a, b in zip(series[0], counts,
+                                               strict=True)]
+            series[1] += sum_
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, sum_) in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts,
+                                    strict=True):
+                cumulative += count
+                yield (f"{self.name}_bucket"
+                       f"{_format_labels((*labels, ('le', str(bound))))} "
+                       f"{cumulative}")
+            yield f"{self.name}_sum{_format_labels(labels)} {sum_}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class Counter:
+    def __init__(self, name: str, help_: str):
+        self.name = name
+        self.help = help_
+        self.series: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, value: float = 1) -> None:
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def dump(self) -> list:
+        return [[labels, value] for labels, value in self.series.items()]
+
+    def merge(self, dumped: list) -> None:
+        for labels, value in dumped:
+            self.inc(tuple(tuple(i) for i in labels), value)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.series.items():
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+
+class RequestMetrics:
+    """
+    Latency of requests by route template, method and status, its split
+    into phases, and database statements and rows per route.
+
+    Updated from event loop only, so no locking is needed.
+    """
+
+    def __init__(self):
+        self.duration = Histogram(
+            "myhousehold_http_request_duration_seconds",
+            "Latency of HTTP requests",
+            LATENCY_BUCKETS,
+        )
+        self.phase_duration = Histogram(
+            "myhousehold_http_request_phase_duration_seconds",
+            "Latency of HTTP requests spent in phase",
+            LATENCY_BUCKETS,
+        )
+        self.db_statements = Counter(
+            "myhousehold_http_db_statements_total",
+            "SQL statements executed by HTTP requests",
+        )
+        self.db_rows = Counter(
+            "myhousehold_http_db_rows_total",
+            "Rows returned or affected by SQL statements of HTTP requests",
+        )
+
+    def observe(
+            self,
+            route: str,
+            method: str,
+            status: int,
+            duration: float,
+            timings: RequestTimings,
+    ) -> None:
+        route_labels = (("route", route), ("method", method))
+        self.duration.observe((*route_labels, ("status", str(status))),
+                              duration)
+        phases = {"db": timings.db_seconds, **timings.phases}
+        for phase in PHASES:
+            self.phase_duration.observe(
+                (*route_labels, ("phase", phase)),
+                phases.get(phase, 0.0),
+            )
+        self.db_statements.inc(route_labels, timings.db_statements)
+        self.db_rows.inc(route_labels, timings.db_rows)
+
+    def dump(self) -> dict[str, list]:
+        """ JSON-serializable state, see `merge` """
+
+        return {i.name: i.dump() for i in self._metrics()}
+
+    def merge(self, dumped: Mapping[str, list]) -> None:
+        for metric in self._metrics():
+            metric.merge(dumped.get(metric.name, []))
+
+    def render(self) -> Iterable[str]:
+        for metric in self._metrics():
+            yield from metric.render()
+
+    def _metrics(self) -> tuple[Histogram | Counter, ...]:
+        return (self.duration,
+                self.phase_duration,
+                self.db_statements,
+                self.db_rows)
+
+
+class WorkerMetrics:
+    """
+    Metrics of this worker process: `RequestMetrics` and snapshots of
+    gauges by prefix. With `directory` they are shared with other workers
+    of the server through a file per process, written on render and every
+    `interval` seconds, so that whichever worker is scraped reports all of
+    them: series and gauges are added up, gauges of maxima (`*_max`) are
+    maxed. Series of exited workers are kept, as of their last write, so
+    that counters do not go down when a worker is replaced; their gauges
+    are skipped.
+    """
+
+    def __init__(
+            self,
+            request_metrics: RequestMetrics,
+            gauges: Mapping[str, Callable[[], Mapping[str, float]]],
+            directory: Path | None,
+            interval: float,
+    ):
+        self.request_metrics = request_metrics
+        self.gauges = gauges
+        self.directory = directory
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.directory is not None and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.to_thread(self._write, self.snapshot())
+            await asyncio.sleep(self.interval)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        if self.directory is not None:
+            # final counts, which outlive the process
+            await asyncio.to_thread(self._write, self.snapshot())
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": self.request_metrics.dump(),
+            "gauges": {prefix: dict(snapshot())
+                       for prefix, snapshot in self.gauges.items()},
+        }
+
+    async def render(self) -> list[str]:
+        snapshots = [(self.snapshot(), True)]
+        if self.directory is not None:
+            await asyncio.to_thread(self._write, snapshots[0][0])
+            snapshots = await asyncio.to_thread(self._read)
+
+        request_metrics = RequestMetrics()
+        gauges: dict[str, dict[str, float]] = {}
+        for snapshot, is_running in snapshots:
+            request_metrics.merge(snapshot["requests"])
+            if not is_running:
+                continue
+            for prefix, values in snapshot["gauges"].items():
+                totals = gauges.setdefault(prefix, {})
+                for key, value in values.items():
+                    if key not in totals:
+                        totals[key] = value
+                    elif key.endswith("_max"):
+                        totals[key] = max(totals[key], value)
+                    else:
+                        totals[key] += value
+
+        lines = list(request_metrics.render())
+        for prefix, values in gauges.items():
+            lines.extend(render_gauges(prefix, values))
+        return lines
+
+    def _path(self, pid: int) -> Path:
+        return self.directory / f"{pid}.json"
+
+    def _write(self, snapshot: dict[str, Any]) -> None:
+        path = self._path(os.getpid())
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(json.dumps(snapshot))
+        # readers see either the previous snapshot or this one
+        os.replace(temporary, path)
+
+    def _read(self) -> list[tuple[dict[str, Any], bool]]:
+        """ :return: snapshot of each worker and whether it is running """
+
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            with contextlib.suppress(FileNotFoundError):
+                snapshots.append((json.loads(path.read_text()),
+                                  _is_running(int(path.stem))))
+        return snapshots
+
+
+def render_gauges(prefix: str, snapshot: Mapping[str, float]) -> Iterable[str]:
+    """ Snapshot of plain telemetry counters as untyped samples """
+
+    for key, value in snapshot.items():
+        yield f"# TYPE {prefix}_{key} untyped"
+        yield f"{prefix}_{key} {float(value)}"
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return (value.replace("\\", "\\\\")
+            .replace("\n", "\\n")
+            .replace('"', '\\"'))
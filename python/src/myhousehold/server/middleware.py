@@ -0,0 +1,164 @@
+import functools
+import inspect
+import logging
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from myhousehold.core.providers import ConfigQueryBudget
+from myhousehold.core.query_log import (
+    QueryBudgetExceededError,
+    QueryLog,
+    current_query_log,
+)
+from myhousehold.core.timings import RequestTimings, current_timings
+from myhousehold.server.metrics import RequestMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class TimingMiddleware:
+    """
+    Collects `RequestTimings` of each HTTP request and observes them to
+    `RequestMetrics` by route template, so that label cardinality stays
+    bounded. Pure ASGI, so that it does not buffer responses.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        status = 500
+
+        async def send_instrumented(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                returned_at = timings.endpoint_returned_at
+                if returned_at is not None:
+                    timings.add("serialization",
+                                time.perf_counter() - returned_at)
+            await send(message)
+
+        token = current_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_instrumented)
+        finally:
+            current_timings.reset(token)
+            route = scope.get("route")
+            self.metrics.observe(
+                route=route.path if route is not None else "unmatched",
+                method=scope["method"],
+                status=status,
+                duration=time.perf_counter() - timings.started_at,
+                timings=timings,
+            )
+
+
+class QueryBudgetMiddleware:
+    """
+    Records statements of watched sessions per request and checks them
+    against the route budget of `ConfigQueryBudget` when response starts.
+    Offending requests are logged and, in "raise" mode, their responses
+    are replaced with an error, so that tests fail on them. Count of
+    statements until then is returned in `X-Query-Count` header.
+
+    Statements issued while the body is streamed, e.g. of NDJSON or SSE
+    responses, are checked again before its final chunk is sent; in
+    "raise" mode the response is then cut short, as it cannot be replaced
+    anymore, so that clients fail on the incomplete body.
+    """
+
+    def __init__(self, app: ASGIApp, config: ConfigQueryBudget):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        query_log = QueryLog()
+        is_replaced = False
+        checked_count = None
+
+        async def send_checked(message: Message) -> None:
+            nonlocal is_replaced, checked_count
+            if is_replaced:
+                return
+            if message["type"] == "http.response.start":
+                checked_count = query_log.count
+                error = self._check(scope, query_log)
+                if error is not None and self.config.mode == "raise":
+                    is_replaced = True
+                    response = JSONResponse(
+                        {"detail": str(error)},
+                        status_code=500,
+                    )
+                    await response(scope, receive, send)
+                    return
+                MutableHeaders(scope=message).append(
+                    "X-Query-Count", str(query_log.count))
+            elif (message["type"] == "http.response.body"
+                    and not message.get("more_body", False)
+                    and query_log.count > checked_count):
+                checked_count = query_log.count
+                error = self._check(scope, query_log)
+                if error is not None and self.config.mode == "raise":
+                    raise error
+            await send(message)
+
+        token = current_query_log.set(query_log)
+        try:
+            await self.app(scope, receive, send_checked)
+        finally:
+            current_query_log.reset(token)
+
+    def _check(
+            self,
+            scope: Scope,
+            query_log: QueryLog,
+    ) -> QueryBudgetExceededError | None:
+        route = scope.get("route")
+        route = route.path if route is not None else "unmatched"
+        max_queries = self.config.get_max_queries(scope["method"], route)
+        try:
+            query_log.check(max_queries, self.config.max_repeats)
+        except QueryBudgetExceededError as e:
+            logger.warning("%s %s: %s", scope["method"], route, e)
+            return e
+        return None
+
+
+class TimedRoute(APIRoute):
+    """
+    Marks return of endpoint in `RequestTimings`, so that the time until
+    response starts is accounted to serialization.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _mark_return(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _mark_return(endpoint):
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timings = current_timings.get()
+            if timings is not None:
+                timings.endpoint_returned_at = time.perf_counter()
+
+    return wrapper
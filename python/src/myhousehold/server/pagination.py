@@ -0,0 +1,27 @@
+import base64
+import binascii
+from datetime import datetime
+
+Keyset = tuple[datetime, int]
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, id_: int) -> str:
+    raw = f"{created_at.isoformat()}|{id_}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    """
+    :raise InvalidCursorError:
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, id_ = raw.split("|")
+        return datetime.fromisoformat(created_at), int(id_)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError from e
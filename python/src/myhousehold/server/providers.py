@@ -1,14 +1,27 @@
 import uuid
+from collections.abc import AsyncGenerator
 from typing import NewType
 from uuid import UUID
 
 from dishka import Provider, Scope, from_context, provide
 from fastapi import FastAPI, HTTPException
 from fastapi.requests import Request
+from sqlalchemy.ext.asyncio import AsyncEngine
 from starlette.testclient import TestClient
 
 from myhousehold.core.models import LoginSession, User
+from myhousehold.core.providers import (
+    ConfigPostgres,
+    ConfigRestServer,
+    ConfigSubscriptions,
+)
+from myhousehold.core.replicas import ConsistencyKey
 from myhousehold.core.services.access import AccessService, ErrorUnauthorized
+from myhousehold.core.services.hashing import PasswordHashingExecutor
+from myhousehold.core.services.stream_access import StreamAccessIndex
+from myhousehold.core.timings import measure
+from myhousehold.server.metrics import RequestMetrics, WorkerMetrics
+from myhousehold.server.subscriptions import SubscriptionHub
 
 AuthorizedUser = NewType("AuthorizedUser", User)
 CurrentLoginSession = NewType("CurrentLoginSession", LoginSession)
@@ -16,11 +29,31 @@ CurrentLoginSession = NewType("CurrentLoginSession", LoginSession)
 class ProviderServer(Provider):
     app = from_context(FastAPI, scope=Scope.SESSION)
     request = from_context(provides=Request, scope=Scope.REQUEST)
+    request_metrics = from_context(provides=RequestMetrics, scope=Scope.APP)
 
     @provide(scope=Scope.SESSION, cache=False)
     def get_test_client(self, app: FastAPI) -> TestClient:
         return TestClient(app)
 
+    @provide(scope=Scope.REQUEST)
+    async def get_consistency_key(
+            self,
+            request: Request,
+            access_service: AccessService,
+    ) -> ConsistencyKey:
+        # read-your-writes holds within a login session, once it is
+        #  authenticated; requests without one, e.g. of /register and
+        #  /login, have no key
+        try:
+            login_session = await access_service.lookup_login_session(
+                login_session_uid=UUID(
+                    request.headers["X-Login-Session-Uid"]),
+                login_session_token=request.headers["X-Login-Session-Token"],
+            )
+        except (KeyError, ValueError, ErrorUnauthorized):
+            return ConsistencyKey(None)
+        return ConsistencyKey(str(login_session.uid))
+
     @provide(scope=Scope.REQUEST)
     async def get_current_login_session(
             self,
@@ -38,10 +71,11 @@ class ProviderServer(Provider):
         )
 
         try:
-            login_session = await access_service.lookup_login_session(
-                login_session_uid=login_session_uid,
-                login_session_token=login_session_token,
-            )
+            with measure("auth"):
+                login_session = await access_service.lookup_login_session(
+                    login_session_uid=login_session_uid,
+                    login_session_token=login_session_token,
+                )
         except ErrorUnauthorized as e:
             raise HTTPException(
                 status_code=401,
@@ -57,6 +91,46 @@ class ProviderServer(Provider):
     ) -> AuthorizedUser:
         return AuthorizedUser(current_login_session.user)
 
+    @provide(scope=Scope.APP)
+    async def get_subscription_hub(
+            self,
+            engine: AsyncEngine,
+            config_postgres: ConfigPostgres,
+            config: ConfigSubscriptions,
+    ) -> AsyncGenerator[SubscriptionHub]:
+        hub = SubscriptionHub(
+            engine=engine,
+            dsn=config_postgres.get_dsn(),
+            collect_window=config.collect_window_seconds,
+            queue_size=config.queue_size,
+        )
+        yield hub
+        await hub.close()
+
+    @provide(scope=Scope.APP)
+    async def get_worker_metrics(
+            self,
+            request_metrics: RequestMetrics,
+            engine: AsyncEngine,
+            hashing_executor: PasswordHashingExecutor,
+            stream_access: StreamAccessIndex,
+            config: ConfigRestServer,
+    ) -> AsyncGenerator[WorkerMetrics]:
+        pool = engine.sync_engine.pool
+        worker_metrics = WorkerMetrics(
+            request_metrics=request_metrics,
+            gauges={
+                "myhousehold_db_pool": pool.telemetry_snapshot,
+                "myhousehold_password_hashing":
+                    hashing_executor.metrics.snapshot,
+                "myhousehold_stream_access": stream_access.metrics.snapshot,
+            },
+            directory=config.metrics_directory,
+            interval=config.metrics_interval_seconds,
+        )
+        yield worker_metrics
+        await worker_metrics.close()
+
     get_access_service = provide(
         AccessService,
         scope=Scope.REQUEST,
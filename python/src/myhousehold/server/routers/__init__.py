@@ -2,6 +2,8 @@ from fastapi import APIRouter
 
 from . import (
     access,
+    health,
+    metrics,
     streams,
 )
 
@@ -9,6 +11,8 @@ router = APIRouter()
 
 
 router.include_router(access.router)
+router.include_router(health.router)
+router.include_router(metrics.router)
 router.include_router(streams.router)
 
 
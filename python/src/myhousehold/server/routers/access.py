@@ -7,9 +7,11 @@ from pydantic import BaseModel
 
 from myhousehold.core.services.access import AccessService
 from myhousehold.core.services.uow_ctl import UoWCtl
+from myhousehold.server.middleware import TimedRoute
 
 router = APIRouter(
     prefix="",
+    route_class=TimedRoute,
 )
 
 
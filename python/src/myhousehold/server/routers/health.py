@@ -0,0 +1,28 @@
+from dishka import FromDishka
+from dishka.integrations.fastapi import inject
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from myhousehold.core.services.warmup import WarmUp
+
+router = APIRouter(
+    prefix="/health",
+    include_in_schema=False,
+)
+
+
+@router.get("/live")
+async def get_liveness() -> dict[str, str]:
+    return {"status": "live"}
+
+
+@router.get("/ready")
+@inject
+async def get_readiness(
+        warm_up: FromDishka[WarmUp],
+) -> JSONResponse:
+    """ Ready once warm-up is done, with durations of its steps """
+
+    if not warm_up.is_ready:
+        return JSONResponse({"status": "warming up"}, status_code=503)
+    return JSONResponse({"status": "ready", "warm_up": warm_up.timings})
@@ -0,0 +1,26 @@
+from dishka import FromDishka
+from dishka.integrations.fastapi import inject
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from myhousehold.server.metrics import WorkerMetrics
+
+router = APIRouter()
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(  # todo: restrict to scraper [sec]
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+@inject
+async def get_metrics(
+        worker_metrics: FromDishka[WorkerMetrics],
+) -> PlainTextResponse:
+    lines = await worker_metrics.render()
+    return PlainTextResponse(
+        "\n".join(lines) + "\n",
+        media_type=PROMETHEUS_MEDIA_TYPE,
+    )
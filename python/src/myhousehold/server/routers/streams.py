@@ -1,24 +1,78 @@
-from collections.abc import Iterable
+import asyncio
+import json
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from typing import Annotated
 
 from dishka import FromDishka
 from dishka.integrations.fastapi import inject
-from fastapi import APIRouter, HTTPException, status
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from myhousehold.core.models import Proposition
+from myhousehold.core.exceptions import DomainValueError
+from myhousehold.core.models import Granularity, Proposition, RollupBucket
 from myhousehold.core.models.stream import Stream
-from myhousehold.core.services.streams import StreamsService
+from myhousehold.core.providers import ConfigSubscriptions
+from myhousehold.core.replicas import ReadOnlySession
+from myhousehold.core.services.rollups import RollupsService
+from myhousehold.core.services.streams import (
+    PropositionArchivedError,
+    PropositionDraft,
+    StreamNotFoundError,
+    StreamsService,
+    VersionConflictError,
+)
 from myhousehold.core.services.uow_ctl import UoWCtl
+from myhousehold.server.etags import (
+    make_etag,
+    make_version_etag,
+    none_match,
+    parse_version_etag,
+)
+from myhousehold.server.middleware import TimedRoute
+from myhousehold.server.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+)
+from myhousehold.server.providers import AuthorizedUser
 from myhousehold.server.schemas.streams import (
+    BatchPropositionResultDTO,
     CreateStreamDTO,
     CreateStreamPropositionDTO,
+    RollupBucketDTO,
+    StreamCatalogEntryDTO,
     StreamDTO,
     StreamPropositionDTO,
 )
+from myhousehold.server.subscriptions import (
+    SubscriptionHub,
+    SubscriptionsUnavailableError,
+)
 
 router = APIRouter(
     prefix="/streams",
+    route_class=TimedRoute,
 )
 
+MAX_BATCH_SIZE = 10_000
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+PageSize = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+
 
 @router.post(
     "",
@@ -31,11 +85,19 @@ async def create_stream(
         uow_ctl: FromDishka[UoWCtl],
         payload: CreateStreamDTO,
 ) -> Stream:
+    """
+    Propositions of a stream with `ttl` are hidden once older than it and
+    purged later. TTL is enforced at minute granularity: propositions
+    expire up to a minute after `ttl`, when the minute of their expiry
+    ends.
+    """
+
     stream = await streams_service.create_stream(
         name=payload.name,
         json_schema=payload.json_schema,
         is_private=payload.is_private,
         is_record_intent=True,
+        ttl=payload.ttl,
     )
     await uow_ctl.commit()
     return stream
@@ -43,15 +105,29 @@ async def create_stream(
 
 @router.get(
     "",
-    response_model=list[StreamDTO],
+    response_model=list[StreamCatalogEntryDTO],
 )
 @inject
 async def get_streams(
         streams_service: FromDishka[StreamsService],
-) -> list[Stream]:
-    streams = await streams_service.get_streams()
-    streams = list(streams)
-    return streams
+        authorized_user: FromDishka[AuthorizedUser],
+        request: Request,
+) -> Response:
+    """
+    Answers `If-None-Match` with 304 by revision of the catalog, before
+    the catalog is read.
+    """
+
+    revision = await streams_service.get_streams_catalog_revision()
+    headers = {"ETag": make_etag("streams", authorized_user.id, *revision)}
+    if not none_match(request.headers.get("if-none-match"),
+                      headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers)
+
+    # built by database, bypasses `response_model`, which stays for docs
+    catalog = await streams_service.get_streams_catalog_json()
+    return Response(catalog, headers=headers, media_type=JSON_MEDIA_TYPE)
 
 
 @router.post(
@@ -63,6 +139,7 @@ async def get_streams(
 async def create_stream_proposition(
         streams_service: FromDishka[StreamsService],
         uow_ctl: FromDishka[UoWCtl],
+        response: Response,
         stream_id: int,
         payload: CreateStreamPropositionDTO,
 ) -> Proposition:
@@ -83,9 +160,105 @@ async def create_stream_proposition(
 
     await uow_ctl.commit()
 
+    response.headers["ETag"] = _proposition_etag(proposition)
     return proposition
 
 
+@router.post(
+    "/{stream_id}/propositions/batch",
+    response_model=list[BatchPropositionResultDTO],
+)
+@inject
+async def create_stream_propositions_batch(
+        streams_service: FromDishka[StreamsService],
+        uow_ctl: FromDishka[UoWCtl],
+        stream_id: int,
+        request: Request,
+) -> list[BatchPropositionResultDTO]:
+    """
+    Accepts JSON array of propositions or, with `application/x-ndjson`
+    content type, one proposition per line. Invalid items are reported and
+    skipped, valid ones are committed together.
+    """
+
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(
+            NDJSON_MEDIA_TYPE):
+        raw_items = [i for i in body.splitlines() if i.strip()]
+    else:
+        try:
+            raw_items = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Body is not a valid JSON",
+            ) from e
+        if not isinstance(raw_items, list):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Body must be a JSON array",
+            )
+
+    if len(raw_items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch must not exceed {MAX_BATCH_SIZE} items",
+        )
+
+    stream = await streams_service.get_stream_with(
+        id_=stream_id,
+    )
+    if stream is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Stream not found",
+        )
+
+    results: list[BatchPropositionResultDTO | None] = []
+    drafts = []
+    for index, raw_item in enumerate(raw_items):
+        try:
+            if isinstance(raw_item, bytes):
+                item = CreateStreamPropositionDTO.model_validate_json(
+                    raw_item)
+            else:
+                item = CreateStreamPropositionDTO.model_validate(raw_item)
+        except ValidationError as e:
+            results.append(BatchPropositionResultDTO(
+                index=index,
+                error=str(e),
+            ))
+            continue
+        results.append(None)
+        drafts.append(PropositionDraft(
+            json_object=item.json_object,
+            comment=item.comment,
+        ))
+
+    created = iter(await streams_service.create_propositions(
+        drafts=drafts,
+        stream=stream,
+    ))
+    await uow_ctl.commit()
+
+    for index, result in enumerate(results):
+        if result is not None:
+            continue
+        outcome = next(created)
+        if isinstance(outcome, DomainValueError):
+            results[index] = BatchPropositionResultDTO(
+                index=index,
+                error=outcome.detail,
+            )
+        else:
+            results[index] = BatchPropositionResultDTO(
+                index=index,
+                proposition=StreamPropositionDTO.model_validate(outcome),
+            )
+
+    return results
+
+
 @router.get(
     "/{stream_id}/propositions",
     response_model=list[StreamPropositionDTO],
@@ -93,12 +266,166 @@ async def create_stream_proposition(
 @inject
 async def get_stream_propositions(
         streams_service: FromDishka[StreamsService],
+        request: Request,
         stream_id: int,
-) -> Iterable[Proposition]:
-    stream = await streams_service.get_stream_with(
-        id_=stream_id,
+        limit: PageSize | None = None,
+        cursor: str | None = None,
+        since: datetime | None = None,
+) -> Response:
+    """
+    Propositions in `(created_at, id)` order, a page of `limit` items after
+    `cursor`. Cursor of the next page is returned in `X-Next-Cursor` header.
+    Without `limit` pages have `DEFAULT_PAGE_SIZE` items, but without
+    `cursor` either all propositions are listed, as before pagination.
+    With `since` only propositions created at or after it are listed, which
+    spares reading older months.
+
+    With `Accept: application/x-ndjson` all propositions after `cursor` are
+    streamed one per line, regardless of `limit`.
+
+    Answers `If-None-Match` with 304 by revision of the stream, before
+    propositions are read.
+    """
+
+    revision = await streams_service.get_stream_revision(stream_id)
+    if revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Stream not found",
+        )
+
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Invalid cursor",
+            ) from e
+
+    is_ndjson = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    headers = {"ETag": make_etag("propositions", stream_id, *revision,
+                                 is_ndjson or limit, cursor, since)}
+    if not none_match(request.headers.get("if-none-match"),
+                      headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers)
+
+    # documents are built by database, `response_model` stays for docs
+    if is_ndjson or (limit is None and cursor is None):
+        documents = streams_service.stream_stream_propositions_json(
+            stream_id=stream_id,
+            after=after,
+            since=since,
+        )
+        if is_ndjson:
+            return StreamingResponse(
+                _dump_ndjson(documents),
+                headers=headers,
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        return StreamingResponse(
+            _dump_json_array(documents),
+            headers=headers,
+            media_type=JSON_MEDIA_TYPE,
+        )
+
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    propositions = await streams_service.get_stream_propositions_json(
+        stream_id=stream_id,
+        limit=limit + 1,
+        after=after,
+        since=since,
+    )
+    if len(propositions) > limit:
+        propositions = propositions[:limit]
+        last = propositions[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
+    content = "[" + ",".join(i.json for i in propositions) + "]"
+    return Response(content, headers=headers, media_type=JSON_MEDIA_TYPE)
+
+
+async def _dump_ndjson(
+        documents: AsyncIterator[str],
+) -> AsyncIterator[bytes]:
+    async for document in documents:
+        yield document.encode() + b"\n"
+
+
+async def _dump_json_array(
+        documents: AsyncIterator[str],
+) -> AsyncIterator[bytes]:
+    separator = b"["
+    async for document in documents:
+        yield separator + document.encode()
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+@router.get(
+    "/{stream_id}/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {SSE_MEDIA_TYPE: {}}}},
+)
+@inject
+async def get_stream_events(
+        streams_service: FromDishka[StreamsService],
+        subscription_hub: FromDishka[SubscriptionHub],
+        config: FromDishka[ConfigSubscriptions],
+        orm_session: FromDishka[AsyncSession],
+        read_only_session: FromDishka[ReadOnlySession],
+        stream_id: int,
+) -> StreamingResponse:
+    """
+    Server-sent events of propositions of the stream, created (`insert`)
+    or updated (`update`) after subscription, with proposition as data and
+    its id as event id. After `resync` event some changes were not
+    delivered, and propositions must be listed again.
+    """
+
+    revision = await streams_service.get_stream_revision(stream_id)
+    if revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Stream not found",
+        )
+    # subscription may last for hours, pooled connections must not
+    await orm_session.close()
+    await read_only_session.close()
+
+    try:
+        await subscription_hub.wait_listening(config.listen_timeout_seconds)
+    except SubscriptionsUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Subscriptions are unavailable",
+            headers={"Retry-After": "1"},
+        ) from e
+
+    return StreamingResponse(
+        _dump_events(subscription_hub, stream_id, config.heartbeat_seconds),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        media_type=SSE_MEDIA_TYPE,
     )
-    return stream.propositions
+
+
+async def _dump_events(
+        subscription_hub: SubscriptionHub,
+        stream_id: int,
+        heartbeat: float,
+) -> AsyncIterator[bytes]:
+    async with subscription_hub.subscribe(stream_id) as events:
+        yield b": subscribed\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), heartbeat)
+            except TimeoutError:
+                yield b": heartbeat\n\n"
+                continue
+            yield event.encode()
 
 
 @router.put(
@@ -109,22 +436,101 @@ async def get_stream_propositions(
 async def put_stream_proposition(
         streams_service: FromDishka[StreamsService],
         uow_ctl: FromDishka[UoWCtl],
+        request: Request,
+        response: Response,
         stream_id: int,
         proposition_id: int,
         payload: CreateStreamPropositionDTO,
 ) -> Proposition:
-    proposition = await streams_service.put_stream_proposition(
-        stream_id=stream_id,
-        proposition_id=proposition_id,
-        json_object=payload.json_object,
-        comment=payload.comment,
-    )
-    if proposition is None:
+    """
+    With `If-Match` the proposition is written only if it is still at the
+    version of the ETag, otherwise 409 is returned, as it is to the loser
+    of concurrent writes. `If-Match: *` imposes no condition.
+    Archived propositions are read-only, writes of them get 409 too.
+    """
+
+    if_match = request.headers.get("if-match")
+    expected_version = None
+    if if_match is not None and if_match.strip() != "*":
+        expected_version = parse_version_etag(if_match)
+        if expected_version is None:  # not ours, matches no version
+            raise _version_conflict()
+
+    try:
+        proposition = await streams_service.put_stream_proposition(
+            stream_id=stream_id,
+            proposition_id=proposition_id,
+            json_object=payload.json_object,
+            comment=payload.comment,
+            expected_version=expected_version,
+        )
+    except StreamNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Stream or entry not found",
-        )
+            detail="Stream not found",
+        ) from e
+    except VersionConflictError as e:
+        raise _version_conflict() from e
+    except PropositionArchivedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Proposition is archived and read-only",
+        ) from e
 
     await uow_ctl.commit()
 
+    response.headers["ETag"] = _proposition_etag(proposition)
     return proposition
+
+
+def _proposition_etag(proposition: Proposition) -> str:
+    return make_version_etag(proposition.version)
+
+
+def _version_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Proposition was changed, read it and retry",
+    )
+
+
+@router.get(
+    "/{stream_id}/rollups",
+    response_model=list[RollupBucketDTO],
+)
+@inject
+async def get_stream_rollups(
+        streams_service: FromDishka[StreamsService],
+        rollups_service: FromDishka[RollupsService],
+        stream_id: int,
+        granularity: Granularity = Granularity.DAY,
+        path: Annotated[list[str] | None, Query()] = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: PageSize = DEFAULT_PAGE_SIZE,
+) -> Sequence[RollupBucket]:
+    """
+    Count, sum, min and max of numeric properties of stream propositions,
+    per `granularity` bucket of their creation, in `(path, bucket)` order.
+    Properties are addressed by dotted `path`, all of them by default.
+
+    Rollups are maintained by reasoner worker and lag behind writes.
+    """
+
+    stream = await streams_service.get_stream_with(
+        id_=stream_id,
+    )
+    if stream is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Stream not found",
+        )
+
+    return await rollups_service.get_rollups(
+        stream_id=stream_id,
+        granularity=granularity,
+        limit=limit,
+        paths=path,
+        since=since,
+        until=until,
+    )
@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 from pydantic import JsonValue
 
 from .base import BaseDTO
@@ -7,6 +9,9 @@ class CreateStreamDTO(BaseDTO):
     name: str
     json_schema: dict[str, JsonValue]
     is_private: bool
+    # propositions older than it expire, at minute granularity, never by
+    #  default
+    ttl: timedelta | None = None
 
 
 class StreamDTO(BaseDTO):
@@ -16,6 +21,12 @@ class StreamDTO(BaseDTO):
     is_private: bool
 
 
+class StreamCatalogEntryDTO(StreamDTO):
+    propositions_count: int
+    last_proposition_created_at: datetime | None
+    last_proposition_updated_at: datetime | None
+
+
 class CreateRecordIntent(BaseDTO):
     pass
 
@@ -29,3 +40,18 @@ class StreamPropositionDTO(BaseDTO):
     id: int
     json_object: dict[str, JsonValue]
     comment: str | None
+
+
+class BatchPropositionResultDTO(BaseDTO):
+    index: int
+    proposition: StreamPropositionDTO | None = None
+    error: str | None = None
+
+
+class RollupBucketDTO(BaseDTO):
+    path: str
+    bucket: datetime
+    count: int
+    sum: float
+    min: float
+    max: float
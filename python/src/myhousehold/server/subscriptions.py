@@ -0,0 +1,183 @@
+import asyncio
+import contextlib
+import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from myhousehold.core.listener import ChangesListener
+from myhousehold.core.models import Proposition
+from myhousehold.core.notifications import PropositionChanges
+
+logger = logging.getLogger(__name__)
+
+
+class StreamEvent(NamedTuple):
+    # "insert", "update" or "resync" if events were lost
+    type: str
+    id: int | None = None
+    # JSON document of `StreamPropositionDTO` shape
+    data: str = "{}"
+
+    def encode(self) -> bytes:
+        """ Server-sent event """
+
+        lines = [f"event: {self.type}"]
+        if self.id is not None:
+            lines.append(f"id: {self.id}")
+        lines.append(f"data: {self.data}")
+        return ("\n".join(lines) + "\n\n").encode()
+
+
+RESYNC = StreamEvent(type="resync")
+
+
+class SubscriptionsUnavailableError(Exception):
+    """ Listening for changes did not start in time """
+
+
+class SubscriptionHub:
+    """
+    Fans proposition changes out to subscribers of their streams. Changes
+    are received through a single LISTEN connection per process, which is
+    opened with the first subscription, and changed propositions are
+    loaded once per batch regardless of number of subscribers.
+
+    Access to streams must be checked before subscribing, and listening
+    awaited with `wait_listening`, so that subscribers are refused while
+    it does not start.
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            dsn: str,
+            collect_window: float,
+            queue_size: int,
+    ):
+        self.engine = engine
+        self.queue_size = queue_size
+        self.listener = ChangesListener(
+            dsn=dsn,
+            collect_window=collect_window,
+            handlers=[self.publish],
+            on_listening=self._on_listening,
+        )
+
+        self._subscribers: dict[int, set[asyncio.Queue[StreamEvent]]] = (
+            defaultdict(set))
+        self._listening: asyncio.Task | None = None
+        self._is_listening = asyncio.Event()
+        # batches are handled concurrently, events must keep their order
+        self._publish_lock = asyncio.Lock()
+
+    @contextlib.asynccontextmanager
+    async def subscribe(
+            self,
+            stream_id: int,
+    ) -> AsyncIterator[asyncio.Queue[StreamEvent]]:
+        """ Queue of events of the stream, which are published from now """
+
+        self._start_listening()
+        await self._is_listening.wait()
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[stream_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers[stream_id]
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[stream_id]
+
+    async def wait_listening(self, timeout: float) -> None:
+        """
+        Start listening unless it runs, and wait until it listens
+
+        :raise SubscriptionsUnavailableError: if it does not listen within
+         `timeout` seconds
+        """
+
+        self._start_listening()
+        try:
+            await asyncio.wait_for(self._is_listening.wait(), timeout)
+        except TimeoutError as e:
+            raise SubscriptionsUnavailableError from e
+
+    async def publish(self, changes: list[PropositionChanges]) -> None:
+        async with self._publish_lock:
+            changes = [i for i in changes if i.stream_id in self._subscribers]
+            if not changes:
+                return
+
+            events = await self._load_events(changes)
+            for stream_id, stream_events in events.items():
+                for queue in self._subscribers.get(stream_id, ()):
+                    for event in stream_events:
+                        self._put(queue, event)
+
+    async def close(self) -> None:
+        if self._listening is not None:
+            self._listening.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listening
+        await self.listener.drain()
+
+    async def _load_events(
+            self,
+            changes: list[PropositionChanges],
+    ) -> dict[int, list[StreamEvent]]:
+        ids = [j for i in changes if i.ids is not None for j in i.ids]
+        documents = {}
+        if ids:
+            # bounds let database read only partitions of changed months
+            stmt = (select(Proposition.id, Proposition.json_document())
+                    .where(Proposition.id.in_(ids))
+                    .where(Proposition.created_at
+                           >= min(i.created_from for i in changes))
+                    .where(Proposition.created_at
+                           <= max(i.created_to for i in changes)))
+            async with self.engine.connect() as connection:
+                documents = dict((await connection.execute(stmt)).all())
+
+        events = defaultdict(list)
+        for change in changes:
+            if change.ids is None:  # too many to be enumerated
+                events[change.stream_id].append(RESYNC)
+                continue
+            events[change.stream_id].extend(
+                StreamEvent(type=change.op.lower(), id=i, data=documents[i])
+                for i in change.ids
+                if i in documents
+            )
+        return events
+
+    def _start_listening(self) -> None:
+        if self._listening is not None and not self._listening.done():
+            return
+
+        if self._listening is not None and not self._listening.cancelled():
+            logger.error("Listening stopped, restarting",
+                         exc_info=self._listening.exception())
+        self._listening = asyncio.create_task(self.listener.run())
+
+    def _put(self, queue: asyncio.Queue[StreamEvent], event: StreamEvent):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # slow subscriber must not hold back others or buffer unbounded
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+    def _on_listening(self) -> None:
+        if self._is_listening.is_set():
+            logger.warning("Listening restarted, subscribers must resync")
+            for subscribers in self._subscribers.values():
+                for queue in subscribers:
+                    self._put(queue, RESYNC)
+        self._is_listening.set()
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, exists, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from myhousehold.core.archive import (
+    ArchivedProposition,
+    ArchiveStore,
+    encode_chunk,
+)
+from myhousehold.core.models import Proposition, PropositionChunk, Stream
+from myhousehold.core.models.intents.record import RecordIntent
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveMetrics:
+    def __init__(self):
+        self.runs = 0
+        self.chunks = 0
+        self.propositions_archived = 0
+        self.bytes_written = 0
+
+    def snapshot(self) -> dict[str, float]:
+        return dict(vars(self))
+
+
+class PropositionArchiver:
+    """
+    Moves propositions created more than `retention` ago to chunk files of
+    archive store, every `interval` seconds, which listings of propositions
+    read along with the table. Streams are archived in keyset order, at
+    most `chunk_size` propositions per chunk file and transaction, so that
+    archived propositions always precede ones left in the table.
+
+    Archived propositions are read-only. Streams which record intent has
+    TTL are left to expiry.
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            store: ArchiveStore,
+            retention: timedelta | None,
+            chunk_size: int,
+            block_size: int,
+            interval: float,
+    ):
+        self.engine = engine
+        self.store = store
+        # None disables archival
+        self.retention = retention
+        self.chunk_size = chunk_size
+        self.block_size = block_size
+        self.interval = interval
+        self.metrics = ArchiveMetrics()
+
+    async def run(self) -> None:
+        if self.retention is None:
+            return
+        while True:
+            try:
+                await self.archive()
+            except Exception:
+                logger.exception("Archival failed")
+            await asyncio.sleep(self.interval)
+
+    async def archive(self) -> None:
+        cutoff = datetime.now() - self.retention
+        has_archivable = exists().where(
+            (Proposition.stream_id == Stream.id)
+            & (Proposition.created_at < cutoff))
+        stmt = (select(Stream.id)
+                .join(Stream.record_intent)
+                .where(RecordIntent.ttl.is_(None))
+                .where(has_archivable))
+        async with self.engine.connect() as connection:
+            stream_ids = list(await connection.scalars(stmt))
+
+        for stream_id in stream_ids:
+            while await self._archive_chunk(stream_id, cutoff):
+                pass
+        self.metrics.runs += 1
+        logger.info("Archival done: %s", self.metrics.snapshot())
+
+    async def _archive_chunk(self, stream_id: int, cutoff: datetime) -> bool:
+        """
+        Move the earliest propositions of the stream created before `cutoff`
+        to a chunk file
+
+        :return: whether there were any
+        """
+
+        stmt = (select(*(getattr(Proposition, i)
+                         for i in ArchivedProposition._fields))
+                .where(Proposition.stream_id == stream_id)
+                .where(Proposition.created_at < cutoff)
+                .order_by(Proposition.created_at, Proposition.id)
+                .limit(self.chunk_size)
+                # updates wait for the move and find no proposition then
+                .with_for_update())
+        async with self.engine.begin() as connection:
+            propositions = [ArchivedProposition(*i)
+                            for i in await connection.execute(stmt)]
+            if not propositions:
+                return False
+            first, last = propositions[0], propositions[-1]
+
+            data = encode_chunk(propositions, self.block_size)
+            # named by the first proposition: file of a move which failed
+            #  to commit is replaced by the retry
+            key = (f"{stream_id}/{first.created_at:%Y%m%dT%H%M%S%f}"
+                   f"-{first.id}.chunk")
+            # durable before the manifest references it
+            await asyncio.to_thread(self.store.write, key, data)
+
+            keyset = tuple_(Proposition.created_at, Proposition.id)
+            await connection.execute(
+                delete(Proposition)
+                .where(Proposition.stream_id == stream_id)
+                # plain bounds prune partitions
+                .where(Proposition.created_at.between(first.created_at,
+                                                      last.created_at))
+                .where(keyset.between(tuple_(*first.keyset),
+                                      tuple_(*last.keyset))))
+            await connection.execute(insert(PropositionChunk).values(
+                stream_id=stream_id,
+                key=key,
+                propositions_count=len(propositions),
+                size_bytes=len(data),
+                first_created_at=first.created_at,
+                first_id=first.id,
+                last_created_at=last.created_at,
+                last_id=last.id,
+                ids=[i.id for i in propositions],
+                last_updated_at=max(
+                    (i.updated_at for i in propositions
+                     if i.updated_at is not None),
+                    default=None,
+                ),
+            ))
+            # latest write may have been moved, listings must not get
+            #  a version they had before
+            await connection.execute(Stream.bump_revision(stream_id))
+
+        self.metrics.chunks += 1
+        self.metrics.propositions_archived += len(propositions)
+        self.metrics.bytes_written += len(data)
+        return True
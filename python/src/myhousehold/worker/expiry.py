@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import date, datetime
+
+from psycopg.errors import LockNotAvailable
+from sqlalchemy import (
+    column,
+    delete,
+    exists,
+    func,
+    literal,
+    literal_column,
+    select,
+    table,
+    text,
+    tuple_,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from myhousehold.core.models import (
+    AggregateBucket,
+    Granularity,
+    Proposition,
+    RollupBucket,
+    Stream,
+)
+from myhousehold.core.models.intents.record import RecordIntent
+from myhousehold.core.services.rollups import truncate
+from myhousehold.worker.partitions import add_months
+
+logger = logging.getLogger(__name__)
+
+# named by `create_monthly_partitions` of database
+_PARTITION_NAME = re.compile(r"proposition_y(\d{4})m(\d{2})")
+
+
+class ExpiryMetrics:
+    def __init__(self):
+        self.runs = 0
+        self.batches = 0
+        self.rows_purged = 0
+        self.partitions_dropped = 0
+        # rollup and aggregate buckets of expired propositions only
+        self.buckets_deleted = 0
+        # batches and drops given up, as foreground writes held locks
+        self.lock_timeouts = 0
+        # age of the oldest expired proposition left after the last run,
+        #  i.e. how far purging is behind expiry
+        self.lag_seconds = 0.0
+
+    def snapshot(self) -> dict[str, float]:
+        return dict(vars(self))
+
+
+class PropositionExpirer:
+    """
+    Purges propositions of streams which record intent has TTL, once they
+    are older than it, every `interval` seconds. Reads hide expired
+    propositions until then (`Stream.expired_before`).
+
+    Partitions of past months holding expired propositions only are
+    dropped whole. Otherwise expired propositions are deleted per stream
+    in batches of at most `batch_size` rows, each in a short transaction.
+    Rollup and aggregate buckets of expired propositions only are deleted
+    with them; reads skip them until then.
+
+    Foreground traffic takes precedence: locks are waited for at most
+    `lock_timeout` seconds, what could not be locked is left for the next
+    run, and the job keeps to `duty_cycle` share of time by pausing after
+    each batch.
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            interval: float,
+            batch_size: int,
+            duty_cycle: float,
+            lock_timeout: float,
+    ):
+        self.engine = engine
+        self.interval = interval
+        self.batch_size = batch_size
+        self.duty_cycle = duty_cycle
+        self.lock_timeout = lock_timeout
+        self.metrics = ExpiryMetrics()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.expire()
+            except Exception:
+                logger.exception("Expiry failed")
+            await asyncio.sleep(self.interval)
+
+    async def expire(self) -> None:
+        await self._drop_partitions()
+
+        # cutoffs are fixed for the run, so that planner prunes partitions
+        stmt = (select(Stream.id, Stream.expiry_cutoff(RecordIntent.ttl))
+                .join(Stream.record_intent)
+                .where(RecordIntent.ttl.is_not(None)))
+        async with self.engine.connect() as connection:
+            streams = (await connection.execute(stmt)).all()
+
+        lag = 0.0
+        for stream_id, cutoff in streams:
+            lag = max(lag, await self._purge(stream_id, cutoff))
+            await self._delete_buckets(stream_id, cutoff)
+        self.metrics.lag_seconds = lag
+        self.metrics.runs += 1
+        logger.info("Expiry done: %s", self.metrics.snapshot())
+
+    async def _purge(self, stream_id: int, cutoff: datetime) -> float:
+        """
+        Delete propositions of the stream created before `cutoff`
+
+        :return: lag of purging of the stream, in seconds
+        """
+
+        tableoid = literal_column("tableoid")
+        ctid = literal_column("ctid")
+        is_expired = ((Proposition.stream_id == stream_id)
+                      & (Proposition.created_at < cutoff))
+        # row ids are unique within partition only
+        batch = (select(tableoid, ctid)
+                 .select_from(Proposition)
+                 .where(is_expired)
+                 .limit(self.batch_size)
+                 .correlate(None))
+        stmt = (delete(Proposition)
+                .where(is_expired)
+                .where(tuple_(tableoid, ctid).in_(batch)))
+
+        purged = self.batch_size
+        while purged == self.batch_size:
+            started_at = time.perf_counter()
+            try:
+                async with self.engine.begin() as connection:
+                    await self._set_lock_timeout(connection)
+                    purged = (await connection.execute(stmt)).rowcount
+                    if purged:
+                        # listings cached by clients are stale
+                        await connection.execute(
+                            Stream.bump_revision(stream_id))
+            except DBAPIError as e:
+                if not isinstance(e.orig, LockNotAvailable):
+                    raise
+                self.metrics.lock_timeouts += 1
+                break
+            self.metrics.batches += 1
+            self.metrics.rows_purged += purged
+            await self._pause(time.perf_counter() - started_at)
+
+        stmt = select(func.min(Proposition.created_at)).where(is_expired)
+        async with self.engine.connect() as connection:
+            oldest = await connection.scalar(stmt)
+        if oldest is None:
+            return 0.0
+        return (cutoff - oldest).total_seconds()
+
+    async def _delete_buckets(self, stream_id: int, cutoff: datetime) -> None:
+        """
+        Delete rollup and aggregate buckets of the stream which end before
+        `cutoff`. Bucket containing it is left as it is, so it counts
+        expired propositions too until it is recomputed.
+        """
+
+        stmts = [
+            delete(RollupBucket)
+            .where(RollupBucket.stream_id == stream_id)
+            .where(RollupBucket.granularity == granularity)
+            .where(RollupBucket.bucket < truncate(cutoff, granularity))
+            for granularity in Granularity
+        ]
+        stmts.append(delete(AggregateBucket)
+                     .where(AggregateBucket.stream_id == stream_id)
+                     .where(AggregateBucket.bucket < cutoff.date()))
+        try:
+            async with self.engine.begin() as connection:
+                await self._set_lock_timeout(connection)
+                for stmt in stmts:
+                    result = await connection.execute(stmt)
+                    self.metrics.buckets_deleted += result.rowcount
+        except DBAPIError as e:
+            if not isinstance(e.orig, LockNotAvailable):
+                raise
+            self.metrics.lock_timeouts += 1
+
+    async def _drop_partitions(self) -> None:
+        stmt = (select(literal_column("inhrelid::regclass::text"))
+                .select_from(table("pg_inherits"))
+                .where(literal_column("inhparent")
+                       == literal_column("'proposition'::regclass")))
+        async with self.engine.connect() as connection:
+            names = list(await connection.scalars(stmt))
+
+        current_month = date.today().replace(day=1)
+        for name in names:
+            match = _PARTITION_NAME.fullmatch(name)
+            if match is None:
+                continue
+            month = date(int(match[1]), int(match[2]), 1)
+            # later months may still be written to
+            if add_months(month, 1) > current_month:
+                continue
+
+            partition = table(name, column("stream_id"), column("created_at"))
+            is_live = exists(
+                select(literal(1))
+                .select_from(partition)
+                .where(partition.c.created_at
+                       >= Stream.expired_before(partition.c.stream_id))
+            )
+            started_at = time.perf_counter()
+            try:
+                async with self.engine.begin() as connection:
+                    if await connection.scalar(select(is_live)):
+                        continue
+                    await self._set_lock_timeout(connection)
+                    # name is matched above, safe to inline
+                    await connection.execute(text(f"DROP TABLE {name}"))
+            except DBAPIError as e:
+                if not isinstance(e.orig, LockNotAvailable):
+                    raise
+                self.metrics.lock_timeouts += 1
+                continue
+            logger.info("Dropped expired partition %s", name)
+            self.metrics.partitions_dropped += 1
+            await self._pause(time.perf_counter() - started_at)
+
+    async def _set_lock_timeout(self, connection: AsyncConnection) -> None:
+        await connection.execute(select(func.set_config(
+            "lock_timeout",
+            f"{int(self.lock_timeout * 1000)}ms",
+            True,  # for the transaction
+        )))
+
+    async def _pause(self, elapsed: float) -> None:
+        await asyncio.sleep(elapsed * (1 - self.duty_cycle) / self.duty_cycle)
@@ -0,0 +1,61 @@
+import asyncio
+import contextlib
+import logging
+import signal
+
+from dishka import make_async_container
+
+from myhousehold.core.listener import ChangesListener
+from myhousehold.core.providers import ProviderConfig, ProviderDatabase
+from myhousehold.reasoners.providers import ProviderReasoners
+from myhousehold.worker.archive import PropositionArchiver
+from myhousehold.worker.expiry import PropositionExpirer
+from myhousehold.worker.partitions import PartitionMaintainer
+from myhousehold.worker.providers import ProviderWorker
+from myhousehold.worker.scheduler import ReasonerScheduler
+
+
+async def run():
+    providers = (
+        ProviderConfig(),
+        ProviderDatabase(),
+        ProviderReasoners(),
+        ProviderWorker(),
+    )
+    container = make_async_container(*providers)
+    try:
+        reasoner_scheduler = await container.get(ReasonerScheduler)
+        await reasoner_scheduler.rebuild_aggregates()
+
+        listener = await container.get(ChangesListener)
+        partition_maintainer = await container.get(PartitionMaintainer)
+        proposition_expirer = await container.get(PropositionExpirer)
+        proposition_archiver = await container.get(PropositionArchiver)
+
+        background = [
+            asyncio.create_task(partition_maintainer.run()),
+            asyncio.create_task(proposition_expirer.run()),
+            asyncio.create_task(proposition_archiver.run()),
+        ]
+        listening = asyncio.create_task(listener.run())
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, listening.cancel)
+        with contextlib.suppress(asyncio.CancelledError):
+            await listening
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+
+        await listener.drain()
+    finally:
+        await container.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import REGCLASS
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from myhousehold.core.models import Proposition
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(month: date, months: int) -> date:
+    """ First day of the month `months` after the month of `month` """
+
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionMaintainer:
+    """
+    Keeps monthly partitions of `proposition` created `months_ahead` months
+    ahead of the current one, checking every `interval` seconds. Rows of
+    months it has not created yet, e.g. while it is down, go to the default
+    partition, and are moved to the partition of their month once it is.
+    Partitions of past months are left alone, they can be vacuumed,
+    reindexed or detached on their own.
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            months_ahead: int,
+            interval: float,
+    ):
+        self.engine = engine
+        self.months_ahead = months_ahead
+        self.interval = interval
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.create_partitions()
+            except Exception:
+                logger.exception("Creation of partitions failed")
+            await asyncio.sleep(self.interval)
+
+    async def create_partitions(self) -> int:
+        """ :return: count of created partitions """
+
+        since = date.today().replace(day=1)
+        until = add_months(since, self.months_ahead + 1)
+        stmt = select(func.create_monthly_partitions(
+            cast(Proposition.__tablename__, REGCLASS),
+            since,
+            until,
+        ))
+        async with self.engine.begin() as connection:
+            created = await connection.scalar(stmt)
+        if created:
+            logger.info("Created %s partitions of %s until %s",
+                        created, Proposition.__tablename__, until)
+        return created
@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from dishka import Provider, Scope, provide
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from myhousehold.core.archive import ArchiveStore
+from myhousehold.core.listener import ChangesListener
+from myhousehold.core.providers import (
+    ConfigArchive,
+    ConfigExpiry,
+    ConfigPartitions,
+    ConfigPostgres,
+    ConfigReasonerWorker,
+)
+from myhousehold.core.replicas import ConsistencyKey
+from myhousehold.core.services.aggregates import DeclaredAggregates
+from myhousehold.reasoners.base import BaseReasoner
+from myhousehold.worker.archive import PropositionArchiver
+from myhousehold.worker.expiry import PropositionExpirer
+from myhousehold.worker.partitions import PartitionMaintainer
+from myhousehold.worker.rollups import RollupCompactor
+from myhousehold.worker.scheduler import ReasonerScheduler
+
+
+class ProviderWorker(Provider):
+    @provide(scope=Scope.REQUEST)
+    def get_consistency_key(self) -> ConsistencyKey:
+        # worker reads and writes on primary only, no login sessions
+        return ConsistencyKey(None)
+
+    @provide(scope=Scope.APP)
+    def get_reasoner_scheduler(
+            self,
+            config: ConfigReasonerWorker,
+            engine: AsyncEngine,
+            reasoners: list[BaseReasoner],
+            aggregates: DeclaredAggregates,
+    ) -> ReasonerScheduler:
+        return ReasonerScheduler(
+            engine=engine,
+            reasoners=reasoners,
+            aggregates=aggregates,
+            reasoner_concurrency=config.reasoner_concurrency,
+        )
+
+    @provide(scope=Scope.APP)
+    def get_rollup_compactor(
+            self,
+            engine: AsyncEngine,
+    ) -> RollupCompactor:
+        return RollupCompactor(engine=engine)
+
+    @provide(scope=Scope.APP)
+    def get_partition_maintainer(
+            self,
+            config: ConfigPartitions,
+            engine: AsyncEngine,
+    ) -> PartitionMaintainer:
+        return PartitionMaintainer(
+            engine=engine,
+            months_ahead=config.months_ahead,
+            interval=config.check_interval_hours * 3600,
+        )
+
+    @provide(scope=Scope.APP)
+    def get_proposition_expirer(
+            self,
+            config: ConfigExpiry,
+            engine: AsyncEngine,
+    ) -> PropositionExpirer:
+        return PropositionExpirer(
+            engine=engine,
+            interval=config.interval_seconds,
+            batch_size=config.batch_size,
+            duty_cycle=config.duty_cycle,
+            lock_timeout=config.lock_timeout_seconds,
+        )
+
+    @provide(scope=Scope.APP)
+    def get_proposition_archiver(
+            self,
+            config: ConfigArchive,
+            engine: AsyncEngine,
+            store: ArchiveStore,
+    ) -> PropositionArchiver:
+        retention = None
+        if config.retention_days is not None:
+            retention = timedelta(days=config.retention_days)
+        return PropositionArchiver(
+            engine=engine,
+            store=store,
+            retention=retention,
+            chunk_size=config.chunk_size,
+            block_size=config.block_size,
+            interval=config.check_interval_hours * 3600,
+        )
+
+    @provide(scope=Scope.APP)
+    def get_changes_listener(
+            self,
+            config_postgres: ConfigPostgres,
+            config: ConfigReasonerWorker,
+            reasoner_scheduler: ReasonerScheduler,
+            rollup_compactor: RollupCompactor,
+    ) -> ChangesListener:
+        return ChangesListener(
+            dsn=config_postgres.get_dsn(),
+            collect_window=config.collect_window_seconds,
+            handlers=[
+                reasoner_scheduler.process,
+                rollup_compactor.process,
+            ],
+        )
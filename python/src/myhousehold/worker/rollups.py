@@ -0,0 +1,82 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from myhousehold.core.models import Granularity, Stream
+from myhousehold.core.notifications import PropositionChanges
+from myhousehold.core.replicas import ReadOnlySession
+from myhousehold.core.services.rollups import RollupsService, truncate
+
+# namespace of advisory locks of streams compacted by any worker process
+_COMPACTION_LOCK_CLASS = 0x524f4c4c  # "ROLL"
+
+
+class RollupCompactor:
+    """
+    Recomputes rollups of record streams for hours of creation of changed
+    propositions. Compactions of a stream are serialized within the
+    process by a lock, and across replicas of the worker by an advisory
+    lock held until commit.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+        self._locks: defaultdict[int, asyncio.Lock] = (
+            defaultdict(asyncio.Lock))
+
+    async def process(self, changes: list[PropositionChanges]) -> None:
+        ranges: defaultdict[int, list[tuple[datetime, datetime]]] = (
+            defaultdict(list))
+        for change in changes:
+            ranges[change.stream_id].append(
+                (change.created_from, change.created_to))
+
+        stmt = (select(Stream.id, Stream.json_schema)
+                .where(Stream.id.in_(ranges))
+                .where(Stream.record_intent_id.is_not(None)))
+        async with AsyncSession(self.engine) as session:
+            rows = (await session.execute(stmt)).all()
+
+        await asyncio.gather(*(
+            self._compact(stream_id, json_schema, ranges[stream_id])
+            for stream_id, json_schema in rows
+        ))
+
+    async def _compact(
+            self,
+            stream_id: int,
+            json_schema: dict,
+            ranges: list[tuple[datetime, datetime]],
+    ) -> None:
+        # propositions written within collect window mostly fall into the
+        #  same hour, which must be recomputed once
+        merged: list[tuple[datetime, datetime]] = []
+        for start, end in sorted(ranges):
+            if merged and (truncate(start, Granularity.HOUR)
+                           <= truncate(merged[-1][1], Granularity.HOUR)):
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+
+        async with (
+            self._locks[stream_id],
+            AsyncSession(self.engine) as session,
+        ):
+            await session.execute(select(func.pg_advisory_xact_lock(
+                _COMPACTION_LOCK_CLASS, stream_id)))
+            service = RollupsService(
+                orm_session=session,
+                read_only_session=ReadOnlySession(session),
+            )
+            for start, end in merged:
+                await service.compact(
+                    stream_id=stream_id,
+                    json_schema=json_schema,
+                    created_from=start,
+                    created_to=end,
+                )
+            await session.commit()
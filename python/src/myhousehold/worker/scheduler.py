@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from myhousehold.core.exceptions import DomainValueError
+from myhousehold.core.models import Proposition, Stream
+from myhousehold.core.notifications import PropositionChanges
+from myhousehold.core.services.aggregates import (
+    AggregatesService,
+    DeclaredAggregates,
+)
+from myhousehold.reasoners.base import BaseReasoner
+
+logger = logging.getLogger(__name__)
+
+# stream id to ids of its changed propositions, None if not enumerated
+AffectedPremises = dict[int, set[int] | None]
+
+
+class ReasonerScheduler:
+    """
+    Runs reasoners on propositions of record streams as their changes are
+    notified, so request handling never waits for reasoning.
+
+    For each owner of streams affected by a batch of changes every reasoner
+    is run on the affected premises, at most `reasoner_concurrency` runs
+    per reasoner at once.
+    Conclusions are recorded to the reasoner's project stream of the owner.
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            reasoners: list[BaseReasoner],
+            aggregates: DeclaredAggregates,
+            reasoner_concurrency: int,
+    ):
+        self.engine = engine
+        self.reasoners = reasoners
+        self.aggregates = aggregates
+
+        self._semaphores = {
+            i.name: asyncio.Semaphore(reasoner_concurrency)
+            for i in reasoners
+        }
+        # runs of the same reasoner for the same owner must not interleave
+        self._locks: defaultdict[tuple[str, int], asyncio.Lock] = (
+            defaultdict(asyncio.Lock))
+
+    async def rebuild_aggregates(self) -> None:
+        """
+        Rebuild aggregates new or changed since the last run, so that
+        reasoners read them complete. Must be called before processing.
+        """
+
+        async with AsyncSession(self.engine) as session:
+            aggregates_service = AggregatesService(session, self.aggregates)
+            rebuilt = await aggregates_service.rebuild_outdated()
+            await session.commit()
+        if rebuilt:
+            logger.info("Rebuilt aggregates: %s", ", ".join(rebuilt))
+
+    async def process(self, changes: list[PropositionChanges]) -> None:
+        affected: AffectedPremises = {}
+        for change in changes:
+            ids = affected.setdefault(change.stream_id, set())
+            if ids is None or change.ids is None:
+                affected[change.stream_id] = None
+            else:
+                ids.update(change.ids)
+
+        # conclusions are recorded to project streams, skipping them
+        #  prevents reasoning about own conclusions
+        stmt = (select(Stream.id, Stream.created_by_user_id)
+                .where(Stream.id.in_(affected))
+                .where(Stream.record_intent_id.is_not(None)))
+        async with AsyncSession(self.engine) as session:
+            rows = (await session.execute(stmt)).all()
+
+        by_owner: defaultdict[int, AffectedPremises] = defaultdict(dict)
+        for stream_id, owner_id in rows:
+            by_owner[owner_id][stream_id] = affected[stream_id]
+
+        results = await asyncio.gather(
+            *(self._run_reasoner(reasoner, owner_id, owner_affected)
+              for reasoner in self.reasoners
+              for owner_id, owner_affected in by_owner.items()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("Reasoner run failed", exc_info=result)
+
+    async def _run_reasoner(
+            self,
+            reasoner: BaseReasoner,
+            owner_id: int,
+            affected: AffectedPremises,
+    ) -> None:
+        async with (
+            self._semaphores[reasoner.name],
+            self._locks[reasoner.name, owner_id],
+            AsyncSession(self.engine, expire_on_commit=False) as session,
+        ):
+            stmt = reasoner.premises_selector().where(or_(*(
+                Proposition.stream_id == stream_id
+                if ids is None else
+                and_(Proposition.stream_id == stream_id,
+                     Proposition.id.in_(ids))
+                for stream_id, ids in affected.items()
+            )))
+            premises = list(await session.scalars(stmt))
+            if not premises:
+                return
+
+            stmt = (select(Stream.id)
+                    .where(Stream.created_by_user_id == owner_id)
+                    .where(Stream.record_intent_id.is_not(None)))
+            owner_stream_ids = list(await session.scalars(stmt))
+            aggregates_service = AggregatesService(session, self.aggregates)
+            aggregates = await aggregates_service.get_states(
+                bucket=date.today(),
+                stream_ids=owner_stream_ids,
+            )
+
+            conclusions = reasoner.inference(premises, aggregates)
+            if not conclusions:
+                return
+
+            stream = await self._get_conclusions_stream(
+                session, reasoner, owner_id)
+            try:
+                for conclusion in conclusions:
+                    Proposition.check_json_object(stream, conclusion)
+            except DomainValueError:
+                logger.exception("Reasoner %s concluded invalid object",
+                                 reasoner.name)
+                return
+
+            stmt = (insert(Proposition)
+                    .returning(Proposition, sort_by_parameter_order=True))
+            created = list(await session.scalars(stmt, [
+                {
+                    "json_object": conclusion,
+                    "comment": None,
+                    "stream_id": stream.id,
+                    "created_by_user_id": owner_id,
+                }
+                for conclusion in conclusions
+            ]))
+            await aggregates_service.on_created(stream, created)
+            await session.execute(Stream.bump_revision(stream.id))
+            await session.commit()
+
+    async def _get_conclusions_stream(
+            self,
+            session: AsyncSession,
+            reasoner: BaseReasoner,
+            owner_id: int,
+    ) -> Stream:
+        stmt = (select(Stream)
+                .where(Stream.created_by_user_id == owner_id)
+                .where(Stream.name == reasoner.name)
+                .where(Stream.project_intent_id.is_not(None)))
+        stream = await session.scalar(stmt)
+        json_schema = reasoner.declare_conclusion_schema()
+
+        if stream is None:
+            stream = Stream(
+                name=reasoner.name,
+                json_schema=json_schema,
+                is_private=True,
+                created_by_user_id=owner_id,
+                project_intent=reasoner.declare_project_intent(),
+            )
+            session.add(stream)
+            await session.flush()
+        elif stream.json_schema != json_schema:
+            stream.json_schema = json_schema
+
+        return stream